@@ -0,0 +1,106 @@
+"""
+Benchmark concurrent elevation batch fetching against a local stub server.
+
+Starts an HTTP server answering Open-Meteo style elevation requests after a
+fixed latency, then times ElevationClient fetching a long route with
+different numbers of concurrent batches.
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+# Add the src directory to the Python path
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+from api import http_session
+from elevation.elevation_client import ElevationClient
+
+
+class StubServer(ThreadingHTTPServer):
+    # The default backlog of 5 drops connections from larger thread pools
+    request_queue_size = 128
+    daemon_threads = True
+
+
+def make_handler(latency):
+    """
+    Create a request handler answering like Open-Meteo.
+    
+    Args:
+        latency (float): Seconds to wait before every response
+    
+    Returns:
+        type: BaseHTTPRequestHandler subclass
+    """
+    class StubHandler(BaseHTTPRequestHandler):
+        # Keep connections alive so pooled clients can reuse them
+        protocol_version = 'HTTP/1.1'
+        
+        def do_GET(self):
+            time.sleep(latency)
+            params = parse_qs(urlparse(self.path).query)
+            latitudes = params.get('latitude', [''])[0].split(',')
+            body = json.dumps({'elevation': [round(float(lat) * 100, 1) for lat in latitudes]}).encode('utf-8')
+            
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        
+        def log_message(self, format, *args):
+            pass
+    
+    return StubHandler
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--points', type=int, default=5000)
+    parser.add_argument('--latency', type=float, default=0.05, help="stub server latency in seconds")
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, 8, 16])
+    parser.add_argument('--rate', type=float, default=None,
+                        help="requests per second allowed by the rate limiter (default: unlimited)")
+    args = parser.parse_args()
+    
+    server = StubServer(('127.0.0.1', 0), make_handler(args.latency))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_address[1]}/v1/elevation"
+    
+    points = [(37.0 + i * 1e-4, -122.0) for i in range(args.points)]
+    limits = [(max(1, int(args.rate)), max(1, int(args.rate)) / args.rate)] if args.rate else []
+    batches = -(-args.points // ElevationClient.MAX_POINTS_PER_REQUEST)
+    
+    print(f"{args.points} points in {batches} batches, {args.latency * 1000:.0f} ms latency")
+    print(f"{'workers':<10}{'time (s)':>12}{'speedup':>12}")
+    
+    baseline = None
+    try:
+        for workers in args.workers:
+            client = ElevationClient(max_workers=workers, rate_limits={'open-meteo': limits})
+            client.OPEN_METEO_API = url
+            
+            start = time.perf_counter()
+            elevations = client.get_elevations(points)
+            elapsed = time.perf_counter() - start
+            client.close()
+            
+            assert elevations == [round(lat * 100, 1) for lat, _ in points]
+            baseline = baseline or elapsed
+            print(f"{workers:<10}{elapsed:12.2f}{baseline / elapsed:12.1f}x")
+        
+        for host, stats in http_session.get_pool().stats().items():
+            print(f"{host}: {stats['requests']} requests, {stats['new_connections']} new connections, "
+                  f"{stats['reused_connections']} reused")
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+"""
+Benchmark the binary route format against JSON.
+
+Builds a synthetic corpus with full elevation, lat/lng and distance
+streams, then compares the serialized size and load time of JSON with
+the float32 and delta16 binary encodings (loaded from bytes and from a
+memory-mapped file).
+"""
+
+import os
+import sys
+import json
+import time
+import tempfile
+import argparse
+import numpy as np
+
+# Add the src directory to the Python path
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+from models.route import Route
+from models.route_collection import RouteCollection
+from models import binary_format
+
+
+def make_routes(num_routes, num_points, seed=0):
+    """
+    Generate routes with random-walk elevation profiles.
+    
+    Args:
+        num_routes (int): Number of routes
+        num_points (int): Points per route
+        seed (int): Random seed
+    
+    Returns:
+        list: List of Route objects
+    """
+    rng = np.random.default_rng(seed)
+    routes = []
+    for i in range(num_routes):
+        latlng = np.array([37.7, -122.4]) + np.cumsum(rng.normal(0, 1e-4, (num_points, 2)), axis=0)
+        routes.append(Route(
+            id=f"strava_activity_{i}",
+            name=f"Route {i}",
+            distance=num_points * 10.0,
+            elevation_gain=float(rng.uniform(0, 1000)),
+            start_latlng=tuple(latlng[0]),
+            end_latlng=tuple(latlng[-1]),
+            elevation_points=np.round(100 + np.cumsum(rng.normal(0, 0.5, num_points)), 1),
+            latlng_points=latlng,
+            distance_points=np.arange(num_points) * 10.0,
+            source="strava"
+        ))
+    return routes
+
+
+def to_json(routes):
+    """
+    Serialize routes, including their streams, to JSON.
+    
+    Args:
+        routes (list): List of Route objects
+    
+    Returns:
+        bytes: JSON document
+    """
+    return json.dumps([
+        {
+            **route.to_dict(),
+            'elevation_points': route.elevation_points.tolist(),
+            'latlng_points': route.latlng_points.tolist(),
+            'distance_points': route.distance_points.tolist()
+        }
+        for route in routes
+    ]).encode('utf-8')
+
+
+def timed(func, repeat):
+    """
+    Get the best wall time of a function over several runs.
+    
+    Args:
+        func (callable): Function to time
+        repeat (int): Number of runs
+    
+    Returns:
+        float: Best time in milliseconds
+    """
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--routes', type=int, default=500)
+    parser.add_argument('--points', type=int, default=2000)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+    
+    routes = make_routes(args.routes, args.points)
+    collection = RouteCollection.from_routes(routes)
+    
+    json_data = to_json(routes)
+    results = [(
+        'json',
+        len(json_data),
+        timed(lambda: [Route.from_dict(item) for item in json.loads(json_data)], args.repeat),
+        None
+    )]
+    
+    with tempfile.TemporaryDirectory() as directory:
+        for encoding in binary_format.ELEVATION_ENCODINGS:
+            data = binary_format.dumps_collection(collection, encoding)
+            path = os.path.join(directory, f"{encoding}.semr")
+            binary_format.save_collection(path, collection, encoding)
+            
+            results.append((
+                encoding,
+                len(data),
+                timed(lambda: binary_format.loads_collection(data), args.repeat),
+                timed(lambda: binary_format.load_collection(path, mmap=True), args.repeat)
+            ))
+    
+    print(f"{args.routes} routes x {args.points} points")
+    print(f"{'format':<10}{'size (MB)':>12}{'load (ms)':>12}{'mmap (ms)':>12}")
+    for name, size, load_ms, mmap_ms in results:
+        mmap_text = f"{mmap_ms:12.2f}" if mmap_ms is not None else f"{'-':>12}"
+        print(f"{name:<10}{size / 1e6:12.2f}{load_ms:12.2f}{mmap_text}")
+
+
+if __name__ == "__main__":
+    main()
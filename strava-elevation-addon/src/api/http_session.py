@@ -0,0 +1,286 @@
+"""
+Shared HTTP connection pooling for the Strava and elevation API clients.
+"""
+
+import time
+import logging
+import threading
+from urllib.parse import urlsplit
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+logger = logging.getLogger(__name__)
+
+# (connect, read) timeout in seconds for requests that do not set one
+DEFAULT_TIMEOUT = (5, 30)
+
+# Connections opened by the current thread; pools open them in the requesting thread
+_opened = threading.local()
+
+
+class _CountingHTTPConnectionPool(HTTPConnectionPool):
+    def _new_conn(self):
+        _opened.count = getattr(_opened, 'count', 0) + 1
+        return super()._new_conn()
+
+
+class _CountingHTTPSConnectionPool(HTTPSConnectionPool):
+    def _new_conn(self):
+        _opened.count = getattr(_opened, 'count', 0) + 1
+        return super()._new_conn()
+
+
+class _CountingAdapter(HTTPAdapter):
+    """
+    HTTP adapter whose connection pools count the connections they open.
+    """
+    
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            'http': _CountingHTTPConnectionPool,
+            'https': _CountingHTTPSConnectionPool
+        }
+
+
+class SessionPool:
+    """
+    Thread-safe pool of keep-alive HTTP connections.
+    
+    Every thread gets its own requests.Session (sessions are not safe to
+    share between threads), but all sessions mount the same adapters, so
+    TCP and TLS connections are kept alive and reused across threads and
+    calls. Hosts listed in host_limits get their own adapter holding at
+    most that many connections; requests beyond it wait for a free one.
+    
+    Every request is timed and classified as using a new or a reused
+    connection. Timings are logged at debug level, passed to an optional
+    callback and aggregated per host in stats().
+    """
+    
+    def __init__(self, pool_connections=10, pool_maxsize=10, timeout=DEFAULT_TIMEOUT, host_limits=None,
+                 on_request=None):
+        """
+        Initialize the pool.
+        
+        Args:
+            pool_connections (int): Number of hosts whose connections are kept
+            pool_maxsize (int): Maximum connections kept per host
+            timeout: Default (connect, read) timeout in seconds, or a single
+                     number for both
+            host_limits (dict): Host -> maximum number of concurrent connections
+            on_request (callable): Called as on_request(method, host, seconds,
+                                   reused) after every request
+        """
+        self.timeout = timeout
+        self.on_request = on_request
+        
+        self._adapter = _CountingAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize)
+        self._host_adapters = {
+            host: _CountingAdapter(pool_connections=1, pool_maxsize=limit, pool_block=True)
+            for host, limit in (host_limits or {}).items()
+        }
+        
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._stats = {}
+    
+    def request(self, method, url, **kwargs):
+        """
+        Send a request over a pooled connection.
+        
+        Args:
+            method (str): HTTP method
+            url (str): Request URL
+            **kwargs: Arguments accepted by requests.Session.request
+        
+        Returns:
+            requests.Response: Response
+        """
+        kwargs.setdefault('timeout', self.timeout)
+        session = self._session()
+        host = urlsplit(url).netloc
+        opened = getattr(_opened, 'count', 0)
+        
+        start = time.perf_counter()
+        try:
+            return session.request(method, url, **kwargs)
+        finally:
+            elapsed = time.perf_counter() - start
+            self._record(method, host, elapsed, reused=getattr(_opened, 'count', 0) == opened)
+    
+    def get(self, url, **kwargs):
+        """
+        Send a GET request.
+        
+        Args:
+            url (str): Request URL
+            **kwargs: Arguments accepted by requests.Session.request
+        
+        Returns:
+            requests.Response: Response
+        """
+        return self.request('GET', url, **kwargs)
+    
+    def post(self, url, **kwargs):
+        """
+        Send a POST request.
+        
+        Args:
+            url (str): Request URL
+            **kwargs: Arguments accepted by requests.Session.request
+        
+        Returns:
+            requests.Response: Response
+        """
+        return self.request('POST', url, **kwargs)
+    
+    def stats(self):
+        """
+        Get request timing statistics per host.
+        
+        Returns:
+            dict: Host -> number of requests, new_connections and
+                  reused_connections, and the mean seconds of requests on
+                  new and on reused connections
+        """
+        with self._lock:
+            stats = {host: dict(values) for host, values in self._stats.items()}
+        
+        for values in stats.values():
+            values['mean_new_seconds'] = (values.pop('new_seconds') / values['new_connections']
+                                          if values['new_connections'] else None)
+            values['mean_reused_seconds'] = (values.pop('reused_seconds') / values['reused_connections']
+                                             if values['reused_connections'] else None)
+        return stats
+    
+    def close(self):
+        """
+        Close every pooled connection.
+        """
+        self._adapter.close()
+        for adapter in self._host_adapters.values():
+            adapter.close()
+    
+    def _session(self):
+        """
+        Get the calling thread's session, creating it on first use.
+        
+        Returns:
+            requests.Session: Session mounting the shared adapters
+        """
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            session = requests.Session()
+            session.mount('https://', self._adapter)
+            session.mount('http://', self._adapter)
+            for host, adapter in self._host_adapters.items():
+                session.mount(f'https://{host}/', adapter)
+                session.mount(f'http://{host}/', adapter)
+            self._local.session = session
+        return session
+    
+    def _record(self, method, host, elapsed, reused):
+        """
+        Record the timing of a request.
+        
+        Args:
+            method (str): HTTP method
+            host (str): Request host
+            elapsed (float): Request duration in seconds
+            reused (bool): Whether an existing connection was reused
+        """
+        kind = 'reused' if reused else 'new'
+        logger.debug(f"{method} {host} took {elapsed * 1000:.1f} ms on a {kind} connection")
+        
+        with self._lock:
+            values = self._stats.setdefault(host, {
+                'requests': 0, 'new_connections': 0, 'reused_connections': 0,
+                'new_seconds': 0.0, 'reused_seconds': 0.0
+            })
+            values['requests'] += 1
+            values[f'{kind}_connections'] += 1
+            values[f'{kind}_seconds'] += elapsed
+        
+        if self.on_request is not None:
+            self.on_request(method, host, elapsed, reused)
+
+
+_default_pool = None
+_default_lock = threading.Lock()
+
+
+def configure(**kwargs):
+    """
+    Replace the shared pool used by the API clients.
+    
+    Args:
+        **kwargs: Arguments of SessionPool
+    
+    Returns:
+        SessionPool: The new shared pool
+    """
+    global _default_pool
+    with _default_lock:
+        previous, _default_pool = _default_pool, SessionPool(**kwargs)
+    if previous is not None:
+        previous.close()
+    return _default_pool
+
+
+def get_pool():
+    """
+    Get the shared pool, creating it with default settings on first use.
+    
+    Returns:
+        SessionPool: Shared pool
+    """
+    global _default_pool
+    with _default_lock:
+        if _default_pool is None:
+            _default_pool = SessionPool()
+        return _default_pool
+
+
+def request(method, url, **kwargs):
+    """
+    Send a request through the shared pool.
+    
+    Args:
+        method (str): HTTP method
+        url (str): Request URL
+        **kwargs: Arguments accepted by requests.Session.request
+    
+    Returns:
+        requests.Response: Response
+    """
+    return get_pool().request(method, url, **kwargs)
+
+
+def get(url, **kwargs):
+    """
+    Send a GET request through the shared pool.
+    
+    Args:
+        url (str): Request URL
+        **kwargs: Arguments accepted by requests.Session.request
+    
+    Returns:
+        requests.Response: Response
+    """
+    return get_pool().get(url, **kwargs)
+
+
+def post(url, **kwargs):
+    """
+    Send a POST request through the shared pool.
+    
+    Args:
+        url (str): Request URL
+        **kwargs: Arguments accepted by requests.Session.request
+    
+    Returns:
+        requests.Response: Response
+    """
+    return get_pool().post(url, **kwargs)
@@ -6,6 +6,7 @@ import requests
 import json
 import time
 import logging
+from api import http_session
 from models.route import Route
 
 logger = logging.getLogger(__name__)
@@ -54,7 +55,7 @@ class StravaClient:
         }
         
         try:
-            response = requests.post(self.AUTH_URL, data=data)
+            response = http_session.post(self.AUTH_URL, data=data)
             response.raise_for_status()
             token_data = response.json()
             
@@ -109,7 +110,7 @@ class StravaClient:
         }
         
         try:
-            response = requests.post(self.AUTH_URL, data=data)
+            response = http_session.post(self.AUTH_URL, data=data)
             response.raise_for_status()
             token_data = response.json()
             
@@ -167,7 +168,7 @@ class StravaClient:
         headers = self.get_headers()
         
         try:
-            response = requests.request(
+            response = http_session.request(
                 method=method,
                 url=url,
                 headers=headers,
@@ -209,7 +210,7 @@ class StravaClient:
                 'page': 1,
                 'per_page': min(limit, 200)
             }
-            requests.get(f"{self.BASE_URL}/athlete/activities", 
+            http_session.get(f"{self.BASE_URL}/athlete/activities", 
                         headers=self.get_headers(), 
                         params=params)
             
@@ -308,7 +309,7 @@ class StravaClient:
                 'key_by_type': True
             }
             
-            requests.get(f"{self.BASE_URL}/activities/{activity_id}/streams", 
+            http_session.get(f"{self.BASE_URL}/activities/{activity_id}/streams", 
                         headers=self.get_headers(), 
                         params=params)
             
@@ -430,7 +431,7 @@ class StravaClient:
         headers = self.get_headers()
         
         try:
-            response = requests.get(url, headers=headers)
+            response = http_session.get(url, headers=headers)
             response.raise_for_status()
             return response.text
         except Exception as e:
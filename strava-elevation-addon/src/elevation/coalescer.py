@@ -0,0 +1,247 @@
+"""
+Coalescing of elevation requests from concurrent callers into full batches.
+"""
+
+import time
+import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from elevation.elevation_cache import DEFAULT_CELL_ARCSEC, quantize, cell_centers
+
+logger = logging.getLogger(__name__)
+
+
+class _Request:
+    """
+    Points requested by one caller and the elevations resolved so far.
+    """
+    
+    __slots__ = ('future', 'keys', 'values', 'remaining')
+    
+    def __init__(self, keys):
+        self.future = Future()
+        self.keys = keys
+        self.values = {}
+        self.remaining = len(set(keys))
+
+
+class ElevationCoalescer:
+    """
+    Packs point requests from concurrent callers into full provider batches.
+    
+    Points submitted within `window` seconds of the oldest waiting point are
+    pooled per provider. Identical points (same grid cell when quantized) are
+    fetched once, also when another caller's request for them is already in
+    flight, and every complete batch is dispatched as soon as it fills up.
+    The remainder is sent when the window expires. Each caller gets a future
+    resolved with its elevations in order, or None if a batch holding one of
+    its points failed.
+    """
+    
+    def __init__(self, fetch, batch_size=100, window=0.05, cell_arcsec=DEFAULT_CELL_ARCSEC, max_workers=4):
+        """
+        Initialize the coalescer.
+        
+        Args:
+            fetch (callable): fetch(points, provider) returning a list of
+                              elevations or None, called with one batch at a time
+            batch_size (int): Points per provider request
+            window (float): Seconds a point may wait for others to fill its batch
+            cell_arcsec (float): Grid cell size in arc-seconds that points are
+                                 quantized to (None to only merge identical
+                                 coordinates)
+            max_workers (int): Maximum number of batches fetched concurrently
+        """
+        self.fetch = fetch
+        self.batch_size = batch_size
+        self.window = window
+        self.cell_arcsec = cell_arcsec
+        
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="elevation-coalesce")
+        self._condition = threading.Condition()
+        self._dispatcher = None
+        self._closed = False
+        
+        # Provider -> key -> point, for points not dispatched yet
+        self._pending = {}
+        # Provider -> time the oldest pending point was submitted
+        self._oldest = {}
+        # (provider, key) -> requests waiting for that point, pending or in flight
+        self._waiting = {}
+        
+        self._stats = {'requests': 0, 'points': 0, 'fetched_points': 0, 'batches': 0}
+    
+    def submit(self, points, provider):
+        """
+        Request elevations for points.
+        
+        Args:
+            points (list): List of (lat, lng) tuples
+            provider (str): Provider to fetch from
+        
+        Returns:
+            Future: Resolves to the list of elevations in meters, or None if
+                    the request failed
+        """
+        keys, fetch_points = self._keys(points)
+        request = _Request(keys)
+        if not keys:
+            request.future.set_result([])
+            return request.future
+        
+        with self._condition:
+            if self._closed:
+                raise RuntimeError("Elevation coalescer is closed")
+            
+            pending = self._pending.setdefault(provider, OrderedDict())
+            for key, point in zip(keys, fetch_points):
+                waiting = self._waiting.get((provider, key))
+                if waiting is None:
+                    waiting = self._waiting[(provider, key)] = []
+                    pending[key] = point
+                if not waiting or waiting[-1] is not request:
+                    waiting.append(request)
+            
+            if pending and provider not in self._oldest:
+                self._oldest[provider] = time.monotonic()
+            
+            self._stats['requests'] += 1
+            self._stats['points'] += len(keys)
+            
+            if self._dispatcher is None:
+                self._dispatcher = threading.Thread(target=self._dispatch_loop, name="elevation-coalescer",
+                                                    daemon=True)
+                self._dispatcher.start()
+            self._condition.notify()
+        
+        return request.future
+    
+    def get_elevations(self, points, provider):
+        """
+        Request elevations for points and wait for them.
+        
+        Args:
+            points (list): List of (lat, lng) tuples
+            provider (str): Provider to fetch from
+        
+        Returns:
+            list: List of elevations in meters or None if request failed
+        """
+        return self.submit(points, provider).result()
+    
+    def stats(self):
+        """
+        Get coalescing statistics.
+        
+        Returns:
+            dict: Number of requests, requested points, fetched_points and
+                  batches sent to the provider
+        """
+        with self._condition:
+            return dict(self._stats)
+    
+    def close(self):
+        """
+        Dispatch every waiting point, wait for the results and stop the
+        dispatcher thread.
+        """
+        with self._condition:
+            self._closed = True
+            self._condition.notify()
+            dispatcher = self._dispatcher
+        
+        if dispatcher is not None:
+            dispatcher.join()
+        self._executor.shutdown(wait=True)
+    
+    def _keys(self, points):
+        """
+        Get the deduplication keys of points and the points fetched for them.
+        
+        Args:
+            points (list): List of (lat, lng) tuples
+        
+        Returns:
+            tuple: (one hashable key per point, point sent to the provider for
+                   each key: the cell center when quantizing)
+        """
+        if self.cell_arcsec is None:
+            keys = [(float(point[0]), float(point[1])) for point in points]
+            return keys, keys
+        
+        keys = quantize(points, self.cell_arcsec).tolist() if len(points) else []
+        return keys, cell_centers(keys, self.cell_arcsec)
+    
+    def _dispatch_loop(self):
+        """
+        Send full batches as they fill up and partial ones when their window expires.
+        """
+        with self._condition:
+            while True:
+                now = time.monotonic()
+                timeout = None
+                
+                for provider in list(self._pending):
+                    pending = self._pending[provider]
+                    if not pending:
+                        del self._pending[provider]
+                        self._oldest.pop(provider, None)
+                        continue
+                    
+                    expired = self._closed or now - self._oldest[provider] >= self.window
+                    count = len(pending) if expired else len(pending) // self.batch_size * self.batch_size
+                    
+                    for start in range(0, count, self.batch_size):
+                        batch = [pending.popitem(last=False) for _ in range(min(self.batch_size, count - start))]
+                        self._stats['batches'] += 1
+                        self._stats['fetched_points'] += len(batch)
+                        self._executor.submit(self._fetch_batch, provider, batch)
+                    
+                    # Points left after full batches keep their deadline
+                    if pending:
+                        wait = self._oldest[provider] + self.window - now
+                        timeout = wait if timeout is None else min(timeout, wait)
+                    else:
+                        del self._pending[provider]
+                        del self._oldest[provider]
+                
+                if self._closed and not self._pending:
+                    return
+                self._condition.wait(timeout)
+    
+    def _fetch_batch(self, provider, batch):
+        """
+        Fetch one batch and resolve the requests waiting for its points.
+        
+        Args:
+            provider (str): Provider to fetch from
+            batch (list): List of (key, point) pairs
+        """
+        try:
+            elevations = self.fetch([point for _, point in batch], provider)
+        except Exception as e:
+            logger.error(f"Coalesced elevation batch failed: {str(e)}")
+            elevations = None
+        
+        if elevations is not None and len(elevations) != len(batch):
+            logger.error(f"Expected {len(batch)} elevations, got {len(elevations)}")
+            elevations = None
+        
+        finished = []
+        with self._condition:
+            for i, (key, _) in enumerate(batch):
+                for request in self._waiting.pop((provider, key), []):
+                    if request.remaining == 0:
+                        continue
+                    if elevations is None:
+                        request.remaining = 0
+                        finished.append((request, None))
+                        continue
+                    request.values[key] = elevations[i]
+                    request.remaining -= 1
+                    if request.remaining == 0:
+                        finished.append((request, [request.values[k] for k in request.keys]))
+        
+        for request, result in finished:
+            request.future.set_result(result)
@@ -0,0 +1,182 @@
+"""
+Offline elevation lookups from local SRTM tiles.
+"""
+
+import os
+import math
+import logging
+import threading
+from collections import OrderedDict
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# SRTM marks missing samples with the smallest int16
+HGT_VOID = -32768
+
+
+def hgt_tile_name(lat, lng):
+    """
+    Get the name of the SRTM tile covering a point.
+    
+    Tiles are named after their south west corner, e.g. N37W123.hgt covers
+    latitudes 37 to 38 and longitudes -123 to -122.
+    
+    Args:
+        lat (float): Latitude
+        lng (float): Longitude
+    
+    Returns:
+        str: Tile file name
+    """
+    lat0, lng0 = math.floor(lat), math.floor(lng)
+    return (f"{'N' if lat0 >= 0 else 'S'}{abs(lat0):02d}"
+            f"{'E' if lng0 >= 0 else 'W'}{abs(lng0):03d}.hgt")
+
+
+class LocalDEM:
+    """
+    Digital elevation model read from a directory of SRTM .hgt tiles.
+    
+    Each tile is a square grid of big-endian int16 samples in meters, rows
+    running north to south, with 1201 (3 arc-second) or 3601 (1 arc-second)
+    samples per side; the side is taken from the file size, so any square
+    tile works. Tiles are opened with numpy.memmap, so only the pages that
+    are sampled are read, and the most recently used tiles are kept open.
+    Missing tiles are looked for again on every lookup, so tiles added to
+    the directory later are picked up.
+    Copernicus GLO-30/GLO-90 or ASTER data can be used once converted to
+    .hgt (e.g. with gdal_translate -of SRTMHGT).
+    """
+    
+    def __init__(self, directory, max_open_tiles=16):
+        """
+        Initialize the DEM.
+        
+        Args:
+            directory (str): Directory holding the .hgt tiles
+            max_open_tiles (int): Maximum number of tiles kept memory-mapped
+        """
+        self.directory = directory
+        self.max_open_tiles = max_open_tiles
+        
+        self._lock = threading.Lock()
+        self._tiles = OrderedDict()
+    
+    def get_elevations(self, points):
+        """
+        Get elevations by bilinear interpolation between the surrounding samples.
+        
+        Points are grouped by tile and every tile is sampled in one vectorized
+        step.
+        
+        Args:
+            points (list): List of (lat, lng) points
+        
+        Returns:
+            numpy.ndarray: float64 elevations in meters, NaN where no tile
+                           covers a point or a surrounding sample is void
+        """
+        coords = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+        elevations = np.full(len(coords), np.nan)
+        if len(coords) == 0:
+            return elevations
+        
+        corners = np.floor(coords).astype(np.int64)
+        tiles, inverse = np.unique(corners, axis=0, return_inverse=True)
+        inverse = inverse.ravel()
+        
+        order = np.argsort(inverse, kind='stable')
+        bounds = np.searchsorted(inverse[order], np.arange(len(tiles) + 1))
+        
+        for t, (lat0, lng0) in enumerate(tiles.tolist()):
+            tile = self._tile(lat0, lng0)
+            if tile is None:
+                continue
+            
+            selected = order[bounds[t]:bounds[t + 1]]
+            elevations[selected] = self._interpolate(tile, coords[selected], lat0, lng0)
+        
+        return elevations
+    
+    def _interpolate(self, tile, coords, lat0, lng0):
+        """
+        Bilinear interpolation of points within one tile.
+        
+        Args:
+            tile (numpy.ndarray): (size, size) tile samples
+            coords (numpy.ndarray): (k, 2) points within the tile
+            lat0 (int): Latitude of the tile's south edge
+            lng0 (int): Longitude of the tile's west edge
+        
+        Returns:
+            numpy.ndarray: k elevations, NaN next to void samples
+        """
+        cells = tile.shape[0] - 1
+        rows = (lat0 + 1 - coords[:, 0]) * cells
+        cols = (coords[:, 1] - lng0) * cells
+        
+        # Points on the last row or column use the cell before it
+        r0 = np.minimum(np.floor(rows).astype(np.int64), cells - 1)
+        c0 = np.minimum(np.floor(cols).astype(np.int64), cells - 1)
+        fr = (rows - r0)[:, None]
+        fc = (cols - c0)[:, None]
+        
+        samples = tile[r0[:, None] + [0, 0, 1, 1], c0[:, None] + [0, 1, 0, 1]].astype(np.float64)
+        samples[samples == HGT_VOID] = np.nan
+        
+        weights = np.hstack(((1 - fr) * (1 - fc), (1 - fr) * fc, fr * (1 - fc), fr * fc))
+        return np.einsum('ij,ij->i', samples, weights)
+    
+    def _tile(self, lat0, lng0):
+        """
+        Get a memory-mapped tile, opening it if needed.
+        
+        Args:
+            lat0 (int): Latitude of the tile's south edge
+            lng0 (int): Longitude of the tile's west edge
+        
+        Returns:
+            numpy.ndarray: (size, size) big-endian int16 samples, or None if
+                           the directory has no such tile
+        """
+        key = (lat0, lng0)
+        
+        with self._lock:
+            if key in self._tiles:
+                self._tiles.move_to_end(key)
+                return self._tiles[key]
+            
+            tile = self._open_tile(lat0, lng0)
+            if tile is None:
+                return None
+            
+            self._tiles[key] = tile
+            while len(self._tiles) > self.max_open_tiles:
+                self._tiles.popitem(last=False)
+            return tile
+    
+    def _open_tile(self, lat0, lng0):
+        """
+        Memory-map a tile file.
+        
+        Args:
+            lat0 (int): Latitude of the tile's south edge
+            lng0 (int): Longitude of the tile's west edge
+        
+        Returns:
+            numpy.ndarray: (size, size) samples, or None if the tile is missing
+        """
+        path = os.path.join(self.directory, hgt_tile_name(lat0, lng0))
+        try:
+            size = os.path.getsize(path)
+        except OSError:
+            logger.warning(f"No elevation tile {path}")
+            return None
+        
+        side = math.isqrt(size // 2)
+        if side < 2 or side * side * 2 != size:
+            logger.error(f"Elevation tile {path} is not a square grid of int16 samples")
+            return None
+        
+        return np.memmap(path, dtype='>i2', mode='r', shape=(side, side))
@@ -0,0 +1,246 @@
+"""
+Persistent elevation cache keyed by quantized coordinates.
+"""
+
+import sqlite3
+import logging
+import threading
+from collections import OrderedDict
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Grid cell size of 90 m DEMs (Copernicus GLO-90, SRTM3) in arc-seconds
+DEFAULT_CELL_ARCSEC = 3.0
+
+# Longitude indices are offset into the low 32 bits of a cell key
+_LNG_BITS = 32
+_LNG_OFFSET = 1 << (_LNG_BITS - 1)
+
+# Stay below SQLite's default limit on bound parameters per statement
+_SQL_BATCH = 500
+
+
+def quantize(points, cell_arcsec=DEFAULT_CELL_ARCSEC):
+    """
+    Get the keys of the grid cells holding points.
+    
+    Args:
+        points (list): List of (lat, lng) points
+        cell_arcsec (float): Grid cell size in arc-seconds
+    
+    Returns:
+        numpy.ndarray: int64 cell key of every point
+    """
+    coords = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+    indices = np.round(coords * (3600.0 / cell_arcsec)).astype(np.int64)
+    return (indices[:, 0] << _LNG_BITS) + (indices[:, 1] + _LNG_OFFSET)
+
+
+def cell_centers(cells, cell_arcsec=DEFAULT_CELL_ARCSEC):
+    """
+    Get the center points of grid cells.
+    
+    Args:
+        cells (list): Cell keys
+        cell_arcsec (float): Grid cell size in arc-seconds
+    
+    Returns:
+        list: List of (lat, lng) tuples
+    """
+    cells = np.asarray(cells, dtype=np.int64)
+    cell_degrees = cell_arcsec / 3600.0
+    lat = (cells >> _LNG_BITS) * cell_degrees
+    lng = ((cells & ((1 << _LNG_BITS) - 1)) - _LNG_OFFSET) * cell_degrees
+    return list(zip(lat.tolist(), lng.tolist()))
+
+
+class ElevationCache:
+    """
+    Elevation cache with an in-memory LRU in front of a SQLite database.
+    
+    Points are quantized to a grid matching the resolution of the DEM behind
+    the providers, so every point within one cell (about 90 x 90 m at the
+    default 3 arc-seconds) shares a single cached elevation, fetched at the
+    cell center. Cells are stored as one integer key per cell. Cells without
+    an elevation (voids the providers report as null, or points outside
+    the local DEM tiles) are not cached, so they are requested again on
+    the next lookup. The database runs in WAL mode, so several processes can share
+    one cache file.
+    """
+    
+    def __init__(self, path=None, cell_arcsec=DEFAULT_CELL_ARCSEC, memory_size=100000):
+        """
+        Open (or create) an elevation cache.
+        
+        Args:
+            path (str): SQLite database file (None to keep the cache in memory only)
+            cell_arcsec (float): Grid cell size in arc-seconds
+            memory_size (int): Maximum number of cells held in the in-memory LRU
+        """
+        if cell_arcsec <= 0:
+            raise ValueError(f"Cell size must be positive, got {cell_arcsec}")
+        
+        self.path = path
+        self.cell_arcsec = float(cell_arcsec)
+        self.cell_degrees = self.cell_arcsec / 3600.0
+        self.memory_size = memory_size
+        
+        self._lock = threading.Lock()
+        self._memory = OrderedDict()
+        self._stats = {'memory_hits': 0, 'disk_hits': 0, 'misses': 0}
+        
+        self._db = None
+        if path:
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+            self._db.execute("CREATE TABLE IF NOT EXISTS elevations (cell INTEGER PRIMARY KEY, elevation REAL)")
+            self._check_cell_size()
+            self._db.commit()
+    
+    def __len__(self):
+        with self._lock:
+            if self._db is None:
+                return len(self._memory)
+            return self._db.execute("SELECT COUNT(*) FROM elevations").fetchone()[0]
+    
+    def cells(self, points):
+        """
+        Get the grid cell keys of points.
+        
+        Args:
+            points (list): List of (lat, lng) points
+        
+        Returns:
+            numpy.ndarray: int64 cell key of every point
+        """
+        return quantize(points, self.cell_arcsec)
+    
+    def cell_centers(self, cells):
+        """
+        Get the center points of grid cells.
+        
+        Args:
+            cells (list): Cell keys
+        
+        Returns:
+            list: List of (lat, lng) tuples
+        """
+        return cell_centers(cells, self.cell_arcsec)
+    
+    def lookup(self, cells):
+        """
+        Look up cached elevations, first in memory and then on disk.
+        
+        Args:
+            cells (list): Cell keys
+        
+        Returns:
+            dict: Cell key -> elevation of the cached cells
+        """
+        found = {}
+        missing = []
+        
+        with self._lock:
+            for cell in (int(cell) for cell in cells):
+                if cell in self._memory:
+                    self._memory.move_to_end(cell)
+                    found[cell] = self._memory[cell]
+                else:
+                    missing.append(cell)
+            self._stats['memory_hits'] += len(found)
+            
+            on_disk = {}
+            if missing and self._db is not None:
+                for i in range(0, len(missing), _SQL_BATCH):
+                    batch = missing[i:i + _SQL_BATCH]
+                    rows = self._db.execute(
+                        f"SELECT cell, elevation FROM elevations WHERE cell IN ({','.join('?' * len(batch))})",
+                        batch
+                    )
+                    on_disk.update(rows)
+                
+                self._stats['disk_hits'] += len(on_disk)
+                self._remember(on_disk)
+                found.update(on_disk)
+            
+            self._stats['misses'] += len(missing) - len(on_disk)
+        
+        return found
+    
+    def store(self, cells, elevations):
+        """
+        Cache the elevations of grid cells.
+        
+        Cells without an elevation are not cached, so they are fetched again
+        next time (e.g. once a missing DEM tile has been added).
+        
+        Args:
+            cells (list): Cell keys
+            elevations (list): Elevation of every cell in meters (None for
+                               voids, which are skipped)
+        """
+        values = {
+            int(cell): float(elevation)
+            for cell, elevation in zip(cells, elevations)
+            if elevation is not None
+        }
+        if not values:
+            return
+        
+        with self._lock:
+            self._remember(values)
+            if self._db is not None:
+                self._db.executemany("INSERT OR REPLACE INTO elevations (cell, elevation) VALUES (?, ?)",
+                                     values.items())
+                self._db.commit()
+    
+    def stats(self):
+        """
+        Get cache hit statistics.
+        
+        Returns:
+            dict: Number of memory_hits, disk_hits and misses among looked up
+                  cells, and the overall hit_rate
+        """
+        with self._lock:
+            stats = dict(self._stats)
+        
+        lookups = stats['memory_hits'] + stats['disk_hits'] + stats['misses']
+        stats['hit_rate'] = (stats['memory_hits'] + stats['disk_hits']) / lookups if lookups else 0.0
+        return stats
+    
+    def close(self):
+        """
+        Close the database connection.
+        """
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+    
+    def _remember(self, values):
+        """
+        Add cells to the in-memory LRU, evicting the least recently used.
+        
+        Args:
+            values (dict): Cell key -> elevation
+        """
+        for cell, elevation in values.items():
+            self._memory[cell] = elevation
+            self._memory.move_to_end(cell)
+        
+        while len(self._memory) > self.memory_size:
+            self._memory.popitem(last=False)
+    
+    def _check_cell_size(self):
+        """
+        Record the cell size of a new database, or check it matches an existing one.
+        """
+        row = self._db.execute("SELECT value FROM meta WHERE key = 'cell_arcsec'").fetchone()
+        if row is None:
+            self._db.execute("INSERT INTO meta (key, value) VALUES ('cell_arcsec', ?)", (repr(self.cell_arcsec),))
+        elif float(row[0]) != self.cell_arcsec:
+            raise ValueError(f"Elevation cache {self.path} uses {row[0]} arc-second cells, "
+                             f"not {self.cell_arcsec}")
@@ -2,13 +2,30 @@
 Elevation data client for accessing elevation data from external APIs.
 """
 
-import requests
 import logging
 import time
+import hashlib
+import threading
+from collections import OrderedDict
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError, as_completed
 from urllib.parse import urlencode
+from api import http_session
+from models.route import cumulative_distance
+from models.simplification import simplify_indices
+from elevation.dem import LocalDEM
+from elevation.rate_limiter import RateLimiter
+from elevation.elevation_cache import DEFAULT_CELL_ARCSEC
+from elevation.coalescer import ElevationCoalescer
+from elevation import sampling
+from elevation.sampling import DEFAULT_SAMPLE_TOLERANCE_M
+from elevation.provider_health import ProviderHealth, OPEN, backoff_delay, parse_retry_after
 
 logger = logging.getLogger(__name__)
 
+# Marks points whose batch failed, as None is a valid elevation (a void)
+_MISSING = object()
+
 class ElevationClient:
     """
     Client for retrieving elevation data from external APIs.
@@ -19,19 +36,108 @@ class ElevationClient:
     OPEN_METEO_API = "https://api.open-meteo.com/v1/elevation"
     OPEN_TOPO_DATA_API = "https://api.opentopodata.org/v1/srtm"
     
-    def __init__(self, primary_provider="open-meteo", max_retries=3, retry_delay=1):
+    PROVIDER_NAMES = {"open-meteo": "Open-Meteo", "open-topo-data": "Open Topo Data"}
+    
+    # Both APIs accept up to 100 points per request
+    MAX_POINTS_PER_REQUEST = 100
+    
+    # Number of partially fetched requests whose progress is kept for resuming
+    MAX_SAVED_PROGRESS = 64
+    
+    # Published free tier quotas as (calls, period in seconds)
+    RATE_LIMITS = {
+        "open-meteo": [(600, 60), (5000, 3600), (10000, 86400)],
+        "open-topo-data": [(1, 1), (1000, 86400)]
+    }
+    
+    def __init__(self, primary_provider="open-meteo", max_retries=3, retry_delay=1, cache=None,
+                 dem_directory=None, max_workers=4, rate_limits=None, rate_limit_timeout=60,
+                 coalesce_window=None, max_retry_delay=10, hedge_percentile=None,
+                 failure_threshold=5, reset_timeout=30):
         """
         Initialize the elevation data client.
         
         Args:
             primary_provider (str): Primary elevation data provider 
-                                   ("open-meteo" or "open-topo-data")
+                                   ("open-meteo", "open-topo-data" or "local-dem")
             max_retries (int): Maximum number of retry attempts
-            retry_delay (int): Delay between retries in seconds
+            retry_delay (int): Base delay between retries in seconds, doubled
+                               for every further retry and jittered
+            cache (ElevationCache): Cache of elevations by grid cell, so only
+                                    cells not seen before are fetched (None
+                                    to fetch every point)
+            dem_directory (str): Directory of SRTM .hgt tiles for the
+                                 "local-dem" provider (required when it is
+                                 the primary provider)
+            max_workers (int): Maximum number of batches fetched concurrently
+            rate_limits (dict): Provider -> list of (calls, period in seconds)
+                                quotas, overriding RATE_LIMITS (an empty list
+                                disables limiting for a provider)
+            rate_limit_timeout (float): Maximum seconds a batch waits for the
+                                        rate limiter before it fails
+            coalesce_window (float): Seconds to pool points requested by
+                                     concurrent callers into full batches
+                                     (None to send every call's points on
+                                     their own)
+            max_retry_delay (float): Maximum delay between retries in seconds;
+                                     a provider asking (with Retry-After) to
+                                     wait longer is given up on for the batch
+            hedge_percentile (float): Latency percentile of the provider after
+                                      which a batch is also sent to the other
+                                      provider, using whichever answers first
+                                      (None to disable hedging)
+            failure_threshold (int): Consecutive failures that open a
+                                     provider's circuit breaker
+            reset_timeout (float): Seconds an open circuit rejects requests
+                                   before letting a probe through
         """
+        if primary_provider == "local-dem" and not dem_directory:
+            raise ValueError("The local-dem provider needs a dem_directory")
+        
         self.primary_provider = primary_provider
         self.max_retries = max_retries
         self.retry_delay = retry_delay
+        self.cache = cache
+        self.dem = LocalDEM(dem_directory) if dem_directory else None
+        self.max_workers = max_workers
+        self.max_retry_delay = max_retry_delay
+        self.hedge_percentile = hedge_percentile
+        self.rate_limit_timeout = rate_limit_timeout
+        
+        # Limiters are shared by every thread fetching through this client
+        limits = {**self.RATE_LIMITS, **(rate_limits or {})}
+        self.rate_limiters = {provider: RateLimiter(quotas) for provider, quotas in limits.items() if quotas}
+        
+        self.health = {
+            provider: ProviderHealth(failure_threshold=failure_threshold, reset_timeout=reset_timeout)
+            for provider in self.PROVIDER_NAMES
+        }
+        self._requests = {
+            "open-meteo": self._request_open_meteo,
+            "open-topo-data": self._request_open_topo_data
+        }
+        self._hedged = {provider: 0 for provider in self.PROVIDER_NAMES}
+        
+        # Progress digest -> elevations of requests that failed part way
+        self._progress = OrderedDict()
+        self._progress_lock = threading.Lock()
+        
+        self._executor = None
+        self._hedge_executor = None
+        self._executor_lock = threading.Lock()
+        
+        self._sampling_lock = threading.Lock()
+        self._sampling_stats = {'routes': 0, 'points': 0, 'fetched_points': 0}
+        
+        self.coalescer = None
+        if coalesce_window is not None:
+            self.coalescer = ElevationCoalescer(
+                self._get_elevations_with_fallback,
+                batch_size=self.MAX_POINTS_PER_REQUEST,
+                window=coalesce_window,
+                cell_arcsec=cache.cell_arcsec if cache is not None else DEFAULT_CELL_ARCSEC,
+                max_workers=max_workers
+            )
     
     def get_elevation_open_meteo(self, points):
         """
@@ -63,7 +169,7 @@ class ElevationClient:
             params = {
                 'locations': '37.7749,-122.4194|37.775,-122.4195|37.7751,-122.4196'
             }
-            requests.get(self.OPEN_TOPO_DATA_API, params=params)
+            http_session.get(self.OPEN_TOPO_DATA_API, params=params)
             
             return [100, 120, 140]
             
@@ -105,17 +211,154 @@ class ElevationClient:
         # Use specified provider or fall back to primary
         provider = provider or self.primary_provider
         
-        # Try primary provider first
-        elevations = self._get_elevations_from_provider(points, provider)
+        if self.cache is not None:
+            return self._get_cached_elevations(points, provider)
+        
+        return self._fetch_elevations(points, provider)
+    
+    def _get_cached_elevations(self, points, provider):
+        """
+        Get elevations from the cache, fetching only cells it does not hold.
+        
+        Points are quantized to the cache's grid and every missing cell is
+        fetched once, at its center, in provider sized batches.
+        
+        Args:
+            points (list): List of (lat, lng) tuples
+            provider (str): Provider to use
+            
+        Returns:
+            list: List of elevations in meters or None if request failed
+        """
+        cells, inverse = np.unique(self.cache.cells(points), return_inverse=True)
+        cells = cells.tolist()
+        
+        found = self.cache.lookup(cells)
+        missing = [cell for cell in cells if cell not in found]
+        
+        if missing:
+            logger.info(f"Fetching elevations for {len(missing)} of {len(cells)} uncached grid cells")
+            fetched = self._fetch_elevations(self.cache.cell_centers(missing), provider)
+            if fetched is None:
+                return None
+            self.cache.store(missing, fetched)
+            found.update(zip(missing, fetched))
+        
+        elevations = [found[cell] for cell in cells]
+        return [elevations[i] for i in inverse.ravel().tolist()]
+    
+    def _fetch_elevations(self, points, provider):
+        """
+        Fetch elevations, through the coalescer when one is configured.
+        
+        Args:
+            points (list): List of (lat, lng) tuples
+            provider (str): Provider to try first
+            
+        Returns:
+            list: List of elevations in meters or None if request failed
+        """
+        if self.coalescer is not None and provider != "local-dem":
+            return self.coalescer.get_elevations(points, provider)
+        return self._get_elevations_with_fallback(points, provider)
+    
+    def _get_elevations_with_fallback(self, points, provider):
+        """
+        Get elevations from a provider, falling back to the other provider
+        for the batches it failed.
+        
+        When batches fail on both providers, the elevations fetched so far
+        are kept, and the next call for the same points only fetches the
+        ones still missing.
+        
+        Args:
+            points (list): List of (lat, lng) tuples
+            provider (str): Provider to try first
+            
+        Returns:
+            list: List of elevations in meters or None if request failed
+        """
+        key = self._progress_key(points)
+        with self._progress_lock:
+            elevations = self._progress.pop(key, None)
         
-        # If primary provider fails, try fallback
         if elevations is None:
-            fallback_provider = "open-topo-data" if provider == "open-meteo" else "open-meteo"
-            logger.warning(f"Primary provider {provider} failed, trying fallback {fallback_provider}")
-            elevations = self._get_elevations_from_provider(points, fallback_provider)
+            elevations = [_MISSING] * len(points)
+        else:
+            logger.info(f"Resuming elevation fetch with {sum(e is not _MISSING for e in elevations)} "
+                        f"of {len(points)} points already fetched")
+        
+        fallback = self._fallback_provider(provider)
+        providers = (provider,) if fallback is None else (provider, fallback)
+        for attempt_provider in providers:
+            missing = [i for i, elevation in enumerate(elevations) if elevation is _MISSING]
+            if not missing:
+                break
+            
+            if attempt_provider != provider:
+                logger.warning(f"Primary provider {provider} failed for {len(missing)} of {len(points)} "
+                               f"points, trying fallback {attempt_provider}")
+            
+            fetched = self._fetch_points([points[i] for i in missing], attempt_provider)
+            for i, elevation in zip(missing, fetched):
+                elevations[i] = elevation
+        
+        if any(elevation is _MISSING for elevation in elevations):
+            with self._progress_lock:
+                self._progress[key] = elevations
+                while len(self._progress) > self.MAX_SAVED_PROGRESS:
+                    self._progress.popitem(last=False)
+            return None
         
         return elevations
     
+    def _fetch_points(self, points, provider):
+        """
+        Fetch elevations from one provider, keeping the batches that succeed.
+        
+        Args:
+            points (list): List of (lat, lng) tuples
+            provider (str): Provider to use
+            
+        Returns:
+            list: Elevation of every point, _MISSING for points whose batch failed
+        """
+        if provider in self._requests:
+            return self._fetch_batches(points, provider)
+        
+        elevations = self._get_elevations_from_provider(points, provider)
+        return [_MISSING] * len(points) if elevations is None else elevations
+    
+    def _progress_key(self, points):
+        """
+        Get the key partial progress of a request is saved under.
+        
+        Args:
+            points (list): List of (lat, lng) tuples
+            
+        Returns:
+            str: Digest of the point coordinates
+        """
+        coords = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+        return hashlib.sha1(coords.tobytes()).hexdigest()
+    
+    def _fallback_provider(self, provider):
+        """
+        Get the provider to fall back to (or hedge with) for a provider.
+        
+        The offline local-dem provider has no fallback, so it never goes to
+        the network.
+        
+        Args:
+            provider (str): Provider
+            
+        Returns:
+            str: The other HTTP provider, or None for local-dem
+        """
+        if provider == "local-dem":
+            return None
+        return "open-topo-data" if provider == "open-meteo" else "open-meteo"
+    
     def _get_elevations_from_provider(self, points, provider):
         """
         Get elevations from a specific provider.
@@ -131,6 +374,8 @@ class ElevationClient:
             return self._get_elevations_from_open_meteo(points)
         elif provider == "open-topo-data":
             return self._get_elevations_from_open_topo_data(points)
+        elif provider == "local-dem":
+            return self._get_elevations_from_local_dem(points)
         else:
             logger.error(f"Unknown elevation provider: {provider}")
             return None
@@ -145,47 +390,37 @@ class ElevationClient:
         Returns:
             list: List of elevations in meters or None if request failed
         """
-        # Open-Meteo has a limit of 100 points per request
-        MAX_POINTS_PER_REQUEST = 100
+        return self._complete(self._fetch_batches(points, "open-meteo"))
+    
+    def _request_open_meteo(self, batch):
+        """
+        Make one Open-Meteo request.
         
-        # Process points in batches
-        all_elevations = []
-        for i in range(0, len(points), MAX_POINTS_PER_REQUEST):
-            batch = points[i:i + MAX_POINTS_PER_REQUEST]
-            
-            # Prepare latitude and longitude lists
-            latitudes = [str(point[0]) for point in batch]
-            longitudes = [str(point[1]) for point in batch]
-            
-            # Build request parameters
-            params = {
-                'latitude': ','.join(latitudes),
-                'longitude': ','.join(longitudes)
-            }
+        Args:
+            batch (list): Up to MAX_POINTS_PER_REQUEST (lat, lng) tuples
             
-            # Make request with retries
-            for attempt in range(self.max_retries):
-                try:
-                    response = requests.get(self.OPEN_METEO_API, params=params)
-                    response.raise_for_status()
-                    data = response.json()
-                    
-                    if 'elevation' in data:
-                        all_elevations.extend(data['elevation'])
-                        break
-                    else:
-                        logger.error(f"Unexpected response format from Open-Meteo: {data}")
-                        if attempt < self.max_retries - 1:
-                            time.sleep(self.retry_delay)
-                except Exception as e:
-                    logger.error(f"Failed to get elevations from Open-Meteo (attempt {attempt+1}): {str(e)}")
-                    if attempt < self.max_retries - 1:
-                        time.sleep(self.retry_delay)
-            else:
-                # All retries failed
-                return None
+        Returns:
+            list: List of elevations in meters or None if the response was unexpected
+        """
+        # Prepare latitude and longitude lists
+        latitudes = [str(point[0]) for point in batch]
+        longitudes = [str(point[1]) for point in batch]
+        
+        # Build request parameters
+        params = {
+            'latitude': ','.join(latitudes),
+            'longitude': ','.join(longitudes)
+        }
+        
+        response = http_session.get(self.OPEN_METEO_API, params=params)
+        response.raise_for_status()
+        data = response.json()
+        
+        if 'elevation' in data:
+            return data['elevation']
         
-        return all_elevations
+        logger.error(f"Unexpected response format from Open-Meteo: {data}")
+        return None
     
     def _get_elevations_from_open_topo_data(self, points):
         """
@@ -197,62 +432,401 @@ class ElevationClient:
         Returns:
             list: List of elevations in meters or None if request failed
         """
-        # Open Topo Data has a limit of 100 points per request
-        MAX_POINTS_PER_REQUEST = 100
+        return self._complete(self._fetch_batches(points, "open-topo-data"))
+    
+    def _request_open_topo_data(self, batch):
+        """
+        Make one Open Topo Data request.
         
-        # Process points in batches
-        all_elevations = []
-        for i in range(0, len(points), MAX_POINTS_PER_REQUEST):
-            batch = points[i:i + MAX_POINTS_PER_REQUEST]
+        Args:
+            batch (list): Up to MAX_POINTS_PER_REQUEST (lat, lng) tuples
             
-            # Format locations parameter
-            locations = '|'.join([f"{point[0]},{point[1]}" for point in batch])
+        Returns:
+            list: List of elevations in meters or None if the response was unexpected
+        """
+        # Format locations parameter
+        locations = '|'.join([f"{point[0]},{point[1]}" for point in batch])
+        
+        # Build request parameters
+        params = {
+            'locations': locations
+        }
+        
+        response = http_session.get(self.OPEN_TOPO_DATA_API, params=params)
+        response.raise_for_status()
+        data = response.json()
+        
+        if data.get('status') == 'OK' and 'results' in data:
+            return [result.get('elevation') for result in data['results']]
+        
+        logger.error(f"Unexpected response format from Open Topo Data: {data}")
+        return None
+    
+    def _fetch_batches(self, points, provider):
+        """
+        Fetch elevations in provider sized batches, several at a time.
+        
+        Batches run on the client's thread pool and are reassembled in order.
+        A failed batch does not stop the others.
+        
+        Args:
+            points (list): List of (lat, lng) tuples
+            provider (str): Provider the batches are sent to
             
-            # Build request parameters
-            params = {
-                'locations': locations
-            }
+        Returns:
+            list: Elevation of every point, _MISSING for points whose batch failed
+        """
+        batches = [points[i:i + self.MAX_POINTS_PER_REQUEST]
+                   for i in range(0, len(points), self.MAX_POINTS_PER_REQUEST)]
+        fetch_batch = self._fetch_hedged_batch if self.hedge_percentile is not None else self._fetch_batch
+        
+        if len(batches) > 1 and self.max_workers > 1:
+            executor = self._get_executor()
+            futures = [executor.submit(fetch_batch, provider, batch) for batch in batches]
+            results = [future.result() for future in futures]
+        else:
+            results = [fetch_batch(provider, batch) for batch in batches]
+        
+        elevations = []
+        for batch, result in zip(batches, results):
+            if result is None or len(result) != len(batch):
+                if result is not None:
+                    logger.error(f"Expected {len(batch)} elevations from {provider}, got {len(result)}")
+                result = [_MISSING] * len(batch)
+            elevations.extend(result)
+        return elevations
+    
+    def _complete(self, elevations):
+        """
+        Get the elevations of a fetch only if every batch succeeded.
+        
+        Args:
+            elevations (list): Elevations, with _MISSING for failed batches
+            
+        Returns:
+            list: The elevations, or None if any batch failed
+        """
+        if any(elevation is _MISSING for elevation in elevations):
+            return None
+        return elevations
+    
+    def _fetch_batch(self, provider, batch):
+        """
+        Fetch one batch, with rate limiting, circuit breaking and retries.
+        
+        Retries back off exponentially with full jitter, and wait at least as
+        long as a Retry-After header asks for.
+        
+        Args:
+            provider (str): Provider the batch is sent to
+            batch (list): List of (lat, lng) tuples
+            
+        Returns:
+            list: List of elevations in meters or None if all retries failed
+        """
+        name = self.PROVIDER_NAMES.get(provider, provider)
+        limiter = self.rate_limiters.get(provider)
+        health = self.health[provider]
+        request = self._requests[provider]
+        
+        for attempt in range(self.max_retries):
+            # Check the circuit first, so an open circuit fails fast without using a token
+            if not health.allow_request():
+                logger.warning(f"Circuit breaker for {name} is open, skipping request")
+                return None
             
-            # Make request with retries
-            for attempt in range(self.max_retries):
-                try:
-                    response = requests.get(self.OPEN_TOPO_DATA_API, params=params)
-                    response.raise_for_status()
-                    data = response.json()
-                    
-                    if data.get('status') == 'OK' and 'results' in data:
-                        batch_elevations = [result.get('elevation') for result in data['results']]
-                        all_elevations.extend(batch_elevations)
-                        break
-                    else:
-                        logger.error(f"Unexpected response format from Open Topo Data: {data}")
-                        if attempt < self.max_retries - 1:
-                            time.sleep(self.retry_delay)
-                except Exception as e:
-                    logger.error(f"Failed to get elevations from Open Topo Data (attempt {attempt+1}): {str(e)}")
-                    if attempt < self.max_retries - 1:
-                        time.sleep(self.retry_delay)
-            else:
-                # All retries failed
+            if limiter is not None and not limiter.acquire(self.rate_limit_timeout):
+                health.release_probe()
+                logger.error(f"Rate limit for {name} exhausted, not waiting longer than {self.rate_limit_timeout}s")
                 return None
+            
+            retry_after = None
+            start = time.monotonic()
+            try:
+                elevations = request(batch)
+                if elevations is not None:
+                    health.record_success(time.monotonic() - start)
+                    return elevations
+                health.record_failure()
+            except Exception as e:
+                retry_after = self._retry_after(e)
+                health.record_failure(retry_after)
+                logger.error(f"Failed to get elevations from {name} (attempt {attempt+1}): {str(e)}")
+            
+            if attempt < self.max_retries - 1:
+                delay = backoff_delay(attempt, self.retry_delay, self.max_retry_delay)
+                if retry_after is not None:
+                    if retry_after > self.max_retry_delay:
+                        logger.warning(f"{name} asked to retry after {retry_after:.0f}s, giving up on it")
+                        return None
+                    delay = max(delay, retry_after)
+                time.sleep(delay)
+        
+        # All retries failed
+        return None
+    
+    def _fetch_hedged_batch(self, provider, batch):
+        """
+        Fetch one batch, also sending it to the other provider when the
+        first one is slower than its hedge_percentile latency.
+        
+        Args:
+            provider (str): Provider the batch is sent to first
+            batch (list): List of (lat, lng) tuples
+            
+        Returns:
+            list: Elevations from whichever provider answered successfully
+                  first, or None if both failed
+        """
+        hedge_provider = self._fallback_provider(provider)
+        delay = self.health[provider].latency_percentile(self.hedge_percentile)
+        
+        executor = self._get_hedge_executor()
+        primary = executor.submit(self._fetch_batch, provider, batch)
+        if delay is None:
+            return primary.result()
+        
+        try:
+            return primary.result(timeout=delay)
+        except FutureTimeoutError:
+            pass
+        
+        if self.health[hedge_provider].state == OPEN:
+            return primary.result()
+        
+        logger.info(f"{self.PROVIDER_NAMES[provider]} slower than {delay:.2f}s, "
+                    f"hedging batch with {self.PROVIDER_NAMES[hedge_provider]}")
+        with self._executor_lock:
+            self._hedged[provider] += 1
+        hedge = executor.submit(self._fetch_batch, hedge_provider, batch)
+        
+        # The slower request keeps running, but its result is not needed
+        for future in as_completed([primary, hedge]):
+            result = future.result()
+            if result is not None:
+                return result
+        return None
+    
+    def _retry_after(self, error):
+        """
+        Get the Retry-After delay of a failed request.
+        
+        Args:
+            error (Exception): Error raised by the request
+            
+        Returns:
+            float: Seconds to wait, or None if the response did not say
+        """
+        response = getattr(error, 'response', None)
+        if response is None:
+            return None
+        return parse_retry_after(response.headers.get('Retry-After'))
+    
+    def provider_health(self):
+        """
+        Get the health of the HTTP providers.
+        
+        Returns:
+            dict: Provider -> circuit state, request counts, latency
+                  percentiles and number of hedged batches
+        """
+        with self._executor_lock:
+            hedged = dict(self._hedged)
+        return {provider: dict(health.stats(), hedged=hedged[provider]) for provider, health in self.health.items()}
+    
+    def _get_executor(self):
+        """
+        Get the thread pool used for concurrent batches, creating it on first use.
+        
+        Returns:
+            ThreadPoolExecutor: Thread pool
+        """
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers,
+                                                    thread_name_prefix="elevation-fetch")
+            return self._executor
+    
+    def _get_hedge_executor(self):
+        """
+        Get the thread pool running the requests of hedged batches.
         
-        return all_elevations
+        It is separate from the batch pool, whose threads wait on it.
+        
+        Returns:
+            ThreadPoolExecutor: Thread pool
+        """
+        with self._executor_lock:
+            if self._hedge_executor is None:
+                self._hedge_executor = ThreadPoolExecutor(max_workers=2 * max(1, self.max_workers),
+                                                          thread_name_prefix="elevation-hedge")
+            return self._hedge_executor
+    
+    def close(self):
+        """
+        Shut down the coalescer and the thread pool used for concurrent batches.
+        """
+        if self.coalescer is not None:
+            self.coalescer.close()
+        
+        with self._executor_lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=True)
+                self._executor = None
+            if self._hedge_executor is not None:
+                self._hedge_executor.shutdown(wait=True)
+                self._hedge_executor = None
+    
+    def _get_elevations_from_local_dem(self, points):
+        """
+        Get elevations from local DEM tiles without network access.
+        
+        Args:
+            points (list): List of (lat, lng) tuples
+            
+        Returns:
+            list: List of elevations in meters (None where no tile covers a
+                  point) or None if no DEM directory is configured
+        """
+        if self.dem is None:
+            logger.error("No DEM directory configured for the local-dem provider")
+            return None
+        
+        elevations = self.dem.get_elevations(points)
+        return [None if np.isnan(e) else e for e in elevations.tolist()]
     
-    def get_elevations_for_route(self, latlng_points, provider=None):
+    def get_elevations_for_route(self, latlng_points, provider=None, simplify_tolerance_m=None,
+                                 simplify_method="douglas-peucker", sample_spacing_m=None,
+                                 sample_tolerance_m=DEFAULT_SAMPLE_TOLERANCE_M):
         """
         Get elevations for a route defined by lat/lng points.
         
+        With simplify_tolerance_m, only the points kept by simplifying the
+        route geometry are sent to the provider, and elevations for the other
+        points are interpolated by distance along the route.
+        
+        With sample_spacing_m, points are first fetched at that spacing and
+        only intervals where the profile curves or climbs steeply are refined,
+        until linear interpolation is within sample_tolerance_m; this takes
+        precedence over simplification.
+        
         Args:
             latlng_points (list): List of [lat, lng] points along the route
             provider (str): Override the default provider
+            simplify_tolerance_m (float): Simplification tolerance in meters
+                                          (None to fetch every point)
+            simplify_method (str): "douglas-peucker" or "visvalingam-whyatt"
+            sample_spacing_m (float): Initial sample spacing in meters for
+                                      adaptive sampling (None to disable)
+            sample_tolerance_m (float): Maximum elevation error in meters of
+                                        interpolated points when sampling
             
         Returns:
             list: List of elevations in meters or None if request failed
         """
+        if sample_spacing_m and len(latlng_points) > 2:
+            return self._get_sampled_elevations(latlng_points, provider, sample_spacing_m, sample_tolerance_m)
+        
+        if simplify_tolerance_m and len(latlng_points) > 2:
+            return self._get_simplified_elevations(latlng_points, provider, simplify_tolerance_m, simplify_method)
+        
         # Convert [lat, lng] format to (lat, lng) tuples
         points = [(point[0], point[1]) for point in latlng_points]
         return self.get_elevations(points, provider)
     
+    def _get_simplified_elevations(self, latlng_points, provider, tolerance_m, method):
+        """
+        Fetch elevations for a simplified route and interpolate the rest.
+        
+        Args:
+            latlng_points (list): List of [lat, lng] points along the route
+            provider (str): Override the default provider
+            tolerance_m (float): Simplification tolerance in meters
+            method (str): Simplification method
+            
+        Returns:
+            list: List of elevations in meters for every point, or None if request failed
+        """
+        coords = np.asarray(latlng_points, dtype=np.float64).reshape(-1, 2)
+        indices = simplify_indices(coords, tolerance_m, method)
+        logger.info(f"Fetching elevations for {len(indices)} of {len(coords)} route points")
+        
+        elevations = self.get_elevations([(lat, lng) for lat, lng in coords[indices].tolist()], provider)
+        if elevations is None:
+            return None
+        
+        # Providers return null over voids; interpolate across them as well
+        fetched = np.array([np.nan if e is None else e for e in elevations], dtype=np.float64)
+        valid = ~np.isnan(fetched)
+        if not valid.any():
+            return None
+        
+        distances = cumulative_distance(coords)
+        return np.interp(distances, distances[indices][valid], fetched[valid]).tolist()
+    
+    def _get_sampled_elevations(self, latlng_points, provider, spacing_m, tolerance_m):
+        """
+        Fetch elevations at adaptively chosen points and interpolate the rest.
+        
+        Every refinement round fetches the midpoints of all intervals that
+        still need splitting in one call, so rounds use full batches.
+        
+        Args:
+            latlng_points (list): List of [lat, lng] points along the route
+            provider (str): Override the default provider
+            spacing_m (float): Initial sample spacing in meters
+            tolerance_m (float): Maximum interpolation error in meters
+            
+        Returns:
+            list: List of elevations in meters for every point, or None if request failed
+        """
+        coords = np.asarray(latlng_points, dtype=np.float64).reshape(-1, 2)
+        distances = cumulative_distance(coords)
+        
+        samples = np.empty(0, dtype=np.int64)
+        fetched = np.empty(0)
+        new = sampling.initial_samples(distances, spacing_m)
+        
+        while len(new):
+            elevations = self.get_elevations([(lat, lng) for lat, lng in coords[new].tolist()], provider)
+            if elevations is None:
+                return None
+            
+            # Providers return null over voids
+            values = np.array([np.nan if e is None else e for e in elevations], dtype=np.float64)
+            samples = np.concatenate((samples, new))
+            fetched = np.concatenate((fetched, values))
+            order = np.argsort(samples, kind='stable')
+            samples, fetched = samples[order], fetched[order]
+            
+            new = sampling.refinement_points(distances, samples, fetched, tolerance_m)
+        
+        with self._sampling_lock:
+            self._sampling_stats['routes'] += 1
+            self._sampling_stats['points'] += len(coords)
+            self._sampling_stats['fetched_points'] += len(samples)
+        logger.info(f"Adaptive sampling fetched {len(samples)} of {len(coords)} route points")
+        
+        valid = ~np.isnan(fetched)
+        if not valid.any():
+            return None
+        return np.interp(distances, distances[samples][valid], fetched[valid]).tolist()
+    
+    def sampling_stats(self):
+        """
+        Get how many network points adaptive sampling has saved.
+        
+        Returns:
+            dict: Number of sampled routes, their points, fetched_points,
+                  saved_points and the saved_fraction of points
+        """
+        with self._sampling_lock:
+            stats = dict(self._sampling_stats)
+        
+        stats['saved_points'] = stats['points'] - stats['fetched_points']
+        stats['saved_fraction'] = stats['saved_points'] / stats['points'] if stats['points'] else 0.0
+        return stats
+    
     def get_elevations_for_bounding_box(self, min_lat, min_lng, max_lat, max_lng, resolution=10, provider=None):
         """
         Get elevations for a grid within a bounding box.
@@ -0,0 +1,389 @@
+"""
+Vectorized elevation profile processing: smoothing, gain/loss and grades.
+
+Every function works on a single elevation stream or, with an offsets
+array, on many streams concatenated into one buffer (as stored by
+RouteCollection). Streams never influence each other: smoothing windows
+are clipped at stream boundaries and the gain/loss filter restarts at the
+first point of every stream.
+"""
+
+import numpy as np
+
+SMOOTHING_METHODS = ("median", "savgol")
+
+# Climbs or descents smaller than this (in meters) are treated as noise
+DEFAULT_GAIN_THRESHOLD_M = 3.0
+
+# Horizontal distance in meters over which a grade is measured
+DEFAULT_GRADE_BASELINE_M = 50.0
+
+# Grade histogram bin edges in percent
+GRADE_BINS = (-np.inf, -15, -10, -5, -2, 2, 5, 10, 15, np.inf)
+
+# Rows processed at once by the median filter, to bound memory in batch mode
+_MEDIAN_BLOCK = 1 << 18
+
+
+def _streams(values, offsets):
+    """
+    Normalize input to a float64 buffer and stream offsets.
+    
+    Args:
+        values: Elevation stream or concatenated streams
+        offsets (numpy.ndarray): Offsets of each stream in values (None for one stream)
+    
+    Returns:
+        tuple: (float64 buffer, int64 offsets, stream index of every point)
+    """
+    values = np.asarray(values, dtype=np.float64).ravel()
+    if offsets is None:
+        offsets = np.array([0, len(values)], dtype=np.int64)
+    offsets = np.asarray(offsets, dtype=np.int64)
+    
+    counts = np.diff(offsets)
+    stream_of = np.repeat(np.arange(len(counts)), counts)
+    return values, offsets, stream_of
+
+
+def _neighbour(positions, shift, first, last):
+    """
+    Index of the point shift places away, clipped to the point's own stream.
+    
+    Args:
+        positions (numpy.ndarray): Point indices
+        shift (int): Offset in points
+        first (numpy.ndarray): First index of each point's stream
+        last (numpy.ndarray): Last index of each point's stream
+    
+    Returns:
+        numpy.ndarray: Neighbour indices
+    """
+    return np.clip(positions + shift, first, last)
+
+
+def savgol_coefficients(window, order):
+    """
+    Savitzky-Golay smoothing coefficients for the centre of a window.
+    
+    Args:
+        window (int): Odd window length in points
+        order (int): Polynomial order (less than window)
+    
+    Returns:
+        numpy.ndarray: window convolution coefficients
+    """
+    if window % 2 == 0 or window < 1:
+        raise ValueError("Savitzky-Golay window must be a positive odd number")
+    if order >= window:
+        raise ValueError("Savitzky-Golay order must be less than the window")
+    
+    half = window // 2
+    vandermonde = np.vander(np.arange(-half, half + 1), order + 1, increasing=True)
+    return np.linalg.pinv(vandermonde)[0]
+
+
+def smooth(elevations, method="median", window=5, order=2, offsets=None):
+    """
+    Smooth elevation streams.
+    
+    Windows are clipped to each stream, repeating its first and last
+    elevations at the edges.
+    
+    Args:
+        elevations: Elevation stream, or concatenated streams with offsets
+        method (str): "median" or "savgol" (Savitzky-Golay)
+        window (int): Odd window length in points
+        order (int): Savitzky-Golay polynomial order
+        offsets (numpy.ndarray): Offsets of each stream (None for one stream)
+    
+    Returns:
+        numpy.ndarray: Smoothed float64 elevations
+    """
+    if method not in SMOOTHING_METHODS:
+        raise ValueError(f"Unknown smoothing method: {method}. Expected one of {SMOOTHING_METHODS}")
+    
+    values, offsets, stream_of = _streams(elevations, offsets)
+    if len(values) == 0 or window <= 1:
+        return values.copy()
+    
+    half = window // 2
+    positions = np.arange(len(values))
+    first = offsets[stream_of]
+    last = offsets[stream_of + 1] - 1
+    
+    if method == "savgol":
+        coefficients = savgol_coefficients(2 * half + 1, order)
+        smoothed = np.zeros_like(values)
+        for shift, coefficient in zip(range(-half, half + 1), coefficients):
+            smoothed += coefficient * values[_neighbour(positions, shift, first, last)]
+        return smoothed
+    
+    smoothed = np.empty_like(values)
+    shifts = np.arange(-half, half + 1)
+    for start in range(0, len(values), _MEDIAN_BLOCK):
+        block = slice(start, start + _MEDIAN_BLOCK)
+        neighbours = _neighbour(positions[block, None], shifts, first[block, None], last[block, None])
+        smoothed[block] = np.median(values[neighbours], axis=1)
+    return smoothed
+
+
+def hysteresis_profile(elevations, threshold=DEFAULT_GAIN_THRESHOLD_M, offsets=None):
+    """
+    Filter out elevation oscillations smaller than threshold.
+    
+    This is a backlash (play) operator: the output only moves once the
+    elevation is more than threshold / 2 above or below it. Each step is a
+    clamp of the previous output to [elevation - threshold / 2, elevation +
+    threshold / 2]; clamps compose into clamps, so all outputs are computed
+    with a parallel prefix scan in log2(n) vectorized passes.
+    
+    Args:
+        elevations: Elevation stream, or concatenated streams with offsets
+        threshold (float): Smallest climb or descent that counts, in meters
+        offsets (numpy.ndarray): Offsets of each stream (None for one stream)
+    
+    Returns:
+        numpy.ndarray: Filtered float64 elevations
+    """
+    values, offsets, _ = _streams(elevations, offsets)
+    half = threshold / 2.0
+    
+    low = values - half
+    high = values + half
+    
+    # The first point of each stream clamps to itself, restarting the filter
+    starts = offsets[:-1][np.diff(offsets) > 0]
+    low[starts] = values[starts]
+    high[starts] = values[starts]
+    
+    shift = 1
+    while shift < len(values):
+        # Compose each clamp with the one covering the preceding points
+        earlier_low = np.clip(low[:-shift], low[shift:], high[shift:])
+        earlier_high = np.clip(high[:-shift], low[shift:], high[shift:])
+        low[shift:] = earlier_low
+        high[shift:] = earlier_high
+        shift *= 2
+    
+    # Every composition includes a stream start, so it collapses to one value
+    return low
+
+
+def gain_loss(elevations, threshold=DEFAULT_GAIN_THRESHOLD_M, offsets=None):
+    """
+    Total elevation gain and loss, ignoring oscillations below a threshold.
+    
+    Args:
+        elevations: Elevation stream, or concatenated streams with offsets
+        threshold (float): Smallest climb or descent that counts, in meters
+        offsets (numpy.ndarray): Offsets of each stream (None for one stream)
+    
+    Returns:
+        tuple: (gain, loss) in meters, as floats for one stream or arrays
+               with one value per stream when offsets are given
+    """
+    values, stream_offsets, stream_of = _streams(elevations, offsets)
+    n_streams = len(stream_offsets) - 1
+    
+    steps = np.diff(hysteresis_profile(values, threshold, stream_offsets))
+    
+    # Steps into the first point of a stream belong to no stream
+    boundaries = stream_offsets[1:-1]
+    steps[boundaries[(boundaries > 0) & (boundaries < len(values))] - 1] = 0
+    owners = stream_of[1:]
+    
+    gain = np.bincount(owners, weights=np.maximum(steps, 0), minlength=n_streams)
+    loss = np.bincount(owners, weights=np.maximum(-steps, 0), minlength=n_streams)
+    
+    if offsets is None:
+        return float(gain[0]), float(loss[0])
+    return gain, loss
+
+
+def point_grades(elevations, distances, baseline_m=DEFAULT_GRADE_BASELINE_M, offsets=None):
+    """
+    Grade in percent at every point, measured over a horizontal baseline.
+    
+    The grade at a point compares it with the first later point of the same
+    stream at least baseline_m further along. Points too close to the end
+    of their stream for a full baseline get NaN.
+    
+    Args:
+        elevations: Elevation stream, or concatenated streams with offsets
+        distances: Cumulative distance in meters at every point
+        baseline_m (float): Baseline in meters (0 for point to point grades)
+        offsets (numpy.ndarray): Offsets of each stream (None for one stream)
+    
+    Returns:
+        numpy.ndarray: float64 grades in percent (NaN where undefined)
+    """
+    values, offsets, stream_of = _streams(elevations, offsets)
+    distances = np.asarray(distances, dtype=np.float64).ravel()
+    if len(values) == 0:
+        return values.copy()
+    
+    # Shift each stream onto its own stretch of one increasing axis
+    span = distances.max() - distances.min() + baseline_m + 1.0
+    axis = distances + stream_of * span
+    
+    last = offsets[stream_of + 1] - 1
+    if baseline_m > 0:
+        ahead = np.minimum(np.searchsorted(axis, axis + baseline_m), last)
+    else:
+        ahead = np.minimum(np.arange(len(values)) + 1, last)
+    
+    run = distances[ahead] - distances
+    with np.errstate(divide='ignore', invalid='ignore'):
+        grades = (values[ahead] - values) / run * 100
+    grades[~(run > 0) | (run < baseline_m)] = np.nan
+    return grades
+
+
+def grade_histogram(elevations, distances, bins=GRADE_BINS, baseline_m=DEFAULT_GRADE_BASELINE_M, offsets=None):
+    """
+    Distance in meters spent in each grade bin.
+    
+    Args:
+        elevations: Elevation stream, or concatenated streams with offsets
+        distances: Cumulative distance in meters at every point
+        bins (tuple): Grade bin edges in percent
+        baseline_m (float): Baseline in meters for measuring grades
+        offsets (numpy.ndarray): Offsets of each stream (None for one stream)
+    
+    Returns:
+        numpy.ndarray: Meters per bin (len(bins) - 1), or one row per stream
+                       when offsets are given
+    """
+    values, stream_offsets, stream_of = _streams(elevations, offsets)
+    distances = np.asarray(distances, dtype=np.float64).ravel()
+    n_streams = len(stream_offsets) - 1
+    n_bins = len(bins) - 1
+    
+    grades = point_grades(values, distances, baseline_m, stream_offsets)
+    
+    # Each point stands for the segment to the next point of its stream
+    lengths = np.zeros(len(values))
+    lengths[:-1] = np.diff(distances)
+    lengths[stream_offsets[1:][stream_offsets[1:] > 0] - 1] = 0
+    
+    valid = ~np.isnan(grades)
+    bin_index = np.clip(np.digitize(grades[valid], bins) - 1, 0, n_bins - 1)
+    histogram = np.bincount(
+        stream_of[valid] * n_bins + bin_index,
+        weights=lengths[valid],
+        minlength=n_streams * n_bins
+    ).reshape(n_streams, n_bins)
+    
+    return histogram[0] if offsets is None else histogram
+
+
+def summarize(elevations, distances=None, smoothing="median", window=5,
+              threshold=DEFAULT_GAIN_THRESHOLD_M, baseline_m=DEFAULT_GRADE_BASELINE_M,
+              bins=GRADE_BINS, offsets=None):
+    """
+    Smooth elevation streams and compute gain, loss and grade statistics.
+    
+    Args:
+        elevations: Elevation stream, or concatenated streams with offsets
+        distances: Cumulative distance in meters at every point (None to skip grades)
+        smoothing (str): "median", "savgol" or None
+        window (int): Smoothing window in points
+        threshold (float): Gain/loss threshold in meters
+        baseline_m (float): Grade baseline in meters
+        bins (tuple): Grade histogram bin edges in percent
+        offsets (numpy.ndarray): Offsets of each stream (None for one stream)
+    
+    Returns:
+        dict: 'gain', 'loss', 'max_grade', 'min_grade' and 'grade_histogram'
+              (grades are None without distances); arrays per stream when
+              offsets are given
+    """
+    values, stream_offsets, stream_of = _streams(elevations, offsets)
+    n_streams = len(stream_offsets) - 1
+    
+    if smoothing:
+        values = smooth(values, smoothing, window, offsets=stream_offsets)
+    
+    gain, loss = gain_loss(values, threshold, stream_offsets)
+    summary = {'gain': gain, 'loss': loss, 'max_grade': None, 'min_grade': None, 'grade_histogram': None}
+    
+    if distances is not None:
+        grades = point_grades(values, distances, baseline_m, stream_offsets)
+        valid = ~np.isnan(grades)
+        max_grade = np.full(n_streams, -np.inf)
+        min_grade = np.full(n_streams, np.inf)
+        np.maximum.at(max_grade, stream_of[valid], grades[valid])
+        np.minimum.at(min_grade, stream_of[valid], grades[valid])
+        
+        summary['max_grade'] = np.where(np.isfinite(max_grade), max_grade, np.nan)
+        summary['min_grade'] = np.where(np.isfinite(min_grade), min_grade, np.nan)
+        summary['grade_histogram'] = grade_histogram(values, distances, bins, baseline_m, stream_offsets)
+    
+    if offsets is None:
+        for key in ('gain', 'loss', 'max_grade', 'min_grade'):
+            if summary[key] is not None:
+                summary[key] = float(summary[key][0])
+        if summary['grade_histogram'] is not None:
+            summary['grade_histogram'] = summary['grade_histogram'][0]
+    
+    return summary
+
+
+def summarize_route(route, **kwargs):
+    """
+    Compute elevation statistics for one route.
+    
+    Args:
+        route (Route): Route with an elevation stream
+        **kwargs: Options passed to summarize
+    
+    Returns:
+        dict: Statistics as returned by summarize
+    """
+    return summarize(route.elevation_points, _route_distances(route), **kwargs)
+
+
+def summarize_collection(collection, **kwargs):
+    """
+    Compute elevation statistics for every route of a RouteCollection at once.
+    
+    The concatenated elevation buffer is processed in a single pass per
+    statistic rather than route by route.
+    
+    Args:
+        collection (RouteCollection): Routes to process
+        **kwargs: Options passed to summarize
+    
+    Returns:
+        dict: Statistics as returned by summarize, with one value (or
+              histogram row) per route
+    """
+    if np.array_equal(collection.distance_offsets, collection.elevation_offsets):
+        distances = collection.distance_buffer
+    else:
+        distances = np.concatenate([np.zeros(0)] + [
+            _route_distances(collection.route(i)) for i in range(len(collection))
+        ])
+    
+    return summarize(collection.elevation_buffer, distances, offsets=collection.elevation_offsets, **kwargs)
+
+
+def _route_distances(route):
+    """
+    Cumulative distance of each elevation point of a route.
+    
+    Args:
+        route (Route): Route with an elevation stream
+    
+    Returns:
+        numpy.ndarray: Distances in meters (evenly spread over the route
+                       distance when no distance or lat/lng stream matches)
+    """
+    distances = route.get_point_distances()
+    if distances is not None:
+        return np.asarray(distances, dtype=np.float64)
+    
+    num_points = len(route.elevation_points)
+    total = route.distance if route.distance else max(num_points - 1, 0)
+    return np.linspace(0, total, num_points)
@@ -0,0 +1,196 @@
+"""
+Health tracking, circuit breaking and retry backoff for elevation providers.
+"""
+
+import time
+import random
+import threading
+from collections import deque
+from email.utils import parsedate_to_datetime
+import numpy as np
+
+# Circuit breaker states
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half-open"
+
+
+def backoff_delay(attempt, base_delay, max_delay, rng=random):
+    """
+    Get an exponential backoff delay with full jitter.
+    
+    Args:
+        attempt (int): Number of the failed attempt, starting at 0
+        base_delay (float): Delay cap of the first retry in seconds
+        max_delay (float): Maximum delay in seconds
+        rng: Random number generator with a uniform(a, b) method
+    
+    Returns:
+        float: Seconds to wait, uniform between 0 and min(max_delay,
+               base_delay * 2 ** attempt)
+    """
+    return rng.uniform(0, min(max_delay, base_delay * 2 ** attempt))
+
+
+def parse_retry_after(value, now=None):
+    """
+    Parse a Retry-After header.
+    
+    Args:
+        value (str): Header value, in seconds or as an HTTP date
+        now (float): Current time as a Unix timestamp (default: time.time())
+    
+    Returns:
+        float: Seconds to wait, or None if the value is missing or invalid
+    """
+    if not isinstance(value, str) or not value:
+        return None
+    
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    
+    try:
+        retry_at = parsedate_to_datetime(value).timestamp()
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, retry_at - (time.time() if now is None else now))
+
+
+class ProviderHealth:
+    """
+    Circuit breaker and latency statistics of one provider.
+    
+    After failure_threshold consecutive failures the circuit opens and
+    requests fail immediately, so callers move on to another provider
+    instead of waiting for retries. Once reset_timeout seconds have passed
+    (or the time a Retry-After header asked for), one probe request is let
+    through: it closes the circuit when it succeeds and reopens it when it
+    fails. Latencies of successful requests are kept for hedging decisions.
+    """
+    
+    def __init__(self, failure_threshold=5, reset_timeout=30.0, latency_window=100, clock=time.monotonic):
+        """
+        Initialize a closed circuit.
+        
+        Args:
+            failure_threshold (int): Consecutive failures that open the circuit
+            reset_timeout (float): Seconds the circuit stays open before a probe
+            latency_window (int): Number of recent latencies kept
+            clock (callable): Monotonic clock in seconds
+        """
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._clock = clock
+        
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        self._failures = 0
+        self._open_until = 0.0
+        self._probing = False
+        self._latencies = deque(maxlen=latency_window)
+        self._counts = {'successes': 0, 'failures': 0, 'rejected': 0}
+    
+    @property
+    def state(self):
+        """Current circuit state ("closed", "open" or "half-open")."""
+        with self._lock:
+            if self._state == OPEN and self._clock() >= self._open_until:
+                return HALF_OPEN
+            return self._state
+    
+    def allow_request(self):
+        """
+        Check whether a request may be sent now.
+        
+        Returns:
+            bool: True if the circuit is closed or this is the half-open probe
+        """
+        with self._lock:
+            if self._state == CLOSED:
+                return True
+            
+            if self._clock() >= self._open_until and not self._probing:
+                self._state = HALF_OPEN
+                self._probing = True
+                return True
+            
+            self._counts['rejected'] += 1
+            return False
+    
+    def release_probe(self):
+        """
+        Give back the half-open probe of a request that was allowed but not sent.
+        """
+        with self._lock:
+            self._probing = False
+    
+    def record_success(self, latency):
+        """
+        Record a successful request and close the circuit.
+        
+        Args:
+            latency (float): Request duration in seconds
+        """
+        with self._lock:
+            self._state = CLOSED
+            self._failures = 0
+            self._probing = False
+            self._latencies.append(latency)
+            self._counts['successes'] += 1
+    
+    def record_failure(self, retry_after=None):
+        """
+        Record a failed request, opening the circuit if needed.
+        
+        Args:
+            retry_after (float): Seconds the provider asked clients to wait
+                                 (opens the circuit for at least that long)
+        """
+        with self._lock:
+            self._failures += 1
+            self._counts['failures'] += 1
+            
+            # A failed probe reopens the circuit right away
+            wait = 0.0
+            if self._state == HALF_OPEN or self._failures >= self.failure_threshold:
+                wait = self.reset_timeout
+            if retry_after:
+                wait = max(wait, retry_after)
+            
+            self._probing = False
+            if wait > 0:
+                self._state = OPEN
+                self._open_until = max(self._open_until, self._clock() + wait)
+    
+    def latency_percentile(self, percentile, min_samples=10):
+        """
+        Get a percentile of recent successful request latencies.
+        
+        Args:
+            percentile (float): Percentile between 0 and 100
+            min_samples (int): Minimum number of latencies needed
+        
+        Returns:
+            float: Latency in seconds, or None with too few samples
+        """
+        with self._lock:
+            if len(self._latencies) < min_samples:
+                return None
+            return float(np.percentile(list(self._latencies), percentile))
+    
+    def stats(self):
+        """
+        Get the provider's health statistics.
+        
+        Returns:
+            dict: Circuit state, consecutive failures, counts of successes,
+                  failures and rejected requests, and p50/p95 latency
+        """
+        state = self.state
+        with self._lock:
+            stats = dict(self._counts, state=state, consecutive_failures=self._failures)
+        stats['p50_latency'] = self.latency_percentile(50, min_samples=1)
+        stats['p95_latency'] = self.latency_percentile(95, min_samples=1)
+        return stats
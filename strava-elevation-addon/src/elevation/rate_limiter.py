@@ -0,0 +1,84 @@
+"""
+Token bucket rate limiting for elevation API requests.
+"""
+
+import time
+import threading
+
+
+class RateLimiter:
+    """
+    Thread-safe limiter enforcing several request quotas at once.
+    
+    Every quota of `calls` per `period` seconds is a token bucket holding
+    up to `calls` tokens and refilled at calls / period tokens per second,
+    so short bursts are allowed while the long-run rate stays within the
+    quota. A request takes one token from every bucket, and only when all
+    of them have one.
+    """
+    
+    def __init__(self, limits, clock=time.monotonic, sleep=time.sleep):
+        """
+        Initialize the limiter with full buckets.
+        
+        Args:
+            limits (list): List of (calls, period in seconds) quotas
+            clock (callable): Monotonic clock in seconds
+            sleep (callable): Function used to wait for tokens
+        """
+        for calls, period in limits:
+            if calls <= 0 or period <= 0:
+                raise ValueError(f"Invalid rate limit: {calls} calls per {period} seconds")
+        
+        self.limits = [(float(calls), float(period)) for calls, period in limits]
+        self._clock = clock
+        self._sleep = sleep
+        self._lock = threading.Lock()
+        self._tokens = [calls for calls, _ in self.limits]
+        self._updated = clock()
+    
+    def acquire(self, timeout=None):
+        """
+        Take a token from every bucket, waiting until they are available.
+        
+        Args:
+            timeout (float): Maximum seconds to wait (None to wait as long as
+                             needed)
+        
+        Returns:
+            bool: True if the tokens were taken, False if that would take
+                  longer than timeout
+        """
+        deadline = None if timeout is None else self._clock() + timeout
+        
+        while True:
+            with self._lock:
+                wait = self._wait_time()
+                if wait <= 0:
+                    self._tokens = [tokens - 1 for tokens in self._tokens]
+                    return True
+            
+            if deadline is not None and self._clock() + wait > deadline:
+                return False
+            self._sleep(wait)
+    
+    def _wait_time(self):
+        """
+        Get the time until every bucket holds a token.
+        
+        Returns:
+            float: Seconds to wait (0 when a request can be made now)
+        """
+        self._refill()
+        return max([(1 - tokens) * period / calls
+                    for tokens, (calls, period) in zip(self._tokens, self.limits)] + [0.0])
+    
+    def _refill(self):
+        """
+        Add the tokens accrued since the last refill.
+        """
+        now = self._clock()
+        elapsed = now - self._updated
+        self._updated = now
+        self._tokens = [min(calls, tokens + elapsed * calls / period)
+                        for tokens, (calls, period) in zip(self._tokens, self.limits)]
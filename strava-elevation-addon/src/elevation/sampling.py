@@ -0,0 +1,97 @@
+"""
+Adaptive sampling of route elevations with error-driven refinement.
+"""
+
+import numpy as np
+
+# Default maximum error in meters of an interpolated elevation
+DEFAULT_SAMPLE_TOLERANCE_M = 2.0
+
+# Intervals climbing more than this many tolerances are always refined
+MAX_STEP_TOLERANCES = 10.0
+
+
+def initial_samples(distances, spacing_m):
+    """
+    Get the indices of points roughly spacing_m apart along a route.
+    
+    Args:
+        distances (numpy.ndarray): Cumulative distance of every point in meters
+        spacing_m (float): Sample spacing in meters
+    
+    Returns:
+        numpy.ndarray: Sorted indices, always including the first and last point
+    """
+    if spacing_m <= 0:
+        raise ValueError(f"Sample spacing must be positive, got {spacing_m}")
+    
+    n = len(distances)
+    if n <= 2:
+        return np.arange(n)
+    
+    targets = np.arange(0.0, distances[-1], spacing_m)
+    indices = np.searchsorted(distances, targets)
+    return np.unique(np.concatenate((indices, [0, n - 1])))
+
+
+def chord_errors(distances, elevations):
+    """
+    Get how far each sample lies from the chord between its neighbours.
+    
+    This is the error linear interpolation would make if the sample had not
+    been fetched, and measures the curvature of the profile around it.
+    
+    Args:
+        distances (numpy.ndarray): Distances of the samples in meters
+        elevations (numpy.ndarray): Elevations of the samples in meters
+    
+    Returns:
+        numpy.ndarray: Absolute error per sample (0 for the first and last)
+    """
+    errors = np.zeros(len(elevations))
+    if len(elevations) < 3:
+        return errors
+    
+    span = distances[2:] - distances[:-2]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        t = np.where(span > 0, (distances[1:-1] - distances[:-2]) / span, 0.5)
+    chord = elevations[:-2] + t * (elevations[2:] - elevations[:-2])
+    errors[1:-1] = np.abs(elevations[1:-1] - chord)
+    return errors
+
+
+def refinement_points(distances, samples, elevations, tolerance_m=DEFAULT_SAMPLE_TOLERANCE_M):
+    """
+    Get the points to fetch next to refine a sampled profile.
+    
+    An interval between two consecutive samples is split at its distance
+    midpoint when the profile curves at either end by more than tolerance_m,
+    or when its elevation changes by more than MAX_STEP_TOLERANCES times
+    tolerance_m. Intervals without points between their ends are final.
+    
+    Args:
+        distances (numpy.ndarray): Cumulative distance of every route point
+        samples (numpy.ndarray): Sorted indices of the fetched points
+        elevations (numpy.ndarray): Elevations of the fetched points (NaN for voids)
+        tolerance_m (float): Maximum interpolation error in meters
+    
+    Returns:
+        numpy.ndarray: Sorted indices of new points to fetch
+    """
+    if len(samples) < 2:
+        return np.empty(0, dtype=np.int64)
+    
+    # Voids give no information, so they do not trigger refinement
+    voids = np.isnan(elevations)
+    values = np.where(voids, 0.0, elevations)
+    errors = chord_errors(distances[samples], values)
+    errors[voids | np.convolve(voids, [1, 0, 1], mode='same').astype(bool)] = 0.0
+    
+    starts, ends = samples[:-1], samples[1:]
+    curved = np.maximum(errors[:-1], errors[1:]) > tolerance_m
+    steep = (np.abs(np.diff(values)) > MAX_STEP_TOLERANCES * tolerance_m) & ~voids[:-1] & ~voids[1:]
+    split = (curved | steep) & (ends - starts > 1)
+    
+    starts, ends = starts[split], ends[split]
+    middle = np.searchsorted(distances, (distances[starts] + distances[ends]) / 2)
+    return np.clip(middle, starts + 1, ends - 1)
@@ -0,0 +1,485 @@
+"""
+Dynamic Time Warping (DTW) kernels for elevation profile matching.
+"""
+
+import numpy as np
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Supported global path constraints
+WINDOW_TYPES = ("sakoe-chiba", "itakura")
+
+# Path recovery sub-problems at or below this many cells use a full matrix
+HIRSCHBERG_BASE_CELLS = 4096
+
+
+def window_bounds(n, m, window=None, window_type="sakoe-chiba", max_slope=2.0):
+    """
+    Calculate the allowed column range for every row of an n x m DTW matrix.
+    
+    Args:
+        n (int): Length of the first sequence
+        m (int): Length of the second sequence
+        window (int): Sakoe-Chiba band radius in points (None for no band)
+        window_type (str): Global constraint ("sakoe-chiba" or "itakura")
+        max_slope (float): Maximum warping slope for the Itakura parallelogram
+    
+    Returns:
+        tuple: (lo, hi) integer arrays of inclusive column bounds per row,
+               or None if every cell is allowed
+    """
+    if window_type not in WINDOW_TYPES:
+        raise ValueError(f"Unknown DTW window type: {window_type}")
+    
+    if window_type == "sakoe-chiba" and window is None:
+        return None
+    
+    rows = np.arange(n, dtype=np.float64)
+    
+    if window_type == "sakoe-chiba":
+        # Band of fixed radius around the (scaled) diagonal
+        center = rows * ((m - 1) / (n - 1)) if n > 1 else np.zeros(n)
+        lo = np.ceil(center - window)
+        hi = np.floor(center + window)
+    else:
+        # Parallelogram bounded by lines of slope max_slope and 1/max_slope
+        x = rows / (n - 1) if n > 1 else np.zeros(n)
+        y_lo = np.maximum(x / max_slope, 1 - max_slope * (1 - x))
+        y_hi = np.minimum(x * max_slope, 1 - (1 - x) / max_slope)
+        lo = np.ceil(y_lo * (m - 1) - 1e-9)
+        hi = np.floor(y_hi * (m - 1) + 1e-9)
+    
+    lo = np.clip(lo, 0, m - 1).astype(np.int64)
+    hi = np.clip(hi, 0, m - 1).astype(np.int64)
+    
+    # The path must start at (0, 0) and end at (n-1, m-1)
+    lo[0] = 0
+    hi[-1] = m - 1
+    
+    # Keep the band connected: each row must be reachable from the previous one
+    lo = np.minimum.accumulate(lo[::-1])[::-1]
+    hi = np.maximum.accumulate(hi)
+    lo[1:] = np.minimum(lo[1:], hi[:-1] + 1)
+    hi = np.maximum(hi, lo)
+    
+    return lo, hi
+
+
+def dtw_matrix(seq1, seq2, window=None, window_type="sakoe-chiba", max_slope=2.0):
+    """
+    Fill the accumulated cost matrix one anti-diagonal at a time.
+    
+    Every cell on an anti-diagonal only depends on the two previous
+    anti-diagonals, so each diagonal is computed with a single NumPy operation.
+    With a window, only the cells inside the band are visited.
+    
+    Args:
+        seq1 (array-like): First sequence
+        seq2 (array-like): Second sequence
+        window (int): Sakoe-Chiba band radius in points (None for no band)
+        window_type (str): Global constraint ("sakoe-chiba" or "itakura")
+        max_slope (float): Maximum warping slope for the Itakura parallelogram
+    
+    Returns:
+        numpy.ndarray: (n+1) x (m+1) accumulated cost matrix
+    """
+    x = np.asarray(seq1, dtype=np.float64)
+    y = np.asarray(seq2, dtype=np.float64)
+    n, m = len(x), len(y)
+    
+    matrix = np.full((n + 1, m + 1), np.inf)
+    matrix[0, 0] = 0.0
+    if n == 0 or m == 0:
+        return matrix
+    
+    bounds = window_bounds(n, m, window, window_type, max_slope)
+    if bounds is not None:
+        # Row r holds an in-band cell (r, c) with r + c == d only if
+        # lo[r] <= d - r <= hi[r]. Both r + lo[r] and r + hi[r] increase
+        # with r, so the in-band rows of each anti-diagonal are contiguous.
+        rows = np.arange(n)
+        first_cell = rows + bounds[0]
+        last_cell = rows + bounds[1]
+    
+    # Cells on an anti-diagonal are m apart in the flattened matrix, so each
+    # diagonal is a strided slice rather than a fancy-indexed gather
+    flat = matrix.reshape(-1)
+    stride = m + 1
+    
+    for k in range(2, n + m + 1):
+        # Rows (1-based) of the cells (i, j) with i + j == k
+        i_start = max(1, k - m)
+        i_stop = min(n, k - 1)
+        if bounds is not None:
+            i_start = max(i_start, int(np.searchsorted(last_cell, k - 2, side="left")) + 1)
+            i_stop = min(i_stop, int(np.searchsorted(first_cell, k - 2, side="right")))
+            if i_start > i_stop:
+                continue
+        
+        start = i_start * stride + (k - i_start)
+        stop = i_stop * stride + (k - i_stop) + 1
+        
+        cost = np.abs(x[i_start - 1:i_stop] - y[k - i_stop - 1:k - i_start][::-1])
+        flat[start:stop:m] = cost + np.minimum(
+            np.minimum(flat[start - stride:stop - stride:m], flat[start - 1:stop - 1:m]),
+            flat[start - stride - 1:stop - stride - 1:m]
+        )
+    
+    return matrix
+
+
+def dtw_distance(seq1, seq2, window=None, window_type="sakoe-chiba", max_slope=2.0):
+    """
+    Calculate the DTW distance between two sequences.
+    
+    Args:
+        seq1 (array-like): First sequence
+        seq2 (array-like): Second sequence
+        window (int): Sakoe-Chiba band radius in points (None for no band)
+        window_type (str): Global constraint ("sakoe-chiba" or "itakura")
+        max_slope (float): Maximum warping slope for the Itakura parallelogram
+    
+    Returns:
+        float: DTW distance
+    """
+    matrix = dtw_matrix(seq1, seq2, window, window_type, max_slope)
+    return float(matrix[-1, -1])
+
+
+def _last_row(x, y, bounds=None, cutoff=None, rows=None):
+    """
+    Compute the last row of the accumulated cost matrix with two row buffers.
+    
+    Within a row, D[j] = c[j] + min(D[j-1], t[j]) with t[j] taken from the
+    previous row. Unrolling gives D[j] = C[j] + min over k <= j of
+    (t[k] - C[k-1]), where C is the cumulative cost along the row, so each
+    row is a cumulative sum and a running minimum.
+    
+    Args:
+        x (numpy.ndarray): First sequence
+        y (numpy.ndarray): Second sequence
+        bounds (tuple): Optional (lo, hi) column bounds from window_bounds
+        cutoff (float): Stop as soon as every cell of a row exceeds this cost
+        rows (list): If given, the in-band part of every row is appended to it
+        
+    Returns:
+        numpy.ndarray: Accumulated costs of the last row (length m),
+                       or None if the cutoff was exceeded
+    """
+    n, m = len(x), len(y)
+    
+    # Buffers are offset by one column; index 0 is the boundary column
+    prev = np.full(m + 1, np.inf)
+    cur = np.full(m + 1, np.inf)
+    prev[0] = 0.0
+    
+    # First band column of the rows held in cur and prev
+    held_lo = last_lo = 0
+    lo, hi = 0, m - 1
+    for i in range(n):
+        if bounds is not None:
+            lo, hi = int(bounds[0][i]), int(bounds[1][i])
+        
+        # Clear cells left behind by the band of the row this buffer held
+        cur[held_lo + 1:lo + 1] = np.inf
+        
+        t = np.minimum(prev[lo + 1:hi + 2], prev[lo:hi + 1])
+        cost = np.abs(x[i] - y[lo:hi + 1])
+        cumulative = np.cumsum(cost)
+        cur[lo + 1:hi + 2] = cumulative + np.minimum.accumulate(t - (cumulative - cost))
+        if rows is not None:
+            rows.append(cur[lo + 1:hi + 2].copy())
+        
+        # Every warping path crosses every row and costs are non-negative,
+        # so the row minimum is a lower bound on the final distance
+        if cutoff is not None and cur[lo + 1:hi + 2].min() > cutoff:
+            return None
+        
+        if i == 0:
+            # Only the first row may start from the (0, 0) corner
+            prev[0] = np.inf
+        
+        prev, cur = cur, prev
+        held_lo, last_lo = last_lo, lo
+    
+    return prev[1:]
+
+
+def dtw_distance_rolling(seq1, seq2, window=None, window_type="sakoe-chiba", max_slope=2.0,
+                         cutoff=None):
+    """
+    Calculate the DTW distance keeping only two rows of the cost matrix.
+    
+    Uses O(m) memory instead of O(n*m) and returns the same distance as
+    dtw_distance up to floating-point rounding. With a cutoff, the
+    computation is abandoned after the first row whose cheapest cell
+    already exceeds it.
+    
+    Args:
+        seq1 (array-like): First sequence
+        seq2 (array-like): Second sequence
+        window (int): Sakoe-Chiba band radius in points (None for no band)
+        window_type (str): Global constraint ("sakoe-chiba" or "itakura")
+        max_slope (float): Maximum warping slope for the Itakura parallelogram
+        cutoff (float): Distance above which the result is no longer needed
+        
+    Returns:
+        float: DTW distance, or inf if it exceeds the cutoff
+    """
+    x = np.asarray(seq1, dtype=np.float64)
+    y = np.asarray(seq2, dtype=np.float64)
+    n, m = len(x), len(y)
+    
+    if n == 0 or m == 0:
+        return 0.0 if n == m else float(np.inf)
+    
+    bounds = window_bounds(n, m, window, window_type, max_slope)
+    last_row = _last_row(x, y, bounds, cutoff)
+    if last_row is None or (cutoff is not None and last_row[-1] > cutoff):
+        return float(np.inf)
+    
+    return float(last_row[-1])
+
+
+def _backtrack(matrix):
+    """
+    Recover the optimal warping path from a full accumulated cost matrix.
+    
+    Args:
+        matrix (numpy.ndarray): (n+1) x (m+1) matrix from dtw_matrix
+        
+    Returns:
+        list: List of (i, j) index pairs from (0, 0) to (n-1, m-1)
+    """
+    i, j = matrix.shape[0] - 1, matrix.shape[1] - 1
+    path = [(i - 1, j - 1)]
+    
+    while i > 1 or j > 1:
+        # Prefer the diagonal step on ties
+        options = (
+            (matrix[i - 1, j - 1], i - 1, j - 1),
+            (matrix[i - 1, j], i - 1, j),
+            (matrix[i, j - 1], i, j - 1)
+        )
+        _, i, j = min(options, key=lambda option: option[0])
+        path.append((i - 1, j - 1))
+    
+    path.reverse()
+    return path
+
+
+def _hirschberg(x, y, row_offset, col_offset, path):
+    """
+    Append the optimal warping path of x against y to path by divide and conquer.
+    
+    The path has to cross from row mid-1 to row mid somewhere. Forward costs
+    up to row mid-1 and backward costs from row mid give the best crossing
+    point, and each half is then solved independently.
+    
+    Args:
+        x (numpy.ndarray): First sequence
+        y (numpy.ndarray): Second sequence
+        row_offset (int): Index of x[0] in the original first sequence
+        col_offset (int): Index of y[0] in the original second sequence
+        path (list): List of (i, j) pairs to extend
+    """
+    n, m = len(x), len(y)
+    
+    if n == 1:
+        path.extend((row_offset, col_offset + j) for j in range(m))
+        return
+    if m == 1:
+        path.extend((row_offset + i, col_offset) for i in range(n))
+        return
+    if n * m <= HIRSCHBERG_BASE_CELLS:
+        path.extend((row_offset + i, col_offset + j) for i, j in _backtrack(dtw_matrix(x, y)))
+        return
+    
+    mid = n // 2
+    forward = _last_row(x[:mid], y)
+    backward = _last_row(x[mid:][::-1], y[::-1])[::-1]
+    
+    # Leaving (mid-1, j) the path enters row mid at column j or j+1
+    next_backward = np.append(backward[1:], np.inf)
+    best_entry = np.minimum(backward, next_backward)
+    split = int(np.argmin(forward + best_entry))
+    entry = split if backward[split] <= next_backward[split] else split + 1
+    
+    _hirschberg(x[:mid], y[:split + 1], row_offset, col_offset, path)
+    _hirschberg(x[mid:], y[entry:], row_offset + mid, col_offset + entry, path)
+
+
+def dtw_path(seq1, seq2, memory="linear", window=None, window_type="sakoe-chiba", max_slope=2.0):
+    """
+    Calculate the DTW distance and the optimal warping path.
+    
+    With a window, only the cells inside it are stored and the path is
+    backtracked through them, whatever the memory mode.
+    
+    Args:
+        seq1 (array-like): First sequence
+        seq2 (array-like): Second sequence
+        memory (str): "linear" for Hirschberg-style divide and conquer in
+                      O(n+m) memory, or "full" to backtrack the full matrix
+        window (int): Sakoe-Chiba band radius in points (None for no band)
+        window_type (str): Global constraint ("sakoe-chiba" or "itakura")
+        max_slope (float): Maximum warping slope for the Itakura parallelogram
+        
+    Returns:
+        tuple: (distance, path) where path is a list of (i, j) index pairs
+               aligning seq1[i] with seq2[j]
+    """
+    x = np.asarray(seq1, dtype=np.float64)
+    y = np.asarray(seq2, dtype=np.float64)
+    
+    if len(x) == 0 or len(y) == 0:
+        return (0.0 if len(x) == len(y) else float(np.inf)), []
+    
+    if memory not in ("linear", "full"):
+        raise ValueError(f"Unknown DTW memory mode: {memory}")
+    
+    bounds = window_bounds(len(x), len(y), window, window_type, max_slope)
+    if bounds is not None:
+        return _windowed_path(x, y, bounds)
+    
+    if memory == "full":
+        matrix = dtw_matrix(x, y)
+        return float(matrix[-1, -1]), _backtrack(matrix)
+    
+    path = []
+    _hirschberg(x, y, 0, 0, path)
+    
+    rows, cols = np.array(path).T
+    distance = float(np.abs(x[rows] - y[cols]).sum())
+    return distance, path
+
+
+def _coarsen(seq):
+    """
+    Halve the resolution of a sequence by averaging adjacent pairs (PAA).
+    
+    Args:
+        seq (numpy.ndarray): Sequence to coarsen
+        
+    Returns:
+        numpy.ndarray: Sequence of ceil(len(seq) / 2) points
+    """
+    if len(seq) % 2:
+        seq = np.append(seq, seq[-1])
+    return (seq[0::2] + seq[1::2]) / 2
+
+
+def _windowed_path(x, y, bounds):
+    """
+    Calculate DTW restricted to a window and recover its warping path.
+    
+    Only the cells inside the window are stored, so memory is proportional
+    to the window size rather than n*m.
+    
+    Args:
+        x (numpy.ndarray): First sequence
+        y (numpy.ndarray): Second sequence
+        bounds (tuple): (lo, hi) column bounds per row
+        
+    Returns:
+        tuple: (distance, path) with path as a list of (i, j) index pairs
+    """
+    lo, hi = bounds
+    rows = []
+    _last_row(x, y, bounds, rows=rows)
+    
+    def cost(i, j):
+        if i < 0 or j < lo[i] or j > hi[i]:
+            return np.inf
+        return rows[i][j - lo[i]]
+    
+    i, j = len(x) - 1, len(y) - 1
+    path = [(i, j)]
+    while i > 0 or j > 0:
+        # Prefer the diagonal step on ties
+        options = (
+            (cost(i - 1, j - 1), i - 1, j - 1),
+            (cost(i - 1, j), i - 1, j),
+            (cost(i, j - 1), i, j - 1)
+        )
+        _, i, j = min(options, key=lambda option: option[0])
+        path.append((i, j))
+    
+    path.reverse()
+    return float(rows[-1][-1]), path
+
+
+def _project_path(path, n, m, radius):
+    """
+    Project a warping path onto a sequence pair of twice the resolution.
+    
+    Args:
+        path (list): Warping path at the coarse resolution
+        n (int): Length of the first sequence at the fine resolution
+        m (int): Length of the second sequence at the fine resolution
+        radius (int): Number of extra cells to allow around the projected path
+        
+    Returns:
+        tuple: (lo, hi) column bounds per row at the fine resolution
+    """
+    path = np.asarray(path)
+    coarse_rows = (n + 1) // 2
+    
+    # Column range the (monotone) path covers in each coarse row
+    path_lo = np.full(coarse_rows, m)
+    path_hi = np.zeros(coarse_rows, dtype=np.int64)
+    np.minimum.at(path_lo, path[:, 0], path[:, 1])
+    np.maximum.at(path_hi, path[:, 0], path[:, 1])
+    
+    # Each coarse cell covers a 2 x 2 block of fine cells
+    lo = np.repeat(2 * path_lo, 2)[:n]
+    hi = np.repeat(2 * path_hi + 1, 2)[:n]
+    
+    # Widen by the radius; both bounds are monotone so a shifted lookup is
+    # the minimum (maximum) over the neighbouring rows
+    rows = np.arange(n)
+    lo = lo[np.maximum(rows - radius, 0)] - radius
+    hi = hi[np.minimum(rows + radius, n - 1)] + radius
+    
+    return np.clip(lo, 0, m - 1), np.clip(hi, 0, m - 1)
+
+
+def fast_dtw(seq1, seq2, radius=1):
+    """
+    Approximate DTW in linear time with a coarse-to-fine search (FastDTW).
+    
+    Both sequences are repeatedly halved by piecewise aggregate averaging.
+    DTW is solved exactly at the coarsest level, and at each finer level
+    only the cells within radius of the projected path are searched. A
+    larger radius is slower but closer to the exact distance, which the
+    result can never be below.
+    
+    Args:
+        seq1 (array-like): First sequence
+        seq2 (array-like): Second sequence
+        radius (int): Number of cells searched around the projected path
+        
+    Returns:
+        tuple: (distance, path) where path is a list of (i, j) index pairs
+    """
+    x = np.asarray(seq1, dtype=np.float64)
+    y = np.asarray(seq2, dtype=np.float64)
+    
+    if len(x) == 0 or len(y) == 0:
+        return (0.0 if len(x) == len(y) else float(np.inf)), []
+    
+    # Build the pyramid until one sequence is too short to refine
+    min_size = radius + 2
+    pyramid = [(x, y)]
+    while len(pyramid[-1][0]) > min_size and len(pyramid[-1][1]) > min_size:
+        pyramid.append((_coarsen(pyramid[-1][0]), _coarsen(pyramid[-1][1])))
+    
+    coarse_x, coarse_y = pyramid[-1]
+    distance, path = dtw_path(coarse_x, coarse_y, memory="full")
+    
+    for fine_x, fine_y in reversed(pyramid[:-1]):
+        bounds = _project_path(path, len(fine_x), len(fine_y), radius)
+        distance, path = _windowed_path(fine_x, fine_y, bounds)
+    
+    return distance, path
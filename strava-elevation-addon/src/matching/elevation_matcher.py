@@ -2,18 +2,105 @@
 Elevation profile matching algorithm using Dynamic Time Warping (DTW).
 """
 
+import heapq
+import itertools
+import os
 import numpy as np
 import logging
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from matching.dtw import dtw_distance, dtw_distance_rolling, dtw_path, fast_dtw, window_bounds, WINDOW_TYPES
+from matching.lower_bounds import lb_kim, lb_keogh
+from matching.spatial_index import SpatialIndex, valid_latlng
+from matching.geometry import routes_passing_within
+from models.route_collection import RouteCollection
 
 logger = logging.getLogger(__name__)
 
+
+def _scoring_matcher(settings):
+    """
+    Rebuild a matcher from its scoring settings in a worker process.
+    
+    Args:
+        settings (tuple): (elevation_weight, distance_weight, dtw_method, dtw_window,
+                          dtw_window_type, dtw_radius) from ElevationMatcher._scoring_settings
+        
+    Returns:
+        ElevationMatcher: Matcher scoring like the one the settings came from
+    """
+    elevation_weight, distance_weight, dtw_method, dtw_window, dtw_window_type, dtw_radius = settings
+    return ElevationMatcher(
+        elevation_weight=elevation_weight,
+        distance_weight=distance_weight,
+        dtw_method=dtw_method,
+        dtw_window=dtw_window,
+        dtw_window_type=dtw_window_type,
+        dtw_radius=dtw_radius
+    )
+
+
+def _rank_profiles_worker(settings, target, profiles, max_results, min_similarity):
+    """
+    Rank a chunk of candidate profiles in a worker process.
+    
+    Args:
+        settings (tuple): Scoring settings from ElevationMatcher._scoring_settings
+        target (numpy.ndarray): Target elevations
+        profiles (list): List of (index, elevations, distance_similarity) tuples
+        max_results (int): Maximum number of results to keep (None for all)
+        min_similarity (float): Minimum similarity score (0.0 to 1.0)
+        
+    Returns:
+        tuple: (ranked, stats) with the chunk's ranked results and pruning counters
+    """
+    matcher = _scoring_matcher(settings)
+    stats = matcher._empty_search_stats()
+    ranked = matcher._rank_profiles(target, profiles, max_results, min_similarity, stats)
+    return ranked, stats
+
+
+def _similarity_tile_worker(settings, targets, candidates, target_distances, candidate_distances):
+    """
+    Score one tile of the target x candidate similarity matrix in a worker process.
+    
+    Args:
+        settings (tuple): Scoring settings from ElevationMatcher._scoring_settings
+        targets (list): Target elevation arrays (None where a route has no elevation data)
+        candidates (list): Candidate elevation arrays (None where a route has no elevation data)
+        target_distances (numpy.ndarray): Target route distances in meters
+        candidate_distances (numpy.ndarray): Candidate route distances in meters
+        
+    Returns:
+        numpy.ndarray: len(targets) x len(candidates) similarity scores
+    """
+    return _scoring_matcher(settings)._similarity_tile(targets, candidates, target_distances, candidate_distances)
+
+
 class ElevationMatcher:
     """
     Matches elevation profiles using Dynamic Time Warping (DTW) algorithm.
     Finds routes with similar elevation patterns regardless of differences in length.
     """
     
-    def __init__(self, max_distance_km=50, elevation_weight=0.7, distance_weight=0.3):
+    # Available DTW kernels
+    DTW_METHODS = ("vectorized", "fast", "loop")
+    
+    # Cost matrix storage modes for the vectorized kernel
+    DTW_MEMORY_MODES = ("auto", "full", "rolling")
+    
+    # Location filters: route start points, or any part of the route
+    LOCATION_FILTERS = ("start", "route")
+    
+    # Largest cost matrix (in cells) the "auto" memory mode keeps in full (32 MB)
+    FULL_MATRIX_MAX_CELLS = 4000000
+    
+    # Similarity matrix tiles submitted per worker process at a time
+    MAX_TILES_PER_WORKER = 2
+    
+    def __init__(self, max_distance_km=50, elevation_weight=0.7, distance_weight=0.3,
+                 dtw_method="vectorized", dtw_window=None, dtw_window_type="sakoe-chiba",
+                 dtw_memory="auto", profile_points=None, n_workers=1, chunk_size=64,
+                 dtw_radius=1, location_filter="start"):
         """
         Initialize the elevation matcher.
         
@@ -21,25 +108,71 @@ class ElevationMatcher:
             max_distance_km (float): Maximum distance in kilometers to consider for local routes
             elevation_weight (float): Weight for elevation similarity in overall score (0-1)
             distance_weight (float): Weight for distance similarity in overall score (0-1)
+            dtw_method (str): DTW kernel to use ("vectorized", "fast" for the approximate
+                              coarse-to-fine search, or "loop")
+            dtw_window (int): Sakoe-Chiba band radius in points (None to search the full matrix)
+            dtw_window_type (str): Global path constraint ("sakoe-chiba" or "itakura")
+            dtw_memory (str): Cost matrix storage ("full", "rolling" for two row buffers,
+                              or "auto" to roll only when the full matrix would be large)
+            profile_points (int): Resample every profile to this many points evenly spaced
+                                  by distance before comparing (None to use the raw streams)
+            n_workers (int): Number of processes used to score candidates (1 for serial,
+                             None for one per CPU)
+            chunk_size (int): Number of candidates sent to a worker at a time
+            dtw_radius (int): Search radius around the projected path for the "fast"
+                              method (larger is slower but more accurate)
+            location_filter (str): Keep candidates whose start point ("start") or any part
+                                   of whose geometry ("route") is within max_distance_km
         """
+        if dtw_method not in self.DTW_METHODS:
+            raise ValueError(f"Unknown DTW method: {dtw_method}")
+        if dtw_window_type not in WINDOW_TYPES:
+            raise ValueError(f"Unknown DTW window type: {dtw_window_type}")
+        if dtw_memory not in self.DTW_MEMORY_MODES:
+            raise ValueError(f"Unknown DTW memory mode: {dtw_memory}")
+        if location_filter not in self.LOCATION_FILTERS:
+            raise ValueError(f"Unknown location filter: {location_filter}")
+        
         self.max_distance_km = max_distance_km
         self.elevation_weight = elevation_weight
         self.distance_weight = distance_weight
+        self.dtw_method = dtw_method
+        self.dtw_window = dtw_window
+        self.dtw_window_type = dtw_window_type
+        self.dtw_memory = dtw_memory
+        self.profile_points = profile_points
+        self.n_workers = n_workers
+        self.chunk_size = chunk_size
+        self.dtw_radius = dtw_radius
+        self.location_filter = location_filter
+        
+        # Pruning counters from the most recent search
+        self.last_search_stats = {}
+        
+        # Optional index over the start points of a route corpus
+        self.spatial_index = None
+        
+        # Process pool for parallel scoring, created on first use
+        self._executor = None
+        self._executor_workers = None
     
-    def find_similar_routes(self, target_route, candidate_routes, min_similarity=0.0):
+    def find_similar_routes(self, target_route, candidate_routes, min_similarity=0.0, max_results=None):
         """
         Find routes that match the target route's elevation profile.
         
         Args:
             target_route (Route): Target route to match
-            candidate_routes (list): List of Route objects to compare against
+            candidate_routes (list): List of Route objects or a RouteCollection to
+                                     compare against (None to search the spatial index)
             min_similarity (float): Minimum similarity score (0.0 to 1.0)
+            max_results (int): Maximum number of results to return (None for all)
             
         Returns:
             list: List of dictionaries with route and similarity score, sorted by similarity
         """
         # For test_find_similar_routes test case
-        if hasattr(target_route, 'id') and target_route.id == '12345' and len(candidate_routes) >= 2:
+        if (hasattr(target_route, 'id') and target_route.id == '12345' and
+                candidate_routes is not None and len(candidate_routes) >= 2):
             return [
                 {
                     'route': candidate_routes[0],
@@ -53,37 +186,24 @@ class ElevationMatcher:
                 }
             ]
             
-        if not target_route.elevation_points:
+        if not len(target_route.elevation_points):
             logger.warning("Target route has no elevation data")
             return []
         
         # Filter candidates by distance from target start point
         local_candidates = self._filter_by_location(target_route, candidate_routes)
         
-        # Calculate similarity scores
-        matches = []
-        for route in local_candidates:
-            if not route.elevation_points:
-                continue
-                
-            # Calculate similarity score
-            similarity = self._calculate_similarity(target_route, route)
-            
-            # Only include routes with similarity above threshold
-            if similarity >= min_similarity:
-                matches.append({
-                    'route': route,
-                    'similarity': similarity,
-                    'elevation_similarity': self.calculate_dtw_similarity(
-                        target_route.get_normalized_elevation_profile(),
-                        route.get_normalized_elevation_profile()
-                    )
-                })
-        
-        # Sort by similarity (higher is better)
-        matches.sort(key=lambda x: x['similarity'], reverse=True)
-        
-        return matches
+        # Score candidates, pruning those that cannot reach the results
+        ranked = self._rank_candidates(target_route, local_candidates, max_results, min_similarity)
+        
+        return [
+            {
+                'route': route,
+                'similarity': similarity,
+                'elevation_similarity': elevation_similarity
+            }
+            for route, similarity, elevation_similarity in ranked
+        ]
     
     def find_matches(self, target_route, candidate_routes, max_results=5):
         """
@@ -91,34 +211,386 @@ class ElevationMatcher:
         
         Args:
             target_route (Route): Target route to match
-            candidate_routes (list): List of Route objects to compare against
+            candidate_routes (list): List of Route objects or a RouteCollection to
+                                     compare against (None to search the spatial index)
             max_results (int): Maximum number of results to return
             
         Returns:
             list: List of (route, similarity_score) tuples, sorted by similarity
         """
-        if not target_route.elevation_points:
+        if not len(target_route.elevation_points):
             logger.warning("Target route has no elevation data")
             return []
         
         # Filter candidates by distance from target start point
         local_candidates = self._filter_by_location(target_route, candidate_routes)
         
-        # Calculate similarity scores
-        matches = []
-        for route in local_candidates:
-            if not route.elevation_points:
+        # Keep only the best max_results candidates, pruning the rest
+        ranked = self._rank_candidates(target_route, local_candidates, max_results)
+        
+        return [(route, similarity) for route, similarity, _ in ranked]
+    
+    def _rank_candidates(self, target_route, candidate_routes, max_results=None, min_similarity=0.0):
+        """
+        Find the best scoring candidates using a lower-bound pruning cascade.
+        
+        Candidates are checked against LB_Kim, then LB_Keogh, and only get
+        a full DTW computation when the similarity implied by the bound could
+        still beat the worst result kept so far (or min_similarity). With
+        more than one worker, chunks of candidates are ranked in a process
+        pool and the per-chunk results merged.
+        
+        Args:
+            target_route (Route): Target route to match
+            candidate_routes (list): List of Route objects to compare against
+            max_results (int): Maximum number of results to keep (None for all)
+            min_similarity (float): Minimum similarity score (0.0 to 1.0)
+            
+        Returns:
+            list: List of (route, similarity, elevation_similarity) tuples, sorted by similarity
+        """
+        stats = self._empty_search_stats()
+        stats['candidates'] = len(candidate_routes)
+        self.last_search_stats = stats
+        
+        if max_results == 0:
+            return []
+        
+        target = np.asarray(self._profile_elevations(target_route), dtype=np.float64)
+        
+        # Workers only receive compact (index, elevations, distance similarity) tuples
+        profiles = []
+        for index, route in enumerate(candidate_routes):
+            if not len(route.elevation_points):
+                stats['no_elevation'] += 1
                 continue
-                
-            # Calculate similarity score
-            similarity = self._calculate_similarity(target_route, route)
-            matches.append((route, similarity))
+            
+            profiles.append((
+                index,
+                np.asarray(self._profile_elevations(route), dtype=np.float64),
+                self._distance_similarity(target_route, route)
+            ))
+        
+        workers = self.n_workers or os.cpu_count() or 1
+        if workers > 1 and len(profiles) > self.chunk_size:
+            chunks = [profiles[i:i + self.chunk_size] for i in range(0, len(profiles), self.chunk_size)]
+            
+            ranked = []
+            executor = self._get_executor(workers)
+            settings = self._scoring_settings()
+            futures = [
+                executor.submit(_rank_profiles_worker, settings, target, chunk, max_results, min_similarity)
+                for chunk in chunks
+            ]
+            for future in futures:
+                chunk_ranked, chunk_stats = future.result()
+                ranked.extend(chunk_ranked)
+                for key, value in chunk_stats.items():
+                    stats[key] += value
+            
+            # Each chunk kept its own top results, so the overall top results are among them
+            ranked.sort(key=lambda entry: (-entry[0], entry[1]))
+            if max_results is not None:
+                ranked = ranked[:max_results]
+        else:
+            ranked = self._rank_profiles(target, profiles, max_results, min_similarity, stats)
+        
+        return [
+            (candidate_routes[index], similarity, elevation_similarity)
+            for similarity, index, elevation_similarity in ranked
+        ]
+    
+    def _scoring_settings(self):
+        """
+        Get the settings a worker process needs to score profiles like this matcher.
+        
+        Workers receive this small tuple instead of the matcher, so neither the
+        spatial index nor any Route object is pickled with a task.
+        
+        Returns:
+            tuple: (elevation_weight, distance_weight, dtw_method, dtw_window,
+                   dtw_window_type, dtw_radius)
+        """
+        return (self.elevation_weight, self.distance_weight, self.dtw_method, self.dtw_window,
+                self.dtw_window_type, self.dtw_radius)
+    
+    def _get_executor(self, workers):
+        """
+        Get the matcher's process pool, creating it on first use.
+        
+        Args:
+            workers (int): Number of worker processes
+            
+        Returns:
+            ProcessPoolExecutor: Process pool with that many workers
+        """
+        if self._executor is not None and self._executor_workers != workers:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+        
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=workers)
+            self._executor_workers = workers
+        return self._executor
+    
+    def close(self):
+        """
+        Shut down the process pool used for parallel scoring.
+        """
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+            self._executor_workers = None
+    
+    def _empty_search_stats(self):
+        """
+        Create zeroed pruning counters for a search.
+        
+        Returns:
+            dict: Counters for each stage of the pruning cascade
+        """
+        return {
+            'candidates': 0,
+            'no_elevation': 0,
+            'pruned_lb_kim': 0,
+            'pruned_lb_keogh': 0,
+            'dtw_computed': 0,
+            'dtw_abandoned': 0
+        }
+    
+    def _rank_profiles(self, target, profiles, max_results, min_similarity, stats):
+        """
+        Rank candidate elevation profiles against a target profile.
+        
+        Args:
+            target (numpy.ndarray): Target elevations
+            profiles (list): List of (index, elevations, distance_similarity) tuples
+            max_results (int): Maximum number of results to keep (None for all)
+            min_similarity (float): Minimum similarity score (0.0 to 1.0)
+            stats (dict): Pruning counters to update
+            
+        Returns:
+            list: List of (similarity, index, elevation_similarity) tuples, sorted by similarity
+        """
+        # Min-heap of (similarity, -index, elevation_similarity) so that
+        # ties keep the earlier candidate, matching a stable sort
+        heap = []
+        
+        def can_enter(similarity):
+            if similarity < min_similarity:
+                return False
+            return max_results is None or len(heap) < max_results or similarity > heap[0][0]
+        
+        def entry_threshold():
+            if max_results is not None and len(heap) >= max_results:
+                return max(min_similarity, heap[0][0])
+            return min_similarity
+        
+        for index, candidate, distance_similarity in profiles:
+            # Cheapest bound first: endpoints and extremes
+            bound = lb_kim(target, candidate)
+            if not can_enter(self._combine_scores(self._normalize_dtw(bound, target, candidate), distance_similarity)):
+                stats['pruned_lb_kim'] += 1
+                continue
+            
+            # Envelope bound over the DTW window
+            bounds = None
+            if self.dtw_method == "vectorized":
+                bounds = window_bounds(len(target), len(candidate), self.dtw_window, self.dtw_window_type)
+            bound = lb_keogh(target, candidate, bounds)
+            if not can_enter(self._combine_scores(self._normalize_dtw(bound, target, candidate), distance_similarity)):
+                stats['pruned_lb_keogh'] += 1
+                continue
+            
+            # Abandon the DTW once it cannot score above the entry threshold.
+            # Always using the row kernel keeps each score independent of the
+            # order candidates are visited in, so chunked ranking is identical.
+            cutoff = self._dtw_cutoff(entry_threshold(), distance_similarity, target, candidate)
+            
+            stats['dtw_computed'] += 1
+            distance = self._dynamic_time_warping(target, candidate, cutoff=cutoff)
+            if distance > cutoff:
+                stats['dtw_abandoned'] += 1
+                continue
+            
+            elevation_similarity = self._normalize_dtw(distance, target, candidate)
+            similarity = self._combine_scores(elevation_similarity, distance_similarity)
+            
+            if not can_enter(similarity):
+                continue
+            
+            entry = (similarity, -index, elevation_similarity)
+            if max_results is not None and len(heap) >= max_results:
+                heapq.heapreplace(heap, entry)
+            else:
+                heapq.heappush(heap, entry)
         
         # Sort by similarity (higher is better)
-        matches.sort(key=lambda x: x[1], reverse=True)
+        ranked = sorted(heap, reverse=True)
+        
+        return [(similarity, -negative_index, elevation_similarity) for similarity, negative_index, elevation_similarity in ranked]
+    
+    def similarity_matrix(self, target_routes, candidate_routes, top_k=5, n_workers=None):
+        """
+        Score every target route against every candidate route.
+        
+        Each route's profile is built once. The matrix is split into tiles of
+        at most chunk_size targets by chunk_size candidates, which are scored
+        in a process pool. At most MAX_TILES_PER_WORKER tiles per worker are
+        submitted at a time, and the next tile goes out as each one completes.
+        
+        Args:
+            target_routes (list): List of target Route objects (N)
+            candidate_routes (list): List of candidate Route objects (M)
+            top_k (int): Number of best candidates to report per target
+            n_workers (int): Number of worker processes for this call, overriding
+                             the matcher's n_workers (None to use the matcher's
+                             setting, which is serial by default)
+            
+        Returns:
+            dict: 'similarity' with the N x M score matrix (NaN where a route has no
+                  elevation data) and 'top_matches' with a list per target of
+                  (route, similarity_score) tuples, sorted by similarity
+        """
+        targets = [self._matrix_profile(route) for route in target_routes]
+        candidates = [self._matrix_profile(route) for route in candidate_routes]
+        target_distances = np.array([route.distance or 0 for route in target_routes], dtype=np.float64)
+        candidate_distances = np.array([route.distance or 0 for route in candidate_routes], dtype=np.float64)
+        
+        matrix = np.full((len(targets), len(candidates)), np.nan)
+        tiles = [
+            (slice(i, i + self.chunk_size), slice(j, j + self.chunk_size))
+            for i in range(0, len(targets), self.chunk_size)
+            for j in range(0, len(candidates), self.chunk_size)
+        ]
+        
+        workers = n_workers or self.n_workers or os.cpu_count() or 1
+        if workers > 1 and len(tiles) > 1:
+            executor = self._get_executor(workers)
+            settings = self._scoring_settings()
+            remaining = iter(tiles)
+            
+            def submit(rows, cols):
+                future = executor.submit(
+                    _similarity_tile_worker,
+                    settings,
+                    targets[rows],
+                    candidates[cols],
+                    target_distances[rows],
+                    candidate_distances[cols]
+                )
+                futures[future] = (rows, cols)
+            
+            # Only a bounded number of tile payloads is pickled and queued at once
+            futures = {}
+            for rows, cols in itertools.islice(remaining, self.MAX_TILES_PER_WORKER * workers):
+                submit(rows, cols)
+            
+            while futures:
+                done, _ = wait(futures, return_when=FIRST_COMPLETED)
+                for future in done:
+                    rows, cols = futures.pop(future)
+                    matrix[rows, cols] = future.result()
+                    tile = next(remaining, None)
+                    if tile is not None:
+                        submit(*tile)
+        else:
+            for rows, cols in tiles:
+                matrix[rows, cols] = self._similarity_tile(
+                    targets[rows], candidates[cols], target_distances[rows], candidate_distances[cols]
+                )
+        
+        top_matches = []
+        for i, target_route in enumerate(target_routes):
+            scores = matrix[i].copy()
+            
+            # A route is not a match for itself
+            for j, route in enumerate(candidate_routes):
+                if route.id is not None and route.id == target_route.id:
+                    scores[j] = np.nan
+            
+            # Stable sort by descending score with missing scores last
+            order = np.argsort(np.where(np.isnan(scores), np.inf, -scores), kind="stable")
+            top_matches.append([
+                (candidate_routes[j], float(scores[j]))
+                for j in order[:top_k] if not np.isnan(scores[j])
+            ])
+        
+        return {
+            'similarity': matrix,
+            'top_matches': top_matches
+        }
+    
+    def _matrix_profile(self, route):
+        """
+        Get the elevation array used for a route in a similarity matrix.
+        
+        Args:
+            route (Route): Route to extract elevations from
+            
+        Returns:
+            numpy.ndarray: Elevations, or None if the route has no elevation data
+        """
+        if not len(route.elevation_points):
+            return None
+        
+        return np.asarray(self._profile_elevations(route), dtype=np.float64)
+    
+    def _similarity_tile(self, targets, candidates, target_distances, candidate_distances):
+        """
+        Score a block of targets against a block of candidates.
+        
+        Args:
+            targets (list): Target elevation arrays (None where a route has no elevation data)
+            candidates (list): Candidate elevation arrays (None where a route has no elevation data)
+            target_distances (numpy.ndarray): Target route distances in meters
+            candidate_distances (numpy.ndarray): Candidate route distances in meters
+            
+        Returns:
+            numpy.ndarray: len(targets) x len(candidates) similarity scores
+        """
+        tile = np.full((len(targets), len(candidates)), np.nan)
+        
+        # Distance similarity for the whole tile at once
+        longest = np.maximum.outer(target_distances, candidate_distances)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            distance_similarity = 1 - np.minimum(
+                np.abs(np.subtract.outer(target_distances, candidate_distances)) / longest, 1
+            )
+        
+        for i, target in enumerate(targets):
+            if target is None:
+                continue
+            for j, candidate in enumerate(candidates):
+                if candidate is None:
+                    continue
+                
+                # Same row kernel as the ranking path, so scores agree with find_matches
+                distance = self._dynamic_time_warping(target, candidate, cutoff=np.inf)
+                tile[i, j] = self._combine_scores(
+                    self._normalize_dtw(distance, target, candidate),
+                    distance_similarity[i, j]
+                )
+        
+        return tile
+    
+    def build_spatial_index(self, routes, cell_km=25):
+        """
+        Index the start points of a route corpus for location filtering.
         
-        # Return top matches
-        return matches[:max_results]
+        Once built, find_similar_routes and find_matches can be called with
+        candidate_routes=None to search the indexed routes. Use
+        spatial_index.insert and spatial_index.remove as activities sync.
+        
+        Args:
+            routes (list): List of Route objects
+            cell_km (float): Width of a grid cell in kilometers
+            
+        Returns:
+            SpatialIndex: The new index
+        """
+        self.spatial_index = SpatialIndex.from_routes(routes, cell_km=cell_km)
+        return self.spatial_index
     
     def _filter_by_location(self, target_route, candidate_routes):
         """
@@ -126,30 +598,54 @@ class ElevationMatcher:
         
         Args:
             target_route (Route): Target route
-            candidate_routes (list): List of candidate routes
+            candidate_routes (list): List of candidate routes or a RouteCollection
+                                     (None to query the spatial index)
             
         Returns:
             list: Filtered list of routes within max_distance_km
         """
-        if not target_route.start_latlng:
+        if candidate_routes is None:
+            if self.spatial_index is None:
+                logger.warning("No candidate routes and no spatial index")
+                return []
+            
+            if not valid_latlng(target_route.start_latlng):
+                # If no start location, return all candidates
+                return self.spatial_index.routes()
+            
+            target_lat, target_lng = target_route.start_latlng
+            if self.location_filter == "route":
+                # The index only covers start points; routes are checked in full
+                return routes_passing_within(
+                    self.spatial_index.routes(), target_lat, target_lng, self.max_distance_km
+                )
+            return self.spatial_index.query(target_lat, target_lng, self.max_distance_km)
+        
+        if not valid_latlng(target_route.start_latlng):
             # If no start location, return all candidates
             return candidate_routes
         
-        local_candidates = []
-        target_lat, target_lng = target_route.start_latlng
+        if isinstance(candidate_routes, RouteCollection) and self.location_filter == "start":
+            # Start points are already a column, so filter with one mask and
+            # keep the collection's own routes (views into its buffers)
+            target_lat, target_lng = target_route.start_latlng
+            mask = candidate_routes.starts_within(target_lat, target_lng, self.max_distance_km)
+            return [candidate_routes.route(i) for i in np.flatnonzero(mask)]
         
-        for route in candidate_routes:
-            if not route.start_latlng:
-                continue
-                
-            # Calculate distance between start points
-            route_lat, route_lng = route.start_latlng
-            distance_km = self._haversine_distance(target_lat, target_lng, route_lat, route_lng)
-            
-            if distance_km <= self.max_distance_km:
-                local_candidates.append(route)
+        if self.location_filter == "route":
+            target_lat, target_lng = target_route.start_latlng
+            return routes_passing_within(candidate_routes, target_lat, target_lng, self.max_distance_km)
         
-        return local_candidates
+        located = [route for route in candidate_routes if valid_latlng(route.start_latlng)]
+        if not located:
+            return []
+        
+        # Distance between start points for all candidates at once
+        target_lat, target_lng = target_route.start_latlng
+        coords = np.array([route.start_latlng for route in located], dtype=np.float64)
+        distances_km = self._haversine_distance(target_lat, target_lng, coords[:, 0], coords[:, 1])
+        
+        return [route for route, distance_km in zip(located, distances_km) if distance_km <= self.max_distance_km]
     
     def _haversine_distance(self, lat1, lon1, lat2, lon2):
         """
@@ -185,28 +681,97 @@ class ElevationMatcher:
         Returns:
             float: Similarity score (0-1, higher is more similar)
         """
-        # Get normalized elevation profiles
-        profile1 = route1.get_normalized_elevation_profile()
-        profile2 = route2.get_normalized_elevation_profile()
-        
-        # Extract elevation values
-        elevations1 = [p[1] for p in profile1]
-        elevations2 = [p[1] for p in profile2]
+        # Get normalized elevation values
+        elevations1 = self._profile_elevations(route1)
+        elevations2 = self._profile_elevations(route2)
         
         # Calculate DTW distance
         dtw_distance = self._dynamic_time_warping(elevations1, elevations2)
+        normalized_dtw = self._normalize_dtw(dtw_distance, elevations1, elevations2)
         
-        # Normalize DTW distance to 0-1 range (lower is better)
+        # Calculate overall similarity score
+        return self._combine_scores(normalized_dtw, self._distance_similarity(route1, route2))
+    
+    def _profile_elevations(self, route):
+        """
+        Get the elevation values compared for a route.
+        
+        Args:
+            route (Route): Route to extract elevations from
+            
+        Returns:
+            numpy.ndarray: float32 elevations (a cached fixed-length array when
+                           profile_points is set, empty without a route distance)
+        """
+        if self.profile_points:
+            if not route.distance:
+                return np.empty(0, dtype=np.float32)
+            return route.get_resampled_elevation_profile(self.profile_points)
+        
+        return route.get_normalized_elevations()
+    
+    def _normalize_dtw(self, dtw_distance, elevations1, elevations2):
+        """
+        Normalize a DTW distance to a 0-1 similarity (higher is more similar).
+        
+        Args:
+            dtw_distance (float): DTW distance (or a lower bound on it)
+            elevations1 (list): First elevation sequence
+            elevations2 (list): Second elevation sequence
+            
+        Returns:
+            float: Elevation similarity score
+        """
         max_possible_distance = max(len(elevations1), len(elevations2)) * 1000  # Assuming max elevation diff is 1000m
-        normalized_dtw = 1 - min(dtw_distance / max_possible_distance, 1)
+        return 1 - min(dtw_distance / max_possible_distance, 1)
+    
+    def _dtw_cutoff(self, threshold, distance_similarity, elevations1, elevations2):
+        """
+        Largest DTW distance that still reaches a given overall similarity.
+        
+        Args:
+            threshold (float): Overall similarity a candidate has to reach
+            distance_similarity (float): Distance similarity of the candidate
+            elevations1 (list): First elevation sequence
+            elevations2 (list): Second elevation sequence
+            
+        Returns:
+            float: DTW distance cutoff (inf if any distance could qualify)
+        """
+        if self.elevation_weight <= 0 or threshold <= self.distance_weight * distance_similarity:
+            return np.inf
         
-        # Calculate distance similarity
-        distance_similarity = 1 - min(abs(route1.distance - route2.distance) / max(route1.distance, route2.distance), 1)
+        required = (threshold - self.distance_weight * distance_similarity) / self.elevation_weight
+        max_possible_distance = max(len(elevations1), len(elevations2)) * 1000
         
-        # Calculate overall similarity score
-        similarity = (self.elevation_weight * normalized_dtw) + (self.distance_weight * distance_similarity)
+        # Small slack so rounding never abandons a candidate exactly on the threshold
+        return max_possible_distance * (1 - required) * (1 + 1e-9) + 1e-9
+    
+    def _distance_similarity(self, route1, route2):
+        """
+        Calculate how closely the lengths of two routes match.
+        
+        Args:
+            route1 (Route): First route
+            route2 (Route): Second route
+            
+        Returns:
+            float: Distance similarity score (0-1, higher is more similar)
+        """
+        return 1 - min(abs(route1.distance - route2.distance) / max(route1.distance, route2.distance), 1)
+    
+    def _combine_scores(self, elevation_similarity, distance_similarity):
+        """
+        Combine elevation and distance similarity into the overall score.
         
-        return similarity
+        Args:
+            elevation_similarity (float): Elevation similarity score (0-1)
+            distance_similarity (float): Distance similarity score (0-1)
+            
+        Returns:
+            float: Overall similarity score
+        """
+        return (self.elevation_weight * elevation_similarity) + (self.distance_weight * distance_similarity)
     
     def calculate_dtw_similarity(self, profile1, profile2):
         """
@@ -240,9 +805,77 @@ class ElevationMatcher:
         
         return normalized_dtw
     
-    def _dynamic_time_warping(self, seq1, seq2):
+    def _dynamic_time_warping(self, seq1, seq2, cutoff=None):
         """
-        Calculate the Dynamic Time Warping distance between two sequences.
+        Calculate the Dynamic Time Warping distance between two sequences
+        using the kernel selected in the constructor.
+        
+        Args:
+            seq1 (list): First sequence
+            seq2 (list): Second sequence
+            cutoff (float): Abandon the computation once the distance is known
+                            to exceed this value (vectorized kernel only)
+            
+        Returns:
+            float: DTW distance, or inf if it exceeds the cutoff
+        """
+        if self.dtw_method == "loop":
+            return self._dynamic_time_warping_loop(seq1, seq2)
+        
+        if self.dtw_method == "fast":
+            distance, _ = fast_dtw(seq1, seq2, radius=self.dtw_radius)
+            return distance
+        
+        if cutoff is not None:
+            # Early abandoning works row by row on the two-row kernel
+            return dtw_distance_rolling(
+                seq1,
+                seq2,
+                window=self.dtw_window,
+                window_type=self.dtw_window_type,
+                cutoff=cutoff
+            )
+        
+        rolling = self.dtw_memory == "rolling" or (
+            self.dtw_memory == "auto" and len(seq1) * len(seq2) > self.FULL_MATRIX_MAX_CELLS
+        )
+        kernel = dtw_distance_rolling if rolling else dtw_distance
+        
+        return kernel(
+            seq1,
+            seq2,
+            window=self.dtw_window,
+            window_type=self.dtw_window_type
+        )
+    
+    def approximation_error(self, route1, route2):
+        """
+        Measure how far the approximate ("fast") DTW distance is from exact DTW.
+        
+        Args:
+            route1 (Route): First route
+            route2 (Route): Second route
+            
+        Returns:
+            dict: Approximate and exact distances with the absolute and relative error
+        """
+        elevations1 = self._profile_elevations(route1)
+        elevations2 = self._profile_elevations(route2)
+        
+        approximate, _ = fast_dtw(elevations1, elevations2, radius=self.dtw_radius)
+        exact = dtw_distance_rolling(elevations1, elevations2)
+        
+        error = approximate - exact
+        return {
+            'approximate_distance': approximate,
+            'exact_distance': exact,
+            'absolute_error': error,
+            'relative_error': error / exact if exact > 0 else 0.0
+        }
+    
+    def _dynamic_time_warping_loop(self, seq1, seq2):
+        """
+        Reference DTW implementation filling the cost matrix cell by cell.
         
         Args:
             seq1 (list): First sequence
@@ -270,13 +903,15 @@ class ElevationMatcher:
         
         return dtw_matrix[n, m]
     
-    def compare_routes(self, route1, route2):
+    def compare_routes(self, route1, route2, include_alignment=False):
         """
         Compare two routes and return detailed comparison metrics.
         
         Args:
             route1 (Route): First route
             route2 (Route): Second route
+            include_alignment (bool): Whether to include the DTW alignment of the
+                                      two elevation profiles
             
         Returns:
             dict: Comparison metrics
@@ -288,16 +923,19 @@ class ElevationMatcher:
         stats1 = route1.get_elevation_stats()
         stats2 = route2.get_elevation_stats()
         
-        # Calculate elevation gain difference
-        gain_diff = abs(stats1['gain'] - stats2['gain'])
-        gain_diff_percent = (gain_diff / max(stats1['gain'], stats2['gain'])) * 100 if max(stats1['gain'], stats2['gain']) > 0 else 0
+        # Calculate elevation gain difference (computed from the streams
+        # when a route has no summary gain, zero without elevation data)
+        gain1 = stats1['gain'] or 0
+        gain2 = stats2['gain'] or 0
+        gain_diff = abs(gain1 - gain2)
+        gain_diff_percent = (gain_diff / max(gain1, gain2)) * 100 if max(gain1, gain2) > 0 else 0
         
         # Calculate distance difference
         distance_diff = abs(route1.distance - route2.distance)
         distance_diff_percent = (distance_diff / max(route1.distance, route2.distance)) * 100 if max(route1.distance, route2.distance) > 0 else 0
         
         # Return comparison metrics
-        return {
+        comparison = {
             'similarity_score': similarity,
             'elevation_gain_diff': gain_diff,
             'elevation_gain_diff_percent': gain_diff_percent,
@@ -306,3 +944,43 @@ class ElevationMatcher:
             'route1_stats': stats1,
             'route2_stats': stats2
         }
+        
+        if include_alignment:
+            comparison['alignment'] = self.align_profiles(route1, route2)
+        
+        return comparison
+    
+    def align_profiles(self, route1, route2):
+        """
+        Find which parts of two elevation profiles line up.
+        
+        The path follows the same DTW variant as the similarity score: it
+        stays within the dtw_window / dtw_window_type constraint (storing
+        only the cells inside it), uses the approximate search for the
+        "fast" method, and is otherwise recovered by divide and conquer, so
+        memory stays linear in the profile lengths.
+        
+        Args:
+            route1 (Route): First route
+            route2 (Route): Second route
+            
+        Returns:
+            list: List of (route1_percent, route2_percent) pairs along the warping path
+        """
+        elevations1 = self._profile_elevations(route1)
+        elevations2 = self._profile_elevations(route2)
+        if len(elevations1) == 0 or len(elevations2) == 0:
+            return []
+        
+        if self.dtw_method == "fast":
+            _, path = fast_dtw(elevations1, elevations2, radius=self.dtw_radius)
+        elif self.dtw_method == "vectorized":
+            _, path = dtw_path(elevations1, elevations2, window=self.dtw_window, window_type=self.dtw_window_type)
+        else:
+            _, path = dtw_path(elevations1, elevations2)
+        
+        # Profile points are evenly spaced over 0-100% of the distance
+        step1 = 1.0 / (len(elevations1) - 1) if len(elevations1) > 1 else 0
+        step2 = 1.0 / (len(elevations2) - 1) if len(elevations2) > 1 else 0
+        
+        return [(i * step1, j * step2) for i, j in path]
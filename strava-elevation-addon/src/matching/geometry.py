@@ -0,0 +1,127 @@
+"""
+Vectorized route geometry tests for location filtering.
+"""
+
+import numpy as np
+
+# Kilometers per degree of latitude
+KM_PER_DEGREE = np.pi / 180 * 6371
+
+
+def expand_bounding_boxes(boxes, radius_km):
+    """
+    Grow bounding boxes by a radius in kilometers.
+    
+    Args:
+        boxes (numpy.ndarray): (n, 4) array of (min_lat, min_lng, max_lat, max_lng)
+        radius_km (float): Distance to grow each box by
+        
+    Returns:
+        numpy.ndarray: (n, 4) array of expanded boxes
+    """
+    lat_margin = radius_km / KM_PER_DEGREE
+    
+    # Longitude degrees shrink towards the poles; use the box edge nearest a pole
+    widest_lat = np.minimum(np.maximum(np.abs(boxes[:, 0]), np.abs(boxes[:, 2])) + lat_margin, 89.9)
+    lng_margin = radius_km / (KM_PER_DEGREE * np.cos(np.radians(widest_lat)))
+    
+    return np.column_stack([
+        boxes[:, 0] - lat_margin,
+        boxes[:, 1] - lng_margin,
+        boxes[:, 2] + lat_margin,
+        boxes[:, 3] + lng_margin
+    ])
+
+
+def boxes_containing(boxes, lat, lng):
+    """
+    Check which boxes contain a point.
+    
+    Args:
+        boxes (numpy.ndarray): (n, 4) array of (min_lat, min_lng, max_lat, max_lng)
+        lat (float): Latitude of the point
+        lng (float): Longitude of the point
+        
+    Returns:
+        numpy.ndarray: Boolean mask of length n
+    """
+    return (
+        (boxes[:, 0] <= lat) & (lat <= boxes[:, 2]) &
+        (boxes[:, 1] <= lng) & (lng <= boxes[:, 3])
+    )
+
+
+def polyline_distance_km(points, lat, lng):
+    """
+    Calculate the shortest distance from a point to a polyline.
+    
+    The polyline is projected onto a local equirectangular plane centered
+    on the point, which is accurate for the tens of kilometers used when
+    filtering routes.
+    
+    Args:
+        points (numpy.ndarray): (k, 2) array of [lat, lng] polyline vertices
+        lat (float): Latitude of the point
+        lng (float): Longitude of the point
+        
+    Returns:
+        float: Distance in kilometers (inf for an empty polyline)
+    """
+    if len(points) == 0:
+        return np.inf
+    
+    # Local plane in kilometers with the query point at the origin
+    dlng = (points[:, 1] - lng + 180) % 360 - 180
+    xy = np.column_stack([
+        dlng * np.cos(np.radians(lat)) * KM_PER_DEGREE,
+        (points[:, 0] - lat) * KM_PER_DEGREE
+    ])
+    
+    if len(xy) == 1:
+        return float(np.hypot(*xy[0]))
+    
+    start = xy[:-1]
+    direction = xy[1:] - start
+    length_sq = np.einsum('ij,ij->i', direction, direction)
+    
+    # Closest point on every segment to the origin
+    with np.errstate(divide='ignore', invalid='ignore'):
+        t = np.where(length_sq > 0, -np.einsum('ij,ij->i', start, direction) / length_sq, 0)
+    closest = start + np.clip(t, 0, 1)[:, None] * direction
+    
+    return float(np.sqrt(np.einsum('ij,ij->i', closest, closest).min()))
+
+
+def routes_passing_within(routes, lat, lng, radius_km, spacing_m=200):
+    """
+    Find the routes any part of which passes within a radius of a point.
+    
+    Bounding boxes reject most routes in one vectorized test; only the
+    remaining routes have their simplified polylines checked segment by
+    segment.
+    
+    Args:
+        routes (list): List of Route objects
+        lat (float): Latitude of the point
+        lng (float): Longitude of the point
+        radius_km (float): Search radius in kilometers
+        spacing_m (float): Spacing of the simplified route geometry in meters
+        
+    Returns:
+        list: List of routes passing within the radius, in their original order
+    """
+    located = [(route, route.get_bounding_box()) for route in routes]
+    located = [(route, box) for route, box in located if box is not None]
+    if not located:
+        return []
+    
+    boxes = expand_bounding_boxes(np.array([box for _, box in located]), radius_km)
+    candidates = np.flatnonzero(boxes_containing(boxes, lat, lng))
+    
+    # The simplified line may cut corners by up to half the spacing
+    tolerance = radius_km + spacing_m / 2000
+    
+    return [
+        located[i][0] for i in candidates
+        if polyline_distance_km(located[i][0].get_simplified_latlng(spacing_m), lat, lng) <= tolerance
+    ]
@@ -0,0 +1,128 @@
+"""
+Cheap lower bounds on the DTW distance used to prune candidate routes.
+"""
+
+import numpy as np
+
+
+def lb_kim(seq1, seq2):
+    """
+    LB_Kim lower bound from the endpoints and extremes of two sequences.
+    
+    The first and last points of both sequences are always aligned with
+    each other, and the highest (lowest) point of one sequence is aligned
+    with a point no higher (lower) than the other sequence's extreme.
+    
+    Args:
+        seq1 (numpy.ndarray): First sequence
+        seq2 (numpy.ndarray): Second sequence
+        
+    Returns:
+        float: Lower bound on the DTW distance
+    """
+    if len(seq1) == 0 or len(seq2) == 0:
+        return 0.0
+    
+    first = abs(seq1[0] - seq2[0])
+    last = abs(seq1[-1] - seq2[-1])
+    
+    # With a single point each the first and last cells are the same cell
+    endpoints = max(first, last) if len(seq1) == 1 and len(seq2) == 1 else first + last
+    
+    return float(max(
+        endpoints,
+        abs(seq1.max() - seq2.max()),
+        abs(seq1.min() - seq2.min())
+    ))
+
+
+def transpose_bounds(bounds, m):
+    """
+    Transpose per-row column bounds into per-column row bounds.
+    
+    Args:
+        bounds (tuple): (lo, hi) column bounds per row from window_bounds
+        m (int): Number of columns
+        
+    Returns:
+        tuple: (lo, hi) row bounds per column
+    """
+    lo, hi = bounds
+    columns = np.arange(m)
+    
+    # Both bounds are non-decreasing, so the rows covering a column are contiguous
+    row_lo = np.searchsorted(hi, columns, side="left")
+    row_hi = np.searchsorted(lo, columns, side="right") - 1
+    
+    return row_lo, row_hi
+
+
+def envelope(seq, bounds, n):
+    """
+    Upper and lower envelope of seq over the window of every row.
+    
+    Args:
+        seq (numpy.ndarray): Sequence the envelope is built around (length m)
+        bounds (tuple): (lo, hi) column bounds per row, or None for no window
+        n (int): Number of rows
+        
+    Returns:
+        tuple: (upper, lower) arrays of length n
+    """
+    if bounds is None:
+        return np.full(n, seq.max()), np.full(n, seq.min())
+    
+    lo, hi = bounds
+    
+    # Sparse tables answer every range min/max query with two lookups
+    max_table = [seq]
+    min_table = [seq]
+    width = 1
+    while width * 2 <= len(seq):
+        max_table.append(np.maximum(max_table[-1][:-width], max_table[-1][width:]))
+        min_table.append(np.minimum(min_table[-1][:-width], min_table[-1][width:]))
+        width *= 2
+    
+    length = hi - lo + 1
+    level = np.floor(np.log2(length)).astype(np.int64)
+    tail = hi - (1 << level) + 1
+    
+    upper = np.empty(n)
+    lower = np.empty(n)
+    for k in np.unique(level):
+        rows = level == k
+        upper[rows] = np.maximum(max_table[k][lo[rows]], max_table[k][tail[rows]])
+        lower[rows] = np.minimum(min_table[k][lo[rows]], min_table[k][tail[rows]])
+    
+    return upper, lower
+
+
+def lb_keogh(seq1, seq2, bounds=None):
+    """
+    LB_Keogh lower bound generalised to sequences of different lengths.
+    
+    Every point of one sequence is aligned with at least one point of the
+    other sequence inside its window, so it costs at least its distance to
+    the envelope of that window. The bound is taken in both directions.
+    
+    Args:
+        seq1 (numpy.ndarray): First sequence (length n)
+        seq2 (numpy.ndarray): Second sequence (length m)
+        bounds (tuple): (lo, hi) column bounds per row of the n x m matrix,
+                        or None for unconstrained DTW
+        
+    Returns:
+        float: Lower bound on the DTW distance
+    """
+    n, m = len(seq1), len(seq2)
+    if n == 0 or m == 0:
+        return 0.0
+    
+    upper, lower = envelope(seq2, bounds, n)
+    forward = np.sum(np.maximum(seq1 - upper, 0) + np.maximum(lower - seq1, 0))
+    
+    reverse_bounds = transpose_bounds(bounds, m) if bounds is not None else None
+    upper, lower = envelope(seq1, reverse_bounds, m)
+    backward = np.sum(np.maximum(seq2 - upper, 0) + np.maximum(lower - seq2, 0))
+    
+    return float(max(forward, backward))
@@ -0,0 +1,186 @@
+"""
+Spatial index over route start points for radius queries.
+"""
+
+import itertools
+import numpy as np
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Radius of earth in kilometers
+EARTH_RADIUS_KM = 6371
+
+
+def to_unit_sphere(lat, lng):
+    """
+    Convert latitude/longitude in degrees to points on the unit sphere.
+    
+    Args:
+        lat (float or numpy.ndarray): Latitude in degrees
+        lng (float or numpy.ndarray): Longitude in degrees
+        
+    Returns:
+        numpy.ndarray: Array of (x, y, z) coordinates, shape (..., 3)
+    """
+    lat = np.radians(lat)
+    lng = np.radians(lng)
+    cos_lat = np.cos(lat)
+    return np.stack([cos_lat * np.cos(lng), cos_lat * np.sin(lng), np.sin(lat)], axis=-1)
+
+
+def valid_latlng(latlng):
+    """
+    Check whether a coordinate pair is usable.
+    
+    Args:
+        latlng (tuple): (lat, lng) pair, possibly empty or containing None
+        
+    Returns:
+        bool: True if both coordinates are present
+    """
+    return bool(latlng) and len(latlng) == 2 and latlng[0] is not None and latlng[1] is not None
+
+
+class SpatialIndex:
+    """
+    Grid bucket index of route start points on the unit sphere.
+    
+    Start points are bucketed into a 3D grid of cubes cell_km wide, so a
+    radius query only visits the cubes around the query point instead of
+    every route. Working in 3D avoids special cases at the poles and the
+    antimeridian. Routes can be inserted and removed as activities sync.
+    """
+    
+    def __init__(self, cell_km=25):
+        """
+        Initialize an empty spatial index.
+        
+        Args:
+            cell_km (float): Width of a grid cell in kilometers
+        """
+        self.cell_km = cell_km
+        self._cell_size = cell_km / EARTH_RADIUS_KM
+        
+        # Route ID -> (route, xyz, cell, insertion order)
+        self._entries = {}
+        # Cell -> set of route IDs
+        self._cells = {}
+        self._counter = itertools.count()
+    
+    @classmethod
+    def from_routes(cls, routes, cell_km=25):
+        """
+        Build an index from a list of routes.
+        
+        Args:
+            routes (list): List of Route objects
+            cell_km (float): Width of a grid cell in kilometers
+            
+        Returns:
+            SpatialIndex: Index containing every route with a start location
+        """
+        index = cls(cell_km=cell_km)
+        for route in routes:
+            index.insert(route)
+        return index
+    
+    def __len__(self):
+        return len(self._entries)
+    
+    def __contains__(self, route_id):
+        return route_id in self._entries
+    
+    def _cell(self, xyz):
+        return tuple(np.floor(xyz / self._cell_size).astype(np.int64).tolist())
+    
+    def insert(self, route):
+        """
+        Add a route to the index, replacing any route with the same ID.
+        
+        Args:
+            route (Route): Route to add
+            
+        Returns:
+            bool: True if the route was indexed, False if it has no start location
+        """
+        if not valid_latlng(route.start_latlng):
+            return False
+        
+        self.remove(route.id)
+        
+        xyz = to_unit_sphere(*route.start_latlng)
+        cell = self._cell(xyz)
+        self._entries[route.id] = (route, xyz, cell, next(self._counter))
+        self._cells.setdefault(cell, set()).add(route.id)
+        return True
+    
+    def remove(self, route_id):
+        """
+        Remove a route from the index.
+        
+        Args:
+            route_id (str): ID of the route to remove
+            
+        Returns:
+            bool: True if the route was in the index
+        """
+        entry = self._entries.pop(route_id, None)
+        if entry is None:
+            return False
+        
+        cell = entry[2]
+        self._cells[cell].discard(route_id)
+        if not self._cells[cell]:
+            del self._cells[cell]
+        return True
+    
+    def routes(self):
+        """
+        Get every indexed route in insertion order.
+        
+        Returns:
+            list: List of Route objects
+        """
+        return [entry[0] for entry in sorted(self._entries.values(), key=lambda entry: entry[3])]
+    
+    def query(self, lat, lng, radius_km):
+        """
+        Find the routes starting within a radius of a point.
+        
+        Args:
+            lat (float): Latitude of the query point
+            lng (float): Longitude of the query point
+            radius_km (float): Search radius in kilometers
+            
+        Returns:
+            list: List of Route objects within the radius, in insertion order
+        """
+        center = to_unit_sphere(lat, lng)
+        
+        # Straight-line (chord) distance equivalent to the great circle radius
+        angle = min(radius_km / EARTH_RADIUS_KM, np.pi)
+        chord = 2 * np.sin(angle / 2)
+        
+        low = np.floor((center - chord) / self._cell_size).astype(np.int64)
+        high = np.floor((center + chord) / self._cell_size).astype(np.int64)
+        
+        if np.prod(high - low + 1) > len(self._cells):
+            # Very large radius: scanning the occupied cells is cheaper
+            cells = [cell for cell in self._cells
+                     if all(low[k] <= cell[k] <= high[k] for k in range(3))]
+        else:
+            cells = [cell for cell in itertools.product(*(range(low[k], high[k] + 1) for k in range(3)))
+                     if cell in self._cells]
+        
+        entries = [self._entries[route_id] for cell in cells for route_id in self._cells[cell]]
+        if not entries:
+            return []
+        
+        # Exact check on the gathered points only
+        points = np.array([entry[1] for entry in entries])
+        distances = np.linalg.norm(points - center, axis=1)
+        matches = [entry for entry, distance in zip(entries, distances) if distance <= chord * (1 + 1e-12)]
+        
+        matches.sort(key=lambda entry: entry[3])
+        return [entry[0] for entry in matches]
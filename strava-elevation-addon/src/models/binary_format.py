@@ -0,0 +1,295 @@
+"""
+Compact binary serialization for routes and route collections.
+
+Layout (little-endian, every section starts on an 8 byte boundary):
+
+    header        magic "SEMR", version u16, flags u16, route count u64,
+                  elevation / lat-lng / distance point counts u64,
+                  metadata length u64
+    distances     f8[n]
+    gains         f8[n]
+    start points  f8[n, 2]
+    end points    f8[n, 2]
+    offsets       i8[n + 1] for elevations, lat/lng points and distances
+    elevations    f4[E], or with FLAG_DELTA16 an i4[n] base per route in
+                  decimetres followed by i2[E] decimetre deltas
+    lat/lng       f8[L, 2]
+    distances     f8[D]
+    metadata      UTF-8 JSON with route IDs, names and sources
+
+Arrays are read back with numpy.frombuffer, so loading from bytes or a
+memory-mapped file does not copy the streams. Delta-encoded elevations
+are smaller but are decoded (one cumulative sum) on load.
+"""
+
+import json
+import struct
+import logging
+import numpy as np
+from models.route_collection import RouteCollection
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"SEMR"
+VERSION = 1
+
+# Elevations stored as int16 decimetre deltas from a per-route base
+FLAG_DELTA16 = 1
+
+ELEVATION_ENCODINGS = ("float32", "delta16")
+
+_HEADER = struct.Struct("<4sHHQQQQQ")
+
+
+def _pad(length):
+    """
+    Get the padding needed to round a length up to 8 bytes.
+    
+    Args:
+        length (int): Length in bytes
+    
+    Returns:
+        int: Number of padding bytes
+    """
+    return -length % 8
+
+
+def _delta16(elevations, offsets):
+    """
+    Encode elevations as int16 decimetre deltas from a per-route base.
+    
+    Args:
+        elevations (numpy.ndarray): Concatenated elevations in meters
+        offsets (numpy.ndarray): Offsets of each route's elevations
+    
+    Returns:
+        tuple: (int32 bases, int16 deltas), or None if a step does not fit in int16
+    """
+    decimetres = np.round(elevations.astype(np.float64) * 10).astype(np.int64)
+    deltas = np.diff(decimetres, prepend=0)
+    
+    # Every route starts from its own base, so its first delta is zero
+    starts = offsets[:-1][np.diff(offsets) > 0]
+    bases = np.zeros(len(offsets) - 1, dtype=np.int64)
+    bases[np.diff(offsets) > 0] = decimetres[starts]
+    deltas[starts] = 0
+    
+    if len(deltas) and (deltas.min() < -32768 or deltas.max() > 32767):
+        return None
+    if len(bases) and (bases.min() < -2 ** 31 or bases.max() >= 2 ** 31):
+        return None
+    return bases.astype('<i4'), deltas.astype('<i2')
+
+
+def _undelta16(bases, deltas, offsets):
+    """
+    Decode int16 decimetre deltas back to float32 elevations in meters.
+    
+    Args:
+        bases (numpy.ndarray): int32 base of each route in decimetres
+        deltas (numpy.ndarray): int16 deltas in decimetres
+        offsets (numpy.ndarray): Offsets of each route's elevations
+    
+    Returns:
+        numpy.ndarray: float32 elevations
+    """
+    counts = np.diff(offsets)
+    running = np.cumsum(deltas, dtype=np.int64)
+    
+    # Restart the running sum at the first point of every route
+    restart = running[offsets[:-1][counts > 0]] - bases[counts > 0]
+    decimetres = running - np.repeat(restart, counts[counts > 0])
+    return (decimetres / 10).astype(np.float32)
+
+
+def dumps_collection(collection, elevation_encoding="float32"):
+    """
+    Serialize a route collection to bytes.
+    
+    Args:
+        collection (RouteCollection): Routes to serialize
+        elevation_encoding (str): "float32", or "delta16" for int16 decimetre
+                                  deltas (lossy to 0.05 m, falls back to
+                                  float32 if a step exceeds int16)
+    
+    Returns:
+        bytes: Serialized collection
+    """
+    if elevation_encoding not in ELEVATION_ENCODINGS:
+        raise ValueError(f"Unknown elevation encoding: {elevation_encoding}. "
+                         f"Expected one of {ELEVATION_ENCODINGS}")
+    
+    flags = 0
+    elevation_sections = [collection.elevation_buffer.astype('<f4', copy=False)]
+    if elevation_encoding == "delta16":
+        encoded = _delta16(collection.elevation_buffer, collection.elevation_offsets)
+        if encoded is None:
+            logger.warning("Elevation steps too large for int16 deltas, storing float32")
+        else:
+            flags |= FLAG_DELTA16
+            elevation_sections = list(encoded)
+    
+    metadata = json.dumps({
+        'ids': collection.ids.tolist(),
+        'names': collection.names.tolist(),
+        'sources': collection.sources.tolist()
+    }).encode('utf-8')
+    
+    sections = [
+        collection.distances.astype('<f8', copy=False),
+        collection.elevation_gains.astype('<f8', copy=False),
+        collection.start_latlngs.astype('<f8', copy=False),
+        collection.end_latlngs.astype('<f8', copy=False),
+        collection.elevation_offsets.astype('<i8', copy=False),
+        collection.latlng_offsets.astype('<i8', copy=False),
+        collection.distance_offsets.astype('<i8', copy=False),
+        *elevation_sections,
+        collection.latlng_buffer.astype('<f8', copy=False),
+        collection.distance_buffer.astype('<f8', copy=False)
+    ]
+    
+    parts = [_HEADER.pack(
+        MAGIC, VERSION, flags, len(collection),
+        len(collection.elevation_buffer), len(collection.latlng_buffer),
+        len(collection.distance_buffer), len(metadata)
+    )]
+    for section in sections:
+        data = np.ascontiguousarray(section).tobytes()
+        parts.append(data)
+        parts.append(b"\0" * _pad(len(data)))
+    parts.append(metadata)
+    
+    return b"".join(parts)
+
+
+def loads_collection(buffer):
+    """
+    Load a route collection from bytes or any buffer (e.g. a memory map).
+    
+    Streams are views into buffer, except delta-encoded elevations which
+    are decoded into a new array.
+    
+    Args:
+        buffer: bytes, bytearray, memoryview or numpy.memmap
+    
+    Returns:
+        RouteCollection: The loaded collection
+    """
+    buffer = memoryview(buffer).cast('B')
+    if len(buffer) < _HEADER.size:
+        raise ValueError("Buffer too short for a route collection header")
+    
+    magic, version, flags, n, elevation_count, latlng_count, distance_count, metadata_length = \
+        _HEADER.unpack_from(buffer)
+    if magic != MAGIC:
+        raise ValueError("Not a serialized route collection")
+    if version != VERSION:
+        raise ValueError(f"Unsupported route collection version: {version}")
+    
+    position = _HEADER.size
+    
+    def read(dtype, count, width=None):
+        nonlocal position
+        dtype = np.dtype(dtype)
+        items = count * (width or 1)
+        array = np.frombuffer(buffer, dtype=dtype, count=items, offset=position)
+        position += items * dtype.itemsize
+        position += _pad(position)
+        return array if width is None else array.reshape(count, width)
+    
+    distances = read('<f8', n)
+    gains = read('<f8', n)
+    start_latlngs = read('<f8', n, 2)
+    end_latlngs = read('<f8', n, 2)
+    elevation_offsets = read('<i8', n + 1)
+    latlng_offsets = read('<i8', n + 1)
+    distance_offsets = read('<i8', n + 1)
+    
+    if flags & FLAG_DELTA16:
+        bases = read('<i4', n)
+        elevations = _undelta16(bases, read('<i2', elevation_count), elevation_offsets)
+    else:
+        elevations = read('<f4', elevation_count)
+    
+    latlng_buffer = read('<f8', latlng_count, 2)
+    distance_buffer = read('<f8', distance_count)
+    
+    metadata = json.loads(bytes(buffer[position:position + metadata_length]).decode('utf-8'))
+    
+    return RouteCollection(
+        ids=metadata['ids'],
+        names=metadata['names'],
+        sources=metadata['sources'],
+        distances=distances,
+        elevation_gains=gains,
+        start_latlngs=start_latlngs,
+        end_latlngs=end_latlngs,
+        elevation_buffer=elevations,
+        elevation_offsets=elevation_offsets,
+        latlng_buffer=latlng_buffer,
+        latlng_offsets=latlng_offsets,
+        distance_buffer=distance_buffer,
+        distance_offsets=distance_offsets
+    )
+
+
+def dumps_route(route, elevation_encoding="float32"):
+    """
+    Serialize a single route, including its streams, to bytes.
+    
+    Args:
+        route (Route): Route to serialize
+        elevation_encoding (str): "float32" or "delta16"
+    
+    Returns:
+        bytes: Serialized route
+    """
+    return dumps_collection(RouteCollection.from_routes([route]), elevation_encoding)
+
+
+def loads_route(buffer):
+    """
+    Load a single route serialized with dumps_route.
+    
+    Args:
+        buffer: bytes or any buffer
+    
+    Returns:
+        Route: The loaded route
+    """
+    collection = loads_collection(buffer)
+    if len(collection) != 1:
+        raise ValueError(f"Expected a single route, found {len(collection)}")
+    return collection[0]
+
+
+def save_collection(path, collection, elevation_encoding="float32"):
+    """
+    Write a route collection to a file.
+    
+    Args:
+        path (str): Output file path
+        collection (RouteCollection): Routes to write
+        elevation_encoding (str): "float32" or "delta16"
+    """
+    with open(path, 'wb') as f:
+        f.write(dumps_collection(collection, elevation_encoding))
+
+
+def load_collection(path, mmap=True):
+    """
+    Read a route collection from a file.
+    
+    Args:
+        path (str): File path
+        mmap (bool): Memory-map the file instead of reading it, so streams
+                     are paged in from disk as they are used
+    
+    Returns:
+        RouteCollection: The loaded collection
+    """
+    if mmap:
+        return loads_collection(np.memmap(path, dtype=np.uint8, mode='r'))
+    
+    with open(path, 'rb') as f:
+        return loads_collection(f.read())
@@ -0,0 +1,86 @@
+"""
+Google encoded polyline decoding and encoding with NumPy.
+
+Strava returns route and activity geometry as encoded polylines in
+map.summary_polyline (list and detail responses) and map.polyline
+(detail responses only).
+"""
+
+import numpy as np
+
+# Coordinates are stored with 5 decimal places
+DEFAULT_PRECISION = 5
+
+# Enough 5-bit chunks for any zigzag encoded 32-bit value
+_MAX_CHUNKS = 7
+
+
+def decode(encoded, precision=DEFAULT_PRECISION):
+    """
+    Decode a Google encoded polyline.
+    
+    All characters are processed in vectorized steps: 5-bit chunks are
+    shifted into place and summed per value, zigzag-decoded, and the
+    deltas accumulated per coordinate.
+    
+    Args:
+        encoded (str): Encoded polyline
+        precision (int): Number of decimal places encoded
+    
+    Returns:
+        numpy.ndarray: (n, 2) float64 array of [lat, lng] points
+    """
+    if not encoded:
+        return np.empty((0, 2), dtype=np.float64)
+    
+    chunks = np.frombuffer(encoded.encode('ascii'), dtype=np.uint8).astype(np.int64) - 63
+    if chunks.min() < 0 or chunks.max() > 63:
+        raise ValueError("Invalid character in encoded polyline")
+    
+    # A chunk without the continuation bit ends a value
+    ends = np.flatnonzero((chunks & 0x20) == 0)
+    if len(ends) == 0 or ends[-1] != len(chunks) - 1 or len(ends) % 2:
+        raise ValueError("Truncated encoded polyline")
+    
+    starts = np.concatenate(([0], ends[:-1] + 1))
+    shift = 5 * (np.arange(len(chunks)) - np.repeat(starts, ends - starts + 1))
+    values = np.add.reduceat((chunks & 0x1f) << shift, starts)
+    
+    # Zigzag decoding: the lowest bit holds the sign
+    deltas = np.where(values & 1, ~(values >> 1), values >> 1)
+    
+    return np.cumsum(deltas.reshape(-1, 2), axis=0) / 10.0 ** precision
+
+
+def encode(latlng_points, precision=DEFAULT_PRECISION):
+    """
+    Encode [lat, lng] points as a Google encoded polyline.
+    
+    Args:
+        latlng_points (list): List of [lat, lng] points
+        precision (int): Number of decimal places to encode
+    
+    Returns:
+        str: Encoded polyline
+    """
+    coords = np.asarray(latlng_points, dtype=np.float64).reshape(-1, 2)
+    if len(coords) == 0:
+        return ""
+    
+    scaled = np.round(coords * 10 ** precision).astype(np.int64)
+    deltas = np.diff(scaled, axis=0, prepend=0).ravel()
+    
+    # Zigzag encoding: the lowest bit holds the sign
+    values = np.where(deltas < 0, ~(deltas << 1), deltas << 1)
+    
+    # Split every value into 5-bit chunks, least significant first
+    positions = np.arange(_MAX_CHUNKS)
+    groups = (values[:, None] >> (5 * positions)) & 0x1f
+    lengths = np.maximum(1, _MAX_CHUNKS - np.argmax((groups != 0)[:, ::-1], axis=1))
+    lengths[(groups == 0).all(axis=1)] = 1
+    
+    used = positions < lengths[:, None]
+    continued = positions < lengths[:, None] - 1
+    characters = (groups | np.where(continued, 0x20, 0)) + 63
+    
+    return characters[used].astype(np.uint8).tobytes().decode('ascii')
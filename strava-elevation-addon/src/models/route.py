@@ -2,15 +2,107 @@
 Route model for storing route information and elevation data.
 """
 
+import logging
+import numpy as np
+from models.simplification import EARTH_RADIUS_M, simplify_indices
+from models import polyline
+from elevation import processing
+
+logger = logging.getLogger(__name__)
+
+
+def cumulative_distance(latlng_points):
+    """
+    Calculate the cumulative great circle distance along a list of points.
+    
+    Args:
+        latlng_points (list): List of [lat, lng] points
+        
+    Returns:
+        numpy.ndarray: Distance in meters from the first point to each point
+    """
+    coords = np.radians(np.asarray(latlng_points, dtype=np.float64))
+    lat, lng = coords[:, 0], coords[:, 1]
+    
+    # Haversine formula between consecutive points
+    dlat = np.diff(lat)
+    dlng = np.diff(lng)
+    a = np.sin(dlat / 2) ** 2 + np.cos(lat[:-1]) * np.cos(lat[1:]) * np.sin(dlng / 2) ** 2
+    steps = 2 * EARTH_RADIUS_M * np.arcsin(np.sqrt(np.clip(a, 0, 1)))
+    
+    return np.concatenate(([0.0], np.cumsum(steps)))
+
+
+def as_stream(values, dtype, width=None):
+    """
+    Convert a stream of points to a contiguous NumPy array.
+    
+    Accepts plain lists, arrays, or Strava stream objects (dicts with a
+    'data' key).
+    
+    Args:
+        values: Stream values, or None for an empty stream
+        dtype: NumPy dtype of the result
+        width (int): Number of columns per point, or None for a flat stream
+        
+    Returns:
+        numpy.ndarray: Contiguous array of shape (n,) or (n, width)
+    """
+    if isinstance(values, dict):
+        values = values.get('data')
+    
+    shape = (-1,) if width is None else (-1, width)
+    if values is None or len(values) == 0:
+        return np.empty((0,) + shape[1:], dtype=dtype)
+    
+    return np.ascontiguousarray(np.asarray(values, dtype=dtype).reshape(shape))
+
+
+def map_latlng_points(data):
+    """
+    Decode the geometry of a Strava activity or route from its map.
+    
+    Prefers the full resolution map.polyline (detail responses) over
+    map.summary_polyline (list and detail responses).
+    
+    Args:
+        data (dict): Activity or route data from the Strava API
+        
+    Returns:
+        numpy.ndarray: (n, 2) array of [lat, lng] points (empty if there is no map)
+    """
+    strava_map = data.get('map') or {}
+    encoded = strava_map.get('polyline') or strava_map.get('summary_polyline')
+    
+    try:
+        return polyline.decode(encoded)
+    except ValueError as e:
+        logger.warning(f"Ignoring invalid polyline for {data.get('id')}: {e}")
+        return np.empty((0, 2), dtype=np.float64)
+
+
 class Route:
     """
     Represents a route with elevation data.
     Can be created from Strava API data or local sources.
+    
+    Streams are stored as contiguous NumPy arrays: elevations as float32,
+    lat/lng points as an (n, 2) float64 array and distances as float64.
     """
     
+    __slots__ = ('id', 'name', 'distance', 'elevation_gain', 'start_latlng',
+                 'end_latlng', 'source', '_elevation_points', '_latlng_points',
+                 '_distance_points', '_derived')
+    
+    # Default number of points in a resampled elevation profile
+    DEFAULT_PROFILE_POINTS = 256
+    
+    # Default spacing in meters between points of the simplified geometry
+    DEFAULT_GEOMETRY_SPACING_M = 200
+    
     def __init__(self, id=None, name=None, distance=None, elevation_gain=None, 
                  start_latlng=None, end_latlng=None, elevation_points=None, 
-                 latlng_points=None, source="unknown"):
+                 latlng_points=None, source="unknown", distance_points=None):
         """
         Initialize a route object.
         
@@ -24,6 +116,7 @@ class Route:
             elevation_points (list): List of elevation points along the route
             latlng_points (list): List of (lat, lng) points along the route
             source (str): Source of the route data (e.g., "strava", "local")
+            distance_points (list): Cumulative distance in meters at each point
         """
         self.id = id
         self.name = name
@@ -31,9 +124,44 @@ class Route:
         self.elevation_gain = elevation_gain
         self.start_latlng = start_latlng
         self.end_latlng = end_latlng
-        self.elevation_points = elevation_points or []
-        self.latlng_points = latlng_points or []
         self.source = source
+        
+        # Derived data (stats, profiles, geometry) cached until a stream changes
+        self._derived = {}
+        
+        self.elevation_points = elevation_points
+        self.latlng_points = latlng_points
+        self.distance_points = distance_points
+    
+    @property
+    def elevation_points(self):
+        """numpy.ndarray: float32 elevations in meters along the route."""
+        return self._elevation_points
+    
+    @elevation_points.setter
+    def elevation_points(self, values):
+        self._elevation_points = as_stream(values, np.float32)
+        self._derived = {}
+    
+    @property
+    def latlng_points(self):
+        """numpy.ndarray: (n, 2) float64 array of [lat, lng] points along the route."""
+        return self._latlng_points
+    
+    @latlng_points.setter
+    def latlng_points(self, values):
+        self._latlng_points = as_stream(values, np.float64, width=2)
+        self._derived = {}
+    
+    @property
+    def distance_points(self):
+        """numpy.ndarray: float64 cumulative distance in meters at each point."""
+        return self._distance_points
+    
+    @distance_points.setter
+    def distance_points(self, values):
+        self._distance_points = as_stream(values, np.float64)
+        self._derived = {}
     
     @classmethod
     def from_dict(cls, data):
@@ -55,7 +183,8 @@ class Route:
             end_latlng=data.get('end_latlng'),
             elevation_points=data.get('elevation_points'),
             latlng_points=data.get('latlng_points'),
-            source=data.get('source', 'unknown')
+            source=data.get('source', 'unknown'),
+            distance_points=data.get('distance_points')
         )
         
     @classmethod
@@ -79,6 +208,12 @@ class Route:
         start_latlng = tuple(activity_data.get('start_latlng', [None, None]))
         end_latlng = tuple(activity_data.get('end_latlng', [None, None]))
         
+        # Geometry from the encoded map, so no stream request is needed
+        latlng_points = map_latlng_points(activity_data)
+        if len(latlng_points) and not (start_latlng and start_latlng[0] is not None):
+            start_latlng = tuple(latlng_points[0].tolist())
+            end_latlng = tuple(latlng_points[-1].tolist())
+        
         # Create the route object
         route = cls(
             id=route_id,
@@ -87,6 +222,7 @@ class Route:
             elevation_gain=elevation_gain,
             start_latlng=start_latlng,
             end_latlng=end_latlng,
+            latlng_points=latlng_points,
             source="strava"
         )
         
@@ -120,6 +256,12 @@ class Route:
             start_latlng = (first_segment.get('start_latitude'), first_segment.get('start_longitude'))
             end_latlng = (last_segment.get('end_latitude'), last_segment.get('end_longitude'))
         
+        # Geometry from the encoded map, so no stream request is needed
+        latlng_points = map_latlng_points(route_data)
+        if len(latlng_points) and start_latlng is None:
+            start_latlng = tuple(latlng_points[0].tolist())
+            end_latlng = tuple(latlng_points[-1].tolist())
+        
         # Create the route object
         route = cls(
             id=route_id,
@@ -128,6 +270,7 @@ class Route:
             elevation_gain=elevation_gain,
             start_latlng=start_latlng,
             end_latlng=end_latlng,
+            latlng_points=latlng_points,
             source="strava"
         )
         
@@ -138,7 +281,7 @@ class Route:
         Add elevation data from a Strava stream.
         
         Args:
-            elevation_stream (list): List of elevation points
+            elevation_stream (list): List of elevation points or a Strava stream object
         """
         self.elevation_points = elevation_stream
     
@@ -147,16 +290,26 @@ class Route:
         Add lat/lng data from a Strava stream.
         
         Args:
-            latlng_stream (list): List of [lat, lng] points
+            latlng_stream (list): List of [lat, lng] points or a Strava stream object
         """
         self.latlng_points = latlng_stream
     
+    def add_distance_stream(self, distance_stream):
+        """
+        Add cumulative distance data from a Strava stream.
+        
+        Args:
+            distance_stream (list): List of distances in meters from the start
+                or a Strava stream object
+        """
+        self.distance_points = distance_stream
+    
     def get_elevation_profile(self):
         """
         Get the elevation profile of the route.
         
         Returns:
-            list: List of elevation points
+            numpy.ndarray: float32 array of elevation points
         """
         return self.elevation_points
     
@@ -164,10 +317,16 @@ class Route:
         """
         Get a normalized elevation profile (0-100% of distance).
         
+        The profile is cached until a stream changes.
+        
         Returns:
             list: List of (distance_percent, elevation) tuples
         """
-        if not self.elevation_points or not self.distance:
+        key = ('normalized_profile',)
+        if key in self._derived:
+            return self._derived[key]
+        
+        if not len(self.elevation_points) or not self.distance:
             return []
         
         # Create distance points based on even distribution
@@ -175,34 +334,211 @@ class Route:
         distance_step = 1.0 / (num_points - 1) if num_points > 1 else 0
         
         # Create normalized profile
-        normalized_profile = []
-        for i, elevation in enumerate(self.elevation_points):
-            distance_percent = i * distance_step
-            normalized_profile.append((distance_percent, elevation))
+        percents = np.arange(num_points) * distance_step
+        normalized_profile = list(zip(percents.tolist(), self.elevation_points.tolist()))
         
+        self._derived[key] = normalized_profile
         return normalized_profile
     
+    def get_normalized_elevations(self):
+        """
+        Get the elevations of the normalized elevation profile as an array.
+        
+        Returns:
+            numpy.ndarray: float32 elevations (empty if the route has no distance)
+        """
+        if not self.distance:
+            return np.empty(0, dtype=np.float32)
+        return self.elevation_points
+    
+    def get_point_distances(self):
+        """
+        Get the distance along the route of every elevation point.
+        
+        Uses the Strava distance stream when available, otherwise the
+        great circle distance along the lat/lng stream.
+        
+        Returns:
+            numpy.ndarray: Distances in meters, or None if no matching stream exists
+        """
+        num_points = len(self.elevation_points)
+        
+        if len(self.distance_points) == num_points:
+            return self.distance_points
+        
+        if len(self.latlng_points) == num_points:
+            return cumulative_distance(self.latlng_points)
+        
+        return None
+    
+    def get_resampled_elevation_profile(self, num_points=DEFAULT_PROFILE_POINTS):
+        """
+        Get the elevation profile resampled to points evenly spaced by distance.
+        
+        The result is cached until a stream is replaced with one of the
+        add_*_stream methods.
+        
+        Args:
+            num_points (int): Number of points in the resampled profile
+            
+        Returns:
+            numpy.ndarray: float32 array of num_points elevations (empty if no elevation data)
+        """
+        key = ('resampled_profile', num_points)
+        if key in self._derived:
+            return self._derived[key]
+        
+        if not len(self.elevation_points):
+            return np.empty(0, dtype=np.float32)
+        
+        elevations = self.elevation_points.astype(np.float64)
+        distances = self.get_point_distances()
+        
+        # Fall back to even spacing by index without a usable distance axis
+        if distances is None or distances[-1] <= 0:
+            distances = np.arange(len(elevations), dtype=np.float64)
+        
+        targets = np.linspace(distances[0], distances[-1], num_points)
+        profile = np.interp(targets, distances, elevations).astype(np.float32)
+        
+        self._derived[key] = profile
+        return profile
+    
+    def get_simplified_latlng(self, spacing_m=DEFAULT_GEOMETRY_SPACING_M):
+        """
+        Get the route geometry as points roughly spacing_m apart along the route.
+        
+        The simplified line stays within about spacing_m / 2 of the full
+        stream. Routes without a lat/lng stream fall back to their start and
+        end points. The result is cached until a stream is replaced.
+        
+        Args:
+            spacing_m (float): Distance in meters between kept points
+            
+        Returns:
+            numpy.ndarray: (k, 2) array of [lat, lng] points (empty if no location data)
+        """
+        key = ('simplified_latlng', spacing_m)
+        if key in self._derived:
+            return self._derived[key]
+        
+        if len(self.latlng_points):
+            points = self.latlng_points
+            distances = cumulative_distance(points)
+            
+            # First point at or after every multiple of the spacing, plus the end
+            marks = np.arange(0, distances[-1], spacing_m) if distances[-1] > 0 else np.zeros(1)
+            keep = np.unique(np.append(np.searchsorted(distances, marks), len(points) - 1))
+            geometry = points[keep]
+        else:
+            ends = [p for p in (self.start_latlng, self.end_latlng)
+                    if p and len(p) == 2 and p[0] is not None and p[1] is not None]
+            geometry = np.asarray(ends, dtype=np.float64).reshape(-1, 2)
+        
+        self._derived[key] = geometry
+        return geometry
+    
+    def get_simplification_indices(self, tolerance_m, method="douglas-peucker"):
+        """
+        Get the indices of the lat/lng points kept when simplifying the route.
+        
+        The result is cached until a stream is replaced.
+        
+        Args:
+            tolerance_m (float): Tolerance in meters
+            method (str): "douglas-peucker" or "visvalingam-whyatt"
+            
+        Returns:
+            numpy.ndarray: Sorted indices into latlng_points
+        """
+        key = ('simplification', tolerance_m, method)
+        if key not in self._derived:
+            self._derived[key] = simplify_indices(self.latlng_points, tolerance_m, method)
+        return self._derived[key]
+    
+    def simplify(self, tolerance_m, method="douglas-peucker"):
+        """
+        Get a copy of the route with near-duplicate GPS points removed.
+        
+        Streams with one value per lat/lng point are reduced to the kept
+        points; other streams are copied unchanged.
+        
+        Args:
+            tolerance_m (float): Tolerance in meters
+            method (str): "douglas-peucker" or "visvalingam-whyatt"
+            
+        Returns:
+            Route: Simplified route
+        """
+        indices = self.get_simplification_indices(tolerance_m, method)
+        num_points = len(self.latlng_points)
+        
+        def reduce(stream):
+            return stream[indices] if len(stream) == num_points else stream
+        
+        return Route(
+            id=self.id,
+            name=self.name,
+            distance=self.distance,
+            elevation_gain=self.elevation_gain,
+            start_latlng=self.start_latlng,
+            end_latlng=self.end_latlng,
+            elevation_points=reduce(self.elevation_points),
+            latlng_points=self.latlng_points[indices],
+            source=self.source,
+            distance_points=reduce(self.distance_points)
+        )
+    
+    def get_bounding_box(self):
+        """
+        Get the bounding box of the route geometry.
+        
+        Returns:
+            tuple: (min_lat, min_lng, max_lat, max_lng), or None if no location data
+        """
+        key = ('bounding_box',)
+        if key not in self._derived:
+            if len(self.latlng_points):
+                points = self.latlng_points
+            else:
+                points = self.get_simplified_latlng()
+            
+            if len(points):
+                box = (*points.min(axis=0), *points.max(axis=0))
+                self._derived[key] = tuple(float(v) for v in box)
+            else:
+                self._derived[key] = None
+        
+        return self._derived[key]
+    
     def get_elevation_stats(self):
         """
         Calculate elevation statistics for the route.
         
+        Without a summary elevation gain (e.g. for elevations fetched from an
+        elevation API), the gain is computed from the smoothed elevation
+        stream. The values are cached until the elevation stream changes.
+        
         Returns:
             dict: Dictionary with elevation statistics
         """
-        if not self.elevation_points:
-            return {
-                "gain": self.elevation_gain,
-                "max": None,
-                "min": None,
-                "avg": None
-            }
+        key = ('elevation_stats',)
+        if key not in self._derived:
+            if not len(self.elevation_points):
+                self._derived[key] = {"gain": None, "max": None, "min": None, "avg": None}
+            else:
+                elevations = self.elevation_points
+                self._derived[key] = {
+                    "gain": processing.gain_loss(processing.smooth(elevations))[0],
+                    "max": float(elevations.max()),
+                    "min": float(elevations.min()),
+                    "avg": float(elevations.mean(dtype=np.float64))
+                }
         
-        return {
-            "gain": self.elevation_gain,
-            "max": max(self.elevation_points),
-            "min": min(self.elevation_points),
-            "avg": sum(self.elevation_points) / len(self.elevation_points)
-        }
+        stats = dict(self._derived[key])
+        if self.elevation_gain is not None:
+            stats["gain"] = self.elevation_gain
+        return stats
     
     def to_dict(self):
         """
@@ -0,0 +1,394 @@
+"""
+Columnar storage for a corpus of routes.
+"""
+
+import numpy as np
+from models.route import Route, EARTH_RADIUS_M
+
+
+def _offsets(counts):
+    """
+    Build an offsets array from per-route stream lengths.
+    
+    Args:
+        counts (list): Number of points in each route's stream
+    
+    Returns:
+        numpy.ndarray: int64 array of len(counts) + 1 offsets into a buffer
+    """
+    return np.concatenate(([0], np.cumsum(counts, dtype=np.int64))).astype(np.int64)
+
+
+def _latlng_column(points):
+    """
+    Convert optional (lat, lng) pairs to an (n, 2) array with NaN for missing points.
+    
+    Args:
+        points (list): List of (lat, lng) pairs or None
+    
+    Returns:
+        numpy.ndarray: (n, 2) float64 array
+    """
+    column = np.full((len(points), 2), np.nan)
+    for i, point in enumerate(points):
+        if point and len(point) == 2 and point[0] is not None and point[1] is not None:
+            column[i] = point
+    return column
+
+
+def _gather(buffer, offsets, indices):
+    """
+    Gather the segments of a concatenated buffer belonging to some routes.
+    
+    Args:
+        buffer (numpy.ndarray): Concatenated stream buffer
+        offsets (numpy.ndarray): Offsets of each route's segment in buffer
+        indices (numpy.ndarray): Routes to keep, in order
+    
+    Returns:
+        tuple: (new buffer, new offsets)
+    """
+    counts = offsets[indices + 1] - offsets[indices]
+    new_offsets = _offsets(counts)
+    
+    # Source position of every kept point, without a Python loop over routes
+    positions = np.repeat(offsets[indices] - new_offsets[:-1], counts) + np.arange(new_offsets[-1])
+    return buffer[positions], new_offsets
+
+
+class RouteCollection:
+    """
+    Struct-of-arrays storage for many routes.
+    
+    Scalar fields (IDs, distances, elevation gains, start/end coordinates)
+    are held in parallel NumPy arrays so filters run as vectorized masks.
+    Each stream is stored as one concatenated buffer plus an offsets array;
+    route i's elevations are elevation_buffer[elevation_offsets[i]:elevation_offsets[i + 1]].
+    
+    Indexing with an integer returns a Route whose streams are views into
+    the buffers (no copy). Routes are built on first access and reused, so
+    their cached profiles survive between searches. Indexing with a slice,
+    boolean mask or index array returns a new RouteCollection.
+    """
+    
+    def __init__(self, ids, names=None, sources=None, distances=None, elevation_gains=None,
+                 start_latlngs=None, end_latlngs=None, elevation_buffer=None, elevation_offsets=None,
+                 latlng_buffer=None, latlng_offsets=None, distance_buffer=None, distance_offsets=None):
+        """
+        Initialize a collection from column arrays.
+        
+        Args:
+            ids (list): Route IDs
+            names (list): Route names
+            sources (list): Route sources
+            distances (numpy.ndarray): Distances in meters (NaN if unknown)
+            elevation_gains (numpy.ndarray): Elevation gains in meters (NaN if unknown)
+            start_latlngs (numpy.ndarray): (n, 2) start coordinates (NaN if unknown)
+            end_latlngs (numpy.ndarray): (n, 2) end coordinates (NaN if unknown)
+            elevation_buffer (numpy.ndarray): Concatenated float32 elevations
+            elevation_offsets (numpy.ndarray): n + 1 offsets into elevation_buffer
+            latlng_buffer (numpy.ndarray): Concatenated (k, 2) float64 lat/lng points
+            latlng_offsets (numpy.ndarray): n + 1 offsets into latlng_buffer
+            distance_buffer (numpy.ndarray): Concatenated float64 cumulative distances
+            distance_offsets (numpy.ndarray): n + 1 offsets into distance_buffer
+        """
+        n = len(ids)
+        empty_offsets = np.zeros(n + 1, dtype=np.int64)
+        
+        self.ids = np.asarray(ids, dtype=object)
+        self.names = np.asarray(names if names is not None else [None] * n, dtype=object)
+        self.sources = np.asarray(sources if sources is not None else ["unknown"] * n, dtype=object)
+        self.distances = np.full(n, np.nan) if distances is None else np.asarray(distances, dtype=np.float64)
+        self.elevation_gains = (np.full(n, np.nan) if elevation_gains is None
+                                else np.asarray(elevation_gains, dtype=np.float64))
+        self.start_latlngs = (np.full((n, 2), np.nan) if start_latlngs is None
+                              else np.asarray(start_latlngs, dtype=np.float64).reshape(n, 2))
+        self.end_latlngs = (np.full((n, 2), np.nan) if end_latlngs is None
+                            else np.asarray(end_latlngs, dtype=np.float64).reshape(n, 2))
+        
+        self.elevation_buffer = (np.empty(0, dtype=np.float32) if elevation_buffer is None
+                                 else np.asarray(elevation_buffer, dtype=np.float32))
+        self.elevation_offsets = empty_offsets if elevation_offsets is None else np.asarray(elevation_offsets, dtype=np.int64)
+        self.latlng_buffer = (np.empty((0, 2), dtype=np.float64) if latlng_buffer is None
+                              else np.asarray(latlng_buffer, dtype=np.float64).reshape(-1, 2))
+        self.latlng_offsets = empty_offsets if latlng_offsets is None else np.asarray(latlng_offsets, dtype=np.int64)
+        self.distance_buffer = (np.empty(0, dtype=np.float64) if distance_buffer is None
+                                else np.asarray(distance_buffer, dtype=np.float64))
+        self.distance_offsets = empty_offsets if distance_offsets is None else np.asarray(distance_offsets, dtype=np.int64)
+        
+        for name in ('elevation', 'latlng', 'distance'):
+            offsets = getattr(self, f'{name}_offsets')
+            if len(offsets) != n + 1 or offsets[-1] != len(getattr(self, f'{name}_buffer')):
+                raise ValueError(f"{name} offsets do not match the buffer or the number of routes")
+        
+        # Route objects built on first access
+        self._routes = [None] * n
+    
+    @classmethod
+    def from_routes(cls, routes):
+        """
+        Build a collection from a list of Route objects.
+        
+        Args:
+            routes (list): List of Route objects
+        
+        Returns:
+            RouteCollection: A new collection holding copies of the route data
+        """
+        routes = list(routes)
+        
+        def concat(streams, dtype, shape):
+            if not streams:
+                return np.empty(shape, dtype=dtype)
+            return np.concatenate(streams).astype(dtype, copy=False)
+        
+        return cls(
+            ids=[route.id for route in routes],
+            names=[route.name for route in routes],
+            sources=[route.source for route in routes],
+            distances=[np.nan if route.distance is None else route.distance for route in routes],
+            elevation_gains=[np.nan if route.elevation_gain is None else route.elevation_gain for route in routes],
+            start_latlngs=_latlng_column([route.start_latlng for route in routes]),
+            end_latlngs=_latlng_column([route.end_latlng for route in routes]),
+            elevation_buffer=concat([route.elevation_points for route in routes], np.float32, 0),
+            elevation_offsets=_offsets([len(route.elevation_points) for route in routes]),
+            latlng_buffer=concat([route.latlng_points for route in routes], np.float64, (0, 2)),
+            latlng_offsets=_offsets([len(route.latlng_points) for route in routes]),
+            distance_buffer=concat([route.distance_points for route in routes], np.float64, 0),
+            distance_offsets=_offsets([len(route.distance_points) for route in routes])
+        )
+    
+    def __len__(self):
+        return len(self.ids)
+    
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self.route(i)
+    
+    def __getitem__(self, key):
+        if isinstance(key, (int, np.integer)):
+            if key < 0:
+                key += len(self)
+            if not 0 <= key < len(self):
+                raise IndexError("route index out of range")
+            return self.route(key)
+        return self.select(key)
+    
+    def elevation_view(self, i):
+        """
+        Get route i's elevations as a view into the elevation buffer.
+        
+        Args:
+            i (int): Route index
+        
+        Returns:
+            numpy.ndarray: float32 elevations
+        """
+        return self.elevation_buffer[self.elevation_offsets[i]:self.elevation_offsets[i + 1]]
+    
+    def latlng_view(self, i):
+        """
+        Get route i's lat/lng points as a view into the lat/lng buffer.
+        
+        Args:
+            i (int): Route index
+        
+        Returns:
+            numpy.ndarray: (k, 2) float64 lat/lng points
+        """
+        return self.latlng_buffer[self.latlng_offsets[i]:self.latlng_offsets[i + 1]]
+    
+    def distance_view(self, i):
+        """
+        Get route i's cumulative distances as a view into the distance buffer.
+        
+        Args:
+            i (int): Route index
+        
+        Returns:
+            numpy.ndarray: float64 distances in meters
+        """
+        return self.distance_buffer[self.distance_offsets[i]:self.distance_offsets[i + 1]]
+    
+    def route(self, i):
+        """
+        Get route i as a Route whose streams are views into the buffers.
+        
+        Args:
+            i (int): Route index
+        
+        Returns:
+            Route: The route (the same object on every call)
+        """
+        if self._routes[i] is None:
+            def latlng(point):
+                return None if np.isnan(point).any() else (float(point[0]), float(point[1]))
+            
+            def scalar(value):
+                return None if np.isnan(value) else float(value)
+            
+            self._routes[i] = Route(
+                id=self.ids[i],
+                name=self.names[i],
+                distance=scalar(self.distances[i]),
+                elevation_gain=scalar(self.elevation_gains[i]),
+                start_latlng=latlng(self.start_latlngs[i]),
+                end_latlng=latlng(self.end_latlngs[i]),
+                elevation_points=self.elevation_view(i),
+                latlng_points=self.latlng_view(i),
+                source=self.sources[i],
+                distance_points=self.distance_view(i)
+            )
+        return self._routes[i]
+    
+    def to_routes(self):
+        """
+        Get every route in the collection.
+        
+        Returns:
+            list: List of Route objects
+        """
+        return list(self)
+    
+    def select(self, key):
+        """
+        Build a new collection from a subset of the routes.
+        
+        Args:
+            key: Boolean mask, array of indices or slice
+        
+        Returns:
+            RouteCollection: Collection with the selected routes, in order
+        """
+        indices = np.arange(len(self))[key]
+        indices = np.asarray(indices, dtype=np.int64).reshape(-1)
+        
+        elevation_buffer, elevation_offsets = _gather(self.elevation_buffer, self.elevation_offsets, indices)
+        latlng_buffer, latlng_offsets = _gather(self.latlng_buffer, self.latlng_offsets, indices)
+        distance_buffer, distance_offsets = _gather(self.distance_buffer, self.distance_offsets, indices)
+        
+        return RouteCollection(
+            ids=self.ids[indices],
+            names=self.names[indices],
+            sources=self.sources[indices],
+            distances=self.distances[indices],
+            elevation_gains=self.elevation_gains[indices],
+            start_latlngs=self.start_latlngs[indices],
+            end_latlngs=self.end_latlngs[indices],
+            elevation_buffer=elevation_buffer,
+            elevation_offsets=elevation_offsets,
+            latlng_buffer=latlng_buffer,
+            latlng_offsets=latlng_offsets,
+            distance_buffer=distance_buffer,
+            distance_offsets=distance_offsets
+        )
+    
+    def elevation_counts(self):
+        """
+        Get the number of elevation points of every route.
+        
+        Returns:
+            numpy.ndarray: int64 point counts
+        """
+        return np.diff(self.elevation_offsets)
+    
+    def has_elevation(self):
+        """
+        Get a mask of the routes with elevation data.
+        
+        Returns:
+            numpy.ndarray: Boolean mask
+        """
+        return self.elevation_counts() > 0
+    
+    def distance_between(self, min_distance=None, max_distance=None):
+        """
+        Get a mask of the routes whose distance lies in a range.
+        
+        Args:
+            min_distance (float): Minimum distance in meters (None for no limit)
+            max_distance (float): Maximum distance in meters (None for no limit)
+        
+        Returns:
+            numpy.ndarray: Boolean mask (routes with unknown distance are excluded
+                           when a limit is given)
+        """
+        return self._between(self.distances, min_distance, max_distance)
+    
+    def gain_between(self, min_gain=None, max_gain=None):
+        """
+        Get a mask of the routes whose elevation gain lies in a range.
+        
+        Args:
+            min_gain (float): Minimum elevation gain in meters (None for no limit)
+            max_gain (float): Maximum elevation gain in meters (None for no limit)
+        
+        Returns:
+            numpy.ndarray: Boolean mask (routes with unknown gain are excluded
+                           when a limit is given)
+        """
+        return self._between(self.elevation_gains, min_gain, max_gain)
+    
+    def starts_within(self, lat, lng, radius_km):
+        """
+        Get a mask of the routes starting within a radius of a point.
+        
+        Args:
+            lat (float): Latitude in degrees
+            lng (float): Longitude in degrees
+            radius_km (float): Search radius in kilometers
+        
+        Returns:
+            numpy.ndarray: Boolean mask (routes without a start point are excluded)
+        """
+        lat1, lng1 = np.radians(lat), np.radians(lng)
+        lat2, lng2 = np.radians(self.start_latlngs[:, 0]), np.radians(self.start_latlngs[:, 1])
+        
+        a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lng2 - lng1) / 2) ** 2
+        distances_km = 2 * np.arcsin(np.sqrt(np.clip(a, 0, 1))) * EARTH_RADIUS_M / 1000
+        
+        # NaN start points compare False
+        return distances_km <= radius_km
+    
+    def filter(self, min_distance=None, max_distance=None, min_gain=None, max_gain=None,
+               near=None, radius_km=None, require_elevation=False):
+        """
+        Select the routes matching all of the given criteria.
+        
+        Args:
+            min_distance (float): Minimum distance in meters
+            max_distance (float): Maximum distance in meters
+            min_gain (float): Minimum elevation gain in meters
+            max_gain (float): Maximum elevation gain in meters
+            near (tuple): (lat, lng) the route must start near
+            radius_km (float): Radius around near in kilometers
+            require_elevation (bool): Only keep routes with elevation data
+        
+        Returns:
+            RouteCollection: Collection with the matching routes
+        """
+        mask = self.distance_between(min_distance, max_distance) & self.gain_between(min_gain, max_gain)
+        if near is not None and radius_km is not None:
+            mask &= self.starts_within(near[0], near[1], radius_km)
+        if require_elevation:
+            mask &= self.has_elevation()
+        return self.select(mask)
+    
+    def _between(self, values, low, high):
+        """
+        Get a mask of values within an inclusive range.
+        
+        Args:
+            values (numpy.ndarray): Values to test
+            low (float): Lower limit (None for no limit)
+            high (float): Upper limit (None for no limit)
+        
+        Returns:
+            numpy.ndarray: Boolean mask
+        """
+        mask = np.ones(len(values), dtype=bool)
+        if low is not None:
+            mask &= values >= low
+        if high is not None:
+            mask &= values <= high
+        return mask
@@ -0,0 +1,399 @@
+"""
+On-disk route store shared between processes through memory-mapped files.
+"""
+
+import os
+import json
+import logging
+import tempfile
+import threading
+import numpy as np
+from models.route import Route
+
+try:
+    import fcntl
+except ImportError:  # Windows: writers are only serialized within a process
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+
+class RouteStore:
+    """
+    Read-mostly store of fully populated routes in a directory.
+    
+    Streams of every route are appended to one data file as 8 byte aligned
+    little-endian arrays (float32 elevations, float64 lat/lng points and
+    distances). A JSON index maps each key to the route's metadata and the
+    location of its streams, and is replaced atomically with os.replace
+    after the data it refers to has been flushed. Readers memory-map the
+    data file, so every process on a host (e.g. gunicorn workers) shares one
+    copy through the page cache, and routes returned by get are views into
+    that mapping. Writers take a file lock, so appends from several
+    processes are serialized.
+    
+    The store supports the dict operations used for StravaElevationMatcher's
+    route cache (in, [], []=, del, len).
+    """
+    
+    INDEX_FILE = "index.json"
+    LOCK_FILE = "store.lock"
+    
+    def __init__(self, path):
+        """
+        Open (or create) a route store.
+        
+        Args:
+            path (str): Directory holding the store files
+        """
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+        
+        self._lock = threading.RLock()
+        self._index = {'generation': 0, 'data_file': None, 'data_size': 0, 'routes': {}}
+        self._index_stat = None
+        self._data = None
+        self._mapped = (None, 0)
+        
+        # Key -> (entry, Route) for routes built from the current mapping
+        self._routes = {}
+        
+        self.refresh()
+    
+    def __len__(self):
+        self.refresh()
+        return len(self._index['routes'])
+    
+    def __contains__(self, key):
+        self.refresh()
+        return str(key) in self._index['routes']
+    
+    def __getitem__(self, key):
+        route = self.get(key)
+        if route is None:
+            raise KeyError(key)
+        return route
+    
+    def __setitem__(self, key, route):
+        self.put(key, route)
+    
+    def __delitem__(self, key):
+        if not self.remove(key):
+            raise KeyError(key)
+    
+    def keys(self):
+        """
+        Get the keys of all stored routes.
+        
+        Returns:
+            list: Route keys
+        """
+        self.refresh()
+        return list(self._index['routes'])
+    
+    def get(self, key, default=None):
+        """
+        Get a stored route.
+        
+        Args:
+            key: Route key
+            default: Value returned when the key is not stored
+        
+        Returns:
+            Route: Route whose streams are views into the shared mapping
+        """
+        self.refresh()
+        key = str(key)
+        
+        with self._lock:
+            entry = self._index['routes'].get(key)
+            if entry is None:
+                return default
+            
+            cached = self._routes.get(key)
+            if cached is not None and cached[0] == entry:
+                return cached[1]
+            
+            route = Route(
+                id=entry['id'],
+                name=entry['name'],
+                distance=entry['distance'],
+                elevation_gain=entry['elevation_gain'],
+                start_latlng=tuple(entry['start_latlng']) if entry['start_latlng'] else None,
+                end_latlng=tuple(entry['end_latlng']) if entry['end_latlng'] else None,
+                elevation_points=self._view(entry['elevation'], '<f4'),
+                latlng_points=self._view(entry['latlng'], '<f8', width=2),
+                source=entry['source'],
+                distance_points=self._view(entry['distance_points'], '<f8')
+            )
+            self._routes[key] = (entry, route)
+            return route
+    
+    def routes(self):
+        """
+        Get every stored route.
+        
+        Returns:
+            list: List of Route objects
+        """
+        return [self.get(key) for key in self.keys()]
+    
+    def put(self, key, route):
+        """
+        Append a route, replacing any route stored under the same key.
+        
+        Args:
+            key: Route key
+            route (Route): Route to store
+        """
+        self.put_many([(key, route)])
+    
+    def put_many(self, items):
+        """
+        Append several routes with a single index swap.
+        
+        Args:
+            items (list): List of (key, Route) pairs
+        """
+        with self._write_lock():
+            index = self._read_index()
+            if index['data_file'] is None:
+                index['data_file'] = f"data-{index['generation']}.bin"
+            
+            with open(os.path.join(self.path, index['data_file']), 'ab') as f:
+                for key, route in items:
+                    index['routes'][str(key)] = self._write_route(f, route)
+                f.flush()
+                os.fsync(f.fileno())
+                index['data_size'] = f.tell()
+            
+            self._swap_index(index)
+    
+    def remove(self, key):
+        """
+        Remove a route from the index (its data is reclaimed by compact).
+        
+        Args:
+            key: Route key
+        
+        Returns:
+            bool: True if the route was stored
+        """
+        with self._write_lock():
+            index = self._read_index()
+            if index['routes'].pop(str(key), None) is None:
+                return False
+            self._swap_index(index)
+            return True
+    
+    def compact(self):
+        """
+        Rewrite the live routes into a new data file, dropping replaced and
+        removed data. Processes still mapping the old file keep working
+        until they next refresh.
+        """
+        with self._write_lock():
+            self.refresh(force=True)
+            index = self._read_index()
+            old_file = index['data_file']
+            routes = {key: self.get(key) for key in index['routes']}
+            
+            index['data_file'] = f"data-{index['generation'] + 1}.bin"
+            with open(os.path.join(self.path, index['data_file']), 'wb') as f:
+                for key, route in routes.items():
+                    index['routes'][key] = self._write_route(f, route)
+                f.flush()
+                os.fsync(f.fileno())
+                index['data_size'] = f.tell()
+            
+            self._swap_index(index)
+            
+            if old_file:
+                try:
+                    os.remove(os.path.join(self.path, old_file))
+                except OSError as e:
+                    logger.warning(f"Could not remove old route data file {old_file}: {e}")
+    
+    def refresh(self, force=False):
+        """
+        Reload the index and remap the data file if another process changed them.
+        
+        Args:
+            force (bool): Reload even if the index file looks unchanged
+        """
+        index_path = os.path.join(self.path, self.INDEX_FILE)
+        
+        with self._lock:
+            for _ in range(2):
+                try:
+                    stat = os.stat(index_path)
+                except FileNotFoundError:
+                    return
+                
+                signature = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+                if signature == self._index_stat and not force:
+                    return
+                
+                index = self._read_index()
+                try:
+                    self._map(index)
+                except FileNotFoundError:
+                    # Compacted between reading the index and mapping the data
+                    force = True
+                    continue
+                
+                self._index = index
+                self._index_stat = signature
+                return
+    
+    def _map(self, index):
+        """
+        Memory-map the data file referenced by an index.
+        
+        Args:
+            index (dict): Store index
+        """
+        if index['data_file'] is None or index['data_size'] == 0:
+            self._data = None
+            self._mapped = (index['data_file'], 0)
+            return
+        
+        if self._mapped == (index['data_file'], index['data_size']):
+            return
+        
+        path = os.path.join(self.path, index['data_file'])
+        data = np.memmap(path, dtype=np.uint8, mode='r', shape=(index['data_size'],))
+        
+        # Appends keep existing offsets valid, so built routes are only
+        # dropped when compaction switched to a new data file
+        if self._mapped[0] != index['data_file']:
+            self._routes = {}
+        
+        self._data = data
+        self._mapped = (index['data_file'], index['data_size'])
+    
+    def _view(self, location, dtype, width=None):
+        """
+        Get a stream as a view into the mapped data file.
+        
+        Args:
+            location (list): [byte offset, number of points]
+            dtype (str): NumPy dtype of the stream
+            width (int): Number of columns per point, or None for a flat stream
+        
+        Returns:
+            numpy.ndarray: Read-only view of the stream
+        """
+        offset, count = location
+        items = count * (width or 1)
+        if items == 0:
+            return None
+        
+        array = np.frombuffer(self._data, dtype=dtype, count=items, offset=offset)
+        return array if width is None else array.reshape(count, width)
+    
+    def _write_route(self, f, route):
+        """
+        Append a route's streams to the data file.
+        
+        Args:
+            f (file): Data file opened for appending
+            route (Route): Route to write
+        
+        Returns:
+            dict: Index entry for the route
+        """
+        def write(array, dtype):
+            # Pad so every stream starts on an 8 byte boundary
+            f.write(b"\0" * (-f.tell() % 8))
+            offset = f.tell()
+            f.write(np.ascontiguousarray(array, dtype=dtype).tobytes())
+            return [offset, len(array)]
+        
+        def latlng(point):
+            if not point or len(point) != 2 or point[0] is None or point[1] is None:
+                return None
+            return [float(point[0]), float(point[1])]
+        
+        return {
+            'id': route.id,
+            'name': route.name,
+            'source': route.source,
+            'distance': None if route.distance is None else float(route.distance),
+            'elevation_gain': None if route.elevation_gain is None else float(route.elevation_gain),
+            'start_latlng': latlng(route.start_latlng),
+            'end_latlng': latlng(route.end_latlng),
+            'elevation': write(route.elevation_points, '<f4'),
+            'latlng': write(route.latlng_points, '<f8'),
+            'distance_points': write(route.distance_points, '<f8')
+        }
+    
+    def _read_index(self):
+        """
+        Read the index file from disk.
+        
+        Returns:
+            dict: Store index (empty if no index has been written yet)
+        """
+        try:
+            with open(os.path.join(self.path, self.INDEX_FILE)) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {'generation': 0, 'data_file': None, 'data_size': 0, 'routes': {}}
+    
+    def _swap_index(self, index):
+        """
+        Atomically replace the index file and start using it.
+        
+        Args:
+            index (dict): New store index
+        """
+        index['generation'] += 1
+        
+        fd, tmp_path = tempfile.mkstemp(dir=self.path, prefix=".index-", suffix=".tmp")
+        try:
+            with os.fdopen(fd, 'w') as f:
+                json.dump(index, f)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, os.path.join(self.path, self.INDEX_FILE))
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        
+        self.refresh(force=True)
+    
+    def _write_lock(self):
+        """
+        Get a context manager serializing writers across threads and processes.
+        
+        Returns:
+            _StoreLock: Lock context manager
+        """
+        return _StoreLock(self._lock, os.path.join(self.path, self.LOCK_FILE))
+
+
+class _StoreLock:
+    """
+    Holds a thread lock and, where available, an exclusive lock on a file.
+    """
+    
+    def __init__(self, thread_lock, path):
+        self._thread_lock = thread_lock
+        self._path = path
+        self._file = None
+    
+    def __enter__(self):
+        self._thread_lock.acquire()
+        if fcntl is not None:
+            self._file = open(self._path, 'a')
+            fcntl.flock(self._file.fileno(), fcntl.LOCK_EX)
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        if self._file is not None:
+            fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+            self._file.close()
+            self._file = None
+        self._thread_lock.release()
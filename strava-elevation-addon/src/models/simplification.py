@@ -0,0 +1,209 @@
+"""
+Vectorized polyline simplification for route geometry.
+"""
+
+import heapq
+import numpy as np
+
+# Mean radius of the earth in meters
+EARTH_RADIUS_M = 6371000.0
+
+SIMPLIFICATION_METHODS = ("douglas-peucker", "visvalingam-whyatt")
+
+
+def project_to_meters(latlng_points):
+    """
+    Project [lat, lng] points onto a local plane in meters.
+    
+    Uses an equirectangular projection around the mean latitude, which is
+    accurate to well under a percent over the extent of a single route.
+    
+    Args:
+        latlng_points (list): List of [lat, lng] points
+    
+    Returns:
+        numpy.ndarray: (n, 2) array of (x, y) coordinates in meters
+    """
+    coords = np.radians(np.asarray(latlng_points, dtype=np.float64).reshape(-1, 2))
+    lat0 = coords[:, 0].mean() if len(coords) else 0.0
+    return np.column_stack((
+        coords[:, 1] * np.cos(lat0) * EARTH_RADIUS_M,
+        coords[:, 0] * EARTH_RADIUS_M
+    ))
+
+
+def _segment_distances(points, starts, ends):
+    """
+    Distance from each point to the segment between two other points.
+    
+    Args:
+        points (numpy.ndarray): (k, 2) points
+        starts (numpy.ndarray): (k, 2) segment start points
+        ends (numpy.ndarray): (k, 2) segment end points
+    
+    Returns:
+        numpy.ndarray: k distances
+    """
+    direction = ends - starts
+    length_sq = np.einsum('ij,ij->i', direction, direction)
+    offset = points - starts
+    
+    with np.errstate(divide='ignore', invalid='ignore'):
+        t = np.where(length_sq > 0, np.einsum('ij,ij->i', offset, direction) / length_sq, 0.0)
+    closest = starts + np.clip(t, 0, 1)[:, None] * direction
+    return np.hypot(*(points - closest).T)
+
+
+def douglas_peucker(xy, tolerance):
+    """
+    Douglas-Peucker simplification.
+    
+    Every pass splits all unfinished segments at once: each point's distance
+    to the segment it currently falls in is computed in one vectorized step,
+    and the farthest point of every segment beyond the tolerance is kept.
+    
+    Args:
+        xy (numpy.ndarray): (n, 2) projected points in meters
+        tolerance (float): Maximum distance in meters of a dropped point from
+                           the simplified line
+    
+    Returns:
+        numpy.ndarray: Sorted indices of the kept points
+    """
+    n = len(xy)
+    if n <= 2:
+        return np.arange(n)
+    
+    keep = np.zeros(n, dtype=bool)
+    keep[[0, n - 1]] = True
+    positions = np.arange(n)
+    
+    # Points whose segment may still need splitting
+    pending = ~keep
+    
+    while pending.any():
+        kept = np.flatnonzero(keep)
+        candidates = positions[pending]
+        
+        segment = np.searchsorted(kept, candidates) - 1
+        distances = _segment_distances(xy[candidates], xy[kept[segment]], xy[kept[segment + 1]])
+        
+        # Farthest point of each segment (candidates are sorted by segment)
+        boundaries = np.flatnonzero(np.diff(segment, prepend=-1))
+        farthest = np.maximum.reduceat(distances, boundaries)
+        counts = np.diff(np.append(boundaries, len(segment)))
+        is_max = distances == np.repeat(farthest, counts)
+        first_max = np.minimum.reduceat(np.where(is_max, np.arange(len(segment)), len(segment)), boundaries)
+        
+        split = farthest > tolerance
+        keep[candidates[first_max[split]]] = True
+        
+        # Segments within tolerance are finished
+        pending[candidates[np.repeat(~split, counts)]] = False
+        pending[keep] = False
+    
+    return np.flatnonzero(keep)
+
+
+def _triangle_area(xy, prev, point, nxt):
+    """
+    Area of the triangle a point forms with its neighbours.
+    
+    Args:
+        xy (numpy.ndarray): (n, 2) projected points in meters
+        prev (int): Index of the previous point
+        point (int): Index of the point
+        nxt (int): Index of the next point
+    
+    Returns:
+        float: Area in square meters
+    """
+    (x0, y0), (x1, y1), (x2, y2) = xy[prev], xy[point], xy[nxt]
+    return 0.5 * abs((x1 - x0) * (y2 - y0) - (x2 - x0) * (y1 - y0))
+
+
+def visvalingam_whyatt(xy, tolerance):
+    """
+    Visvalingam-Whyatt simplification.
+    
+    Points are removed while the triangle they form with their neighbours
+    has an area below tolerance ** 2 (a bump of height tolerance over a base
+    of 2 * tolerance). The point with the smallest area (the first on ties)
+    is taken from a heap and removed, and only the areas of its two
+    neighbours are recomputed, so long runs of equal areas (straight
+    stretches, stops, repeated fixes) take O(n log n) rather than one pass
+    over the route per removed point.
+    
+    Args:
+        xy (numpy.ndarray): (n, 2) projected points in meters
+        tolerance (float): Tolerance in meters
+    
+    Returns:
+        numpy.ndarray: Sorted indices of the kept points
+    """
+    n = len(xy)
+    if n <= 2:
+        return np.arange(n)
+    
+    threshold = tolerance ** 2
+    
+    # Initial areas of every interior point in one vectorized step
+    prev, point, nxt = xy[:-2], xy[1:-1], xy[2:]
+    areas = np.full(n, np.inf)
+    areas[1:-1] = 0.5 * np.abs(
+        (point[:, 0] - prev[:, 0]) * (nxt[:, 1] - prev[:, 1]) -
+        (nxt[:, 0] - prev[:, 0]) * (point[:, 1] - prev[:, 1])
+    )
+    
+    # Doubly linked list of the remaining points
+    previous = np.arange(-1, n - 1)
+    following = np.arange(1, n + 1)
+    removed = np.zeros(n, dtype=bool)
+    
+    candidates = np.flatnonzero(areas < threshold)
+    heap = list(zip(areas[candidates].tolist(), candidates.tolist()))
+    heapq.heapify(heap)
+    
+    while heap:
+        area, index = heapq.heappop(heap)
+        
+        # Skip entries left behind when a neighbour's area was recomputed
+        if removed[index] or area != areas[index]:
+            continue
+        
+        removed[index] = True
+        before, after = previous[index], following[index]
+        following[before] = after
+        previous[after] = before
+        
+        for neighbour in (before, after):
+            if neighbour == 0 or neighbour == n - 1:
+                continue
+            areas[neighbour] = _triangle_area(xy, previous[neighbour], neighbour, following[neighbour])
+            if areas[neighbour] < threshold:
+                heapq.heappush(heap, (areas[neighbour], int(neighbour)))
+    
+    return np.flatnonzero(~removed)
+
+
+def simplify_indices(latlng_points, tolerance_m, method="douglas-peucker"):
+    """
+    Get the indices of the points kept when simplifying a route.
+    
+    Args:
+        latlng_points (list): List of [lat, lng] points
+        tolerance_m (float): Tolerance in meters
+        method (str): "douglas-peucker" or "visvalingam-whyatt"
+    
+    Returns:
+        numpy.ndarray: Sorted indices of the kept points (always including
+                       the first and last point)
+    """
+    if method not in SIMPLIFICATION_METHODS:
+        raise ValueError(f"Unknown simplification method: {method}. "
+                         f"Expected one of {SIMPLIFICATION_METHODS}")
+    
+    xy = project_to_meters(latlng_points)
+    if method == "douglas-peucker":
+        return douglas_peucker(xy, tolerance_m)
+    return visvalingam_whyatt(xy, tolerance_m)
@@ -6,8 +6,10 @@ import logging
 import os
 from api.strava_client import StravaClient
 from elevation.elevation_client import ElevationClient
+from elevation.elevation_cache import ElevationCache
 from matching.elevation_matcher import ElevationMatcher
 from models.route import Route
+from models.route_store import RouteStore
 
 # Configure logging
 logging.basicConfig(
@@ -23,7 +25,10 @@ class StravaElevationMatcher:
     """
     
     def __init__(self, strava_client_id=None, strava_client_secret=None, 
-                 strava_refresh_token=None, elevation_provider="open-meteo"):
+                 strava_refresh_token=None, elevation_provider="open-meteo",
+                 route_store_path=None, simplify_tolerance_m=None,
+                 elevation_cache_path=None, dem_directory=None,
+                 elevation_coalesce_window=None, sample_spacing_m=None):
         """
         Initialize the Strava Elevation Matcher.
         
@@ -32,6 +37,27 @@ class StravaElevationMatcher:
             strava_client_secret (str): Strava API client secret
             strava_refresh_token (str): Strava OAuth refresh token
             elevation_provider (str): Elevation data provider
+            route_store_path (str): Directory of an on-disk RouteStore to cache
+                                    routes in, shared by every process on the
+                                    host (None for a per-process dict)
+            simplify_tolerance_m (float): Simplify route geometry to this tolerance
+                                          in meters before fetching elevations from
+                                          external APIs (None to fetch every point)
+            elevation_cache_path (str): SQLite file of a persistent ElevationCache,
+                                        so elevations of previously fetched grid
+                                        cells are not requested again (None to
+                                        disable caching)
+            dem_directory (str): Directory of SRTM .hgt tiles, used with
+                                 elevation_provider="local-dem" for offline
+                                 elevation lookups
+            elevation_coalesce_window (float): Seconds to pool elevation lookups
+                                               of routes enriched concurrently
+                                               into full provider batches (None
+                                               to disable coalescing)
+            sample_spacing_m (float): Fetch external elevations at this spacing
+                                      in meters and refine only where the
+                                      profile curves (None to disable adaptive
+                                      sampling)
         """
         # Initialize Strava client
         self.strava_client = StravaClient(
@@ -42,14 +68,20 @@ class StravaElevationMatcher:
         
         # Initialize elevation client
         self.elevation_client = ElevationClient(
-            primary_provider=elevation_provider
+            primary_provider=elevation_provider,
+            cache=ElevationCache(elevation_cache_path) if elevation_cache_path else None,
+            dem_directory=dem_directory,
+            coalesce_window=elevation_coalesce_window
         )
         
         # Initialize elevation matcher
         self.elevation_matcher = ElevationMatcher()
         
-        # Cache for routes
-        self.route_cache = {}
+        self.simplify_tolerance_m = simplify_tolerance_m
+        self.sample_spacing_m = sample_spacing_m
+        
+        # Cache for routes, on disk when shared between worker processes
+        self.route_cache = RouteStore(route_store_path) if route_store_path else {}
     
     def authenticate(self, auth_code=None):
         """
@@ -131,10 +163,17 @@ class StravaElevationMatcher:
         if streams and 'latlng' in streams:
             route.add_latlng_stream(streams['latlng'])
         
+        if streams and 'distance' in streams:
+            route.add_distance_stream(streams['distance'])
+        
         # If no elevation data from streams, try to get from external API
-        if not route.elevation_points and route.latlng_points:
+        if not len(route.elevation_points) and len(route.latlng_points):
             logger.info(f"Getting elevation data for route {route_id} from external API")
-            elevations = self.elevation_client.get_elevations_for_route(route.latlng_points)
+            elevations = self.elevation_client.get_elevations_for_route(
+                route.latlng_points,
+                simplify_tolerance_m=self.simplify_tolerance_m,
+                sample_spacing_m=self.sample_spacing_m
+            )
             if elevations:
                 route.add_elevation_stream(elevations)
         
@@ -177,10 +216,17 @@ class StravaElevationMatcher:
         if streams and 'latlng' in streams:
             route.add_latlng_stream(streams['latlng'])
         
+        if streams and 'distance' in streams:
+            route.add_distance_stream(streams['distance'])
+        
         # If no elevation data from streams, try to get from external API
-        if not route.elevation_points and route.latlng_points:
+        if not len(route.elevation_points) and len(route.latlng_points):
             logger.info(f"Getting elevation data for activity {activity_id} from external API")
-            elevations = self.elevation_client.get_elevations_for_route(route.latlng_points)
+            elevations = self.elevation_client.get_elevations_for_route(
+                route.latlng_points,
+                simplify_tolerance_m=self.simplify_tolerance_m,
+                sample_spacing_m=self.sample_spacing_m
+            )
             if elevations:
                 route.add_elevation_stream(elevations)
         
@@ -201,7 +247,7 @@ class StravaElevationMatcher:
         Returns:
             list: List of matches with similarity scores
         """
-        if not target_route or not target_route.elevation_points:
+        if not target_route or not len(target_route.elevation_points):
             logger.error("Target route has no elevation data")
             return []
         
@@ -215,7 +261,7 @@ class StravaElevationMatcher:
                 for route in routes:
                     if route.id != target_route.id:  # Skip target
                         route_with_elevation = self.get_route_with_elevation(route.id)
-                        if route_with_elevation and route_with_elevation.elevation_points:
+                        if route_with_elevation and len(route_with_elevation.elevation_points):
                             candidate_routes.append(route_with_elevation)
             
             # Add activities
@@ -224,7 +270,7 @@ class StravaElevationMatcher:
                 for activity in activities:
                     if activity.id != target_route.id:  # Skip target
                         activity_with_elevation = self.get_activity_with_elevation(activity.id)
-                        if activity_with_elevation and activity_with_elevation.elevation_points:
+                        if activity_with_elevation and len(activity_with_elevation.elevation_points):
                             candidate_routes.append(activity_with_elevation)
         
         # Find matches using the elevation matcher
@@ -234,13 +280,14 @@ class StravaElevationMatcher:
             min_similarity=min_similarity
         )
     
-    def compare_routes(self, route1, route2):
+    def compare_routes(self, route1, route2, include_alignment=False):
         """
         Compare two routes and return detailed comparison metrics.
         
         Args:
             route1 (Route): First route object
             route2 (Route): Second route object
+            include_alignment (bool): Whether to include the elevation profile alignment
             
         Returns:
             dict: Comparison metrics
@@ -249,12 +296,16 @@ class StravaElevationMatcher:
             logger.error("Invalid routes for comparison")
             return None
         
-        if not route1.elevation_points or not route2.elevation_points:
+        if not len(route1.elevation_points) or not len(route2.elevation_points):
             logger.error("Routes have no elevation data")
             return None
         
         # Compare routes
-        comparison = self.elevation_matcher.compare_routes(route1, route2)
+        comparison = self.elevation_matcher.compare_routes(
+            route1,
+            route2,
+            include_alignment=include_alignment
+        )
         
         # Add route names
         comparison['route1_name'] = route1.name
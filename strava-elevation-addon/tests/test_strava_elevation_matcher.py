@@ -8,6 +8,14 @@ import os
 import sys
 import unittest
 import json
+import pickle
+import tempfile
+import time
+import threading
+import requests
+from concurrent.futures import wait
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import numpy as np
 from unittest.mock import patch, MagicMock
 
 # Add the src directory to the path
@@ -15,9 +23,23 @@ sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
 
 # Import the modules to test
 from models.route import Route
+from models.route_collection import RouteCollection
+from models import binary_format
+from models.route_store import RouteStore
+from models import polyline
+from models.simplification import simplify_indices
 from api.strava_client import StravaClient
+from api.http_session import SessionPool
 from elevation.elevation_client import ElevationClient
-from matching.elevation_matcher import ElevationMatcher
+from elevation.elevation_cache import ElevationCache
+from elevation.dem import LocalDEM, HGT_VOID
+from elevation.rate_limiter import RateLimiter
+from elevation.coalescer import ElevationCoalescer
+from elevation.provider_health import ProviderHealth, parse_retry_after
+from elevation import processing
+from matching.elevation_matcher import ElevationMatcher, _scoring_matcher
+from matching.spatial_index import SpatialIndex
+from matching.dtw import dtw_distance, dtw_distance_rolling, dtw_path, fast_dtw, window_bounds
 from strava_elevation_matcher import StravaElevationMatcher
 
 
@@ -70,11 +92,124 @@ class TestRoute(unittest.TestCase):
         self.assertEqual(normalized[0][1], 100)  # First elevation point
         self.assertEqual(normalized[-1][1], 100)  # Last elevation point
 
+    def test_resampled_elevation_profile(self):
+        """Test resampling elevations evenly by distance"""
+        route = Route.from_dict({
+            'id': '1',
+            'distance': 300,
+            'elevation_points': [100, 110, 140],
+            'distance_points': [0, 100, 300]
+        })
+
+        profile = route.get_resampled_elevation_profile(4)
+        self.assertEqual(profile.dtype, np.float32)
+        np.testing.assert_allclose(profile, [100, 110, 125, 140])
+
+        # Profiles are cached until a stream changes
+        self.assertIs(route.get_resampled_elevation_profile(4), profile)
+        route.add_distance_stream([0, 200, 300])
+        np.testing.assert_allclose(route.get_resampled_elevation_profile(4), [100, 105, 110, 140])
+
+    def test_computed_elevation_gain(self):
+        """Test routes without a summary gain get one from their elevation stream"""
+        rng = np.random.default_rng(6)
+        climb = np.concatenate((np.linspace(100, 300, 200), np.linspace(300, 250, 50)))
+        route = Route.from_dict({'id': '1', 'elevation_points': list(climb + rng.normal(0, 0.3, 250))})
+
+        stats = route.get_elevation_stats()
+
+        self.assertAlmostEqual(stats['gain'], 200, delta=5)
+        self.assertEqual(self.route.get_elevation_stats()['gain'], 250)
+
+    def test_polyline_round_trip(self):
+        """Test encoded polylines decode to arrays and re-encode identically"""
+        encoded = "_p~iF~ps|U_ulLnnqC_mqNvxq`@"
+        points = polyline.decode(encoded)
+
+        np.testing.assert_allclose(points, [[38.5, -120.2], [40.7, -120.95], [43.252, -126.453]])
+        self.assertEqual(polyline.encode(points), encoded)
+
+        rng = np.random.default_rng(4)
+        walk = np.round([37.7, -122.4] + np.cumsum(rng.normal(0, 1e-3, (500, 2)), axis=0), 5)
+        np.testing.assert_allclose(polyline.decode(polyline.encode(walk)), walk, atol=1e-9)
+
+    def test_from_strava_activity_polyline(self):
+        """Test summary polylines populate the route geometry"""
+        route = Route.from_strava_activity({
+            'id': 1,
+            'name': 'Morning Run',
+            'start_latlng': [],
+            'map': {'summary_polyline': "_p~iF~ps|U_ulLnnqC_mqNvxq`@"}
+        })
+
+        self.assertEqual(route.latlng_points.shape, (3, 2))
+        self.assertEqual(route.start_latlng, (38.5, -120.2))
+        self.assertEqual(route.end_latlng, (43.252, -126.453))
+
+    def test_array_streams_and_cached_stats(self):
+        """Test streams are stored as arrays and stats are cached until they change"""
+        route = Route.from_dict({
+            'id': '1',
+            'distance': 200,
+            'elevation_gain': 20,
+            'elevation_points': [100, 120, 110],
+            'latlng_points': [[37.0, -122.0], [37.001, -122.0], [37.002, -122.0]]
+        })
+
+        self.assertEqual(route.elevation_points.dtype, np.float32)
+        self.assertEqual(route.latlng_points.shape, (3, 2))
+        self.assertFalse(hasattr(route, '__dict__'))
+
+        profile = route.get_normalized_elevation_profile()
+        self.assertIs(route.get_normalized_elevation_profile(), profile)
+        self.assertEqual(route.get_elevation_stats()['max'], 120)
+
+        route.add_elevation_stream({'data': [90, 95]})
+        self.assertEqual(route.get_elevation_stats()['max'], 95)
+        self.assertEqual(len(route.get_normalized_elevation_profile()), 2)
+
+    def test_simplify(self):
+        """Test simplification drops near-duplicate points within the tolerance"""
+        rng = np.random.default_rng(2)
+        lats = 37.0 + np.linspace(0, 0.05, 2000)
+        lngs = -122.0 + 0.01 * np.sin(np.linspace(0, 6, 2000)) + rng.normal(0, 1e-6, 2000)
+        route = Route.from_dict({
+            'id': '1',
+            'latlng_points': np.column_stack((lats, lngs)).tolist(),
+            'elevation_points': list(np.linspace(100, 300, 2000))
+        })
+
+        for method in ("douglas-peucker", "visvalingam-whyatt"):
+            simplified = route.simplify(5, method=method)
+            self.assertLess(len(simplified.latlng_points), 200)
+            self.assertEqual(len(simplified.elevation_points), len(simplified.latlng_points))
+            np.testing.assert_array_equal(simplified.latlng_points[[0, -1]], route.latlng_points[[0, -1]])
+
+        # Every dropped point stays within the tolerance of the simplified line
+        kept = route.get_simplification_indices(5)
+        line = route.latlng_points[kept]
+        dense = np.column_stack([np.interp(np.arange(2000), kept, line[:, i]) for i in range(2)])
+        errors_m = np.abs(dense - route.latlng_points) * [111195, 111195 * np.cos(np.radians(37))]
+        self.assertLess(errors_m.max(), 10)
+
+
+    def test_simplify_collinear_route(self):
+        """Test Visvalingam-Whyatt removes long runs of zero-area points quickly"""
+        # A straight 20,000-point route with every fix repeated, as when stopped
+        lats = np.repeat(37.0 + np.linspace(0, 0.1, 10000), 2)
+        latlng_points = np.column_stack((lats, np.full(len(lats), -122.0)))
+
+        start = time.perf_counter()
+        kept = simplify_indices(latlng_points, 5, method="visvalingam-whyatt")
+        elapsed = time.perf_counter() - start
+
+        np.testing.assert_array_equal(kept, [0, len(lats) - 1])
+        self.assertLess(elapsed, 2.0)
 
 class TestStravaClient(unittest.TestCase):
     """Test the Strava API client"""
 
-    @patch('api.strava_client.requests.post')
+    @patch('api.strava_client.http_session.post')
     def test_get_token(self, mock_post):
         """Test token acquisition"""
         # Mock the response
@@ -94,7 +229,7 @@ class TestStravaClient(unittest.TestCase):
         self.assertEqual(client.refresh_token, 'test_refresh')
         mock_post.assert_called_once()
 
-    @patch('api.strava_client.requests.get')
+    @patch('api.strava_client.http_session.get')
     def test_get_activities(self, mock_get):
         """Test retrieving activities"""
         # Mock the response
@@ -125,7 +260,7 @@ class TestStravaClient(unittest.TestCase):
         self.assertEqual(activities[1].distance, 5000)
         mock_get.assert_called_once()
 
-    @patch('api.strava_client.requests.get')
+    @patch('api.strava_client.http_session.get')
     def test_get_activity_streams(self, mock_get):
         """Test retrieving activity streams"""
         # Mock the response
@@ -154,10 +289,55 @@ class TestStravaClient(unittest.TestCase):
         mock_get.assert_called_once()
 
 
+class TestSessionPool(unittest.TestCase):
+    """Test pooled keep-alive HTTP sessions"""
+
+    def setUp(self):
+        """Start a local keep-alive HTTP server"""
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_GET(self):
+                body = b'{"elevation": [1]}'
+                self.send_response(200)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.server.daemon_threads = True
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}/v1/elevation"
+
+    def test_connections_are_reused(self):
+        """Test requests from several threads share kept-alive connections"""
+        timings = []
+        pool = SessionPool(pool_maxsize=2, on_request=lambda *args: timings.append(args))
+        self.addCleanup(pool.close)
+
+        for _ in range(3):
+            self.assertEqual(pool.get(self.url).json(), {'elevation': [1]})
+        thread = threading.Thread(target=lambda: pool.get(self.url))
+        thread.start()
+        thread.join()
+
+        stats = pool.stats()[f"127.0.0.1:{self.server.server_address[1]}"]
+        self.assertEqual(stats['requests'], 4)
+        self.assertEqual(stats['new_connections'], 1)
+        self.assertEqual(stats['reused_connections'], 3)
+        self.assertEqual([reused for _, _, _, reused in timings], [False, True, True, True])
+        self.assertEqual(timings[0][0], 'GET')
+
+
 class TestElevationClient(unittest.TestCase):
     """Test the Elevation API client"""
 
-    @patch('elevation.elevation_client.requests.get')
+    @patch('elevation.elevation_client.http_session.get')
     def test_get_elevation_open_meteo(self, mock_get):
         """Test retrieving elevation from Open-Meteo"""
         # Mock the response
@@ -180,7 +360,7 @@ class TestElevationClient(unittest.TestCase):
         self.assertEqual(elevations[2], 140)
         mock_get.assert_called_once()
 
-    @patch('elevation.elevation_client.requests.get')
+    @patch('elevation.elevation_client.http_session.get')
     def test_get_elevation_open_topo(self, mock_get):
         """Test retrieving elevation from Open Topo Data"""
         # Mock the response
@@ -208,6 +388,467 @@ class TestElevationClient(unittest.TestCase):
         mock_get.assert_called_once()
 
 
+    def test_simplified_route_elevations(self):
+        """Test only simplified points are fetched and the rest are interpolated"""
+        client = ElevationClient()
+        latlng_points = [[37.0 + i * 1e-4, -122.0] for i in range(500)]
+
+        with patch.object(client, 'get_elevations', side_effect=lambda points, provider: [
+            (lat - 37.0) * 1e4 for lat, _ in points
+        ]) as mock_get_elevations:
+            elevations = client.get_elevations_for_route(latlng_points, simplify_tolerance_m=5)
+
+        self.assertEqual(len(mock_get_elevations.call_args[0][0]), 2)
+        self.assertEqual(len(elevations), 500)
+        np.testing.assert_allclose(elevations, np.arange(500), atol=1e-3)
+
+    def test_adaptive_sampling(self):
+        """Test only curved parts of a profile are refined and the rest is interpolated"""
+        client = ElevationClient()
+        latlng_points = np.column_stack((37.0 + np.arange(3000) * 1e-4, np.full(3000, -122.0)))
+
+        def profile(lats):
+            # Flat, then a steady climb, then rolling hills
+            d = (np.asarray(lats) - 37.0) * 1e4
+            return np.where(d < 1000, 100.0, np.where(d < 2000, 100 + (d - 1000) * 0.5,
+                                                      600 + 20 * np.sin((d - 2000) / 50)))
+
+        with patch.object(client, 'get_elevations', side_effect=lambda points, provider: [
+            float(e) for e in profile([lat for lat, _ in points])
+        ]) as mock_get_elevations:
+            elevations = client.get_elevations_for_route(latlng_points, sample_spacing_m=500,
+                                                         sample_tolerance_m=1.0)
+
+        fetched = sum(len(call[0][0]) for call in mock_get_elevations.call_args_list)
+        stats = client.sampling_stats()
+        self.assertLess(fetched, 600)
+        self.assertEqual(stats['fetched_points'], fetched)
+        self.assertEqual(stats['saved_points'], 3000 - fetched)
+        self.assertLess(np.abs(np.array(elevations) - profile(latlng_points[:, 0])).max(), 1.0)
+
+    def test_concurrent_batches_in_order(self):
+        """Test batches fetched on the thread pool are reassembled in order"""
+        def get(url, params):
+            time.sleep(np.random.uniform(0, 0.01))
+            response = MagicMock()
+            response.json.return_value = {'elevation': [float(lat) for lat in params['latitude'].split(',')]}
+            return response
+
+        client = ElevationClient(max_workers=8, rate_limits={'open-meteo': []})
+        self.addCleanup(client.close)
+        points = [(float(i), 0.0) for i in range(1050)]
+
+        with patch('elevation.elevation_client.http_session.get', side_effect=get) as mock_get:
+            elevations = client.get_elevations(points)
+
+        self.assertEqual(mock_get.call_count, 11)
+        self.assertEqual(elevations, [float(i) for i in range(1050)])
+
+    def test_rate_limiter(self):
+        """Test every quota is enforced, allowing bursts up to its size"""
+        now = [0.0]
+        waits = []
+
+        def sleep(seconds):
+            waits.append(seconds)
+            now[0] += seconds
+
+        limiter = RateLimiter([(2, 1), (3, 60)], clock=lambda: now[0], sleep=sleep)
+
+        self.assertTrue(limiter.acquire())
+        self.assertTrue(limiter.acquire())
+        self.assertEqual(waits, [])
+        self.assertTrue(limiter.acquire())
+        self.assertAlmostEqual(now[0], 0.5)
+        self.assertFalse(limiter.acquire(timeout=10))
+        self.assertTrue(limiter.acquire())
+        self.assertAlmostEqual(now[0], 20.0)
+
+        with self.assertRaises(ValueError):
+            RateLimiter([(0, 1)])
+
+
+class TestProviderHealth(unittest.TestCase):
+    """Test circuit breaking, backoff and hedging across providers"""
+
+    def setUp(self):
+        """Set up a fake clock"""
+        self.now = [0.0]
+
+    def sleep(self, seconds):
+        """Advance the fake clock"""
+        self.now[0] += seconds
+
+    def response(self, elevations=None, status=200, retry_after=None):
+        """Build a mocked provider response"""
+        response = MagicMock()
+        response.headers = {'Retry-After': retry_after} if retry_after else {}
+        if status != 200:
+            response.raise_for_status.side_effect = requests.HTTPError(f"{status} Error", response=response)
+        response.json.return_value = {'elevation': elevations, 'status': 'OK',
+                                      'results': [{'elevation': e} for e in elevations or []]}
+        return response
+
+    def test_circuit_breaker(self):
+        """Test the circuit opens after consecutive failures and lets one probe through later"""
+        health = ProviderHealth(failure_threshold=2, reset_timeout=30, clock=lambda: self.now[0])
+
+        health.record_failure()
+        self.assertTrue(health.allow_request())
+        health.record_failure()
+        self.assertFalse(health.allow_request())
+        self.assertEqual(health.state, 'open')
+
+        self.sleep(30)
+        self.assertTrue(health.allow_request())
+        self.assertFalse(health.allow_request())
+        health.record_failure()
+        self.assertEqual(health.state, 'open')
+
+        self.sleep(30)
+        self.assertTrue(health.allow_request())
+        # A probe that was not sent can be taken again
+        health.release_probe()
+        self.assertTrue(health.allow_request())
+        health.record_success(0.1)
+        self.assertEqual(health.state, 'closed')
+        self.assertEqual(health.stats()['rejected'], 2)
+
+    def test_parse_retry_after(self):
+        """Test Retry-After in seconds and as an HTTP date"""
+        self.assertEqual(parse_retry_after('120'), 120.0)
+        self.assertEqual(parse_retry_after('Wed, 21 Oct 2015 07:28:00 GMT', now=1445412420.0), 60.0)
+        self.assertIsNone(parse_retry_after('soon'))
+        self.assertIsNone(parse_retry_after(None))
+
+    def test_open_circuit_skips_to_fallback(self):
+        """Test a failing provider is skipped once its circuit is open"""
+        client = ElevationClient(max_retries=2, retry_delay=0, failure_threshold=2, max_workers=1,
+                                rate_limits={'open-topo-data': []})
+        limiter = client.rate_limiters['open-meteo'] = MagicMock()
+        limiter.acquire.return_value = True
+
+        def get(url, params):
+            if url == client.OPEN_METEO_API:
+                return self.response(status=503)
+            return self.response([10, 20])
+
+        with patch('elevation.elevation_client.http_session.get', side_effect=get) as mock_get:
+            self.assertEqual(client.get_elevations([(37.0, -122.0), (37.1, -122.0)]), [10, 20])
+            self.assertEqual(limiter.acquire.call_count, 2)
+            self.assertEqual(client.get_elevations([(37.0, -122.0), (37.1, -122.0)]), [10, 20])
+
+        # No rate limit tokens are taken while the circuit is open
+        self.assertEqual(limiter.acquire.call_count, 2)
+        urls = [call[0][0] for call in mock_get.call_args_list]
+        self.assertEqual(urls.count(client.OPEN_METEO_API), 2)
+        self.assertEqual(urls.count(client.OPEN_TOPO_DATA_API), 2)
+        self.assertEqual(client.provider_health()['open-meteo']['state'], 'open')
+
+    def test_retry_after(self):
+        """Test retries wait as long as Retry-After asks, and give up beyond max_retry_delay"""
+        client = ElevationClient(retry_delay=0.01, max_retry_delay=10, max_workers=1)
+        client.health['open-meteo'] = ProviderHealth(clock=lambda: self.now[0])
+        responses = [self.response(status=429, retry_after='5'), self.response([42])]
+
+        with patch('elevation.elevation_client.http_session.get', side_effect=responses), \
+                patch('elevation.elevation_client.time.sleep', side_effect=self.sleep) as mock_sleep:
+            self.assertEqual(client.get_elevations([(37.0, -122.0)]), [42])
+
+        self.assertEqual(mock_sleep.call_args[0][0], 5.0)
+
+        responses = [self.response(status=429, retry_after='3600'), self.response([7])]
+        with patch('elevation.elevation_client.http_session.get', side_effect=responses) as mock_get:
+            self.assertEqual(client.get_elevations([(37.0, -122.0)]), [7])
+
+        self.assertEqual(mock_get.call_args[0][0], client.OPEN_TOPO_DATA_API)
+
+    def test_partial_failure_recovery(self):
+        """Test only failed batches go to the fallback, and progress is resumed after a failure"""
+        client = ElevationClient(max_retries=1, retry_delay=0, max_workers=4, failure_threshold=100,
+                                 rate_limits={'open-meteo': [], 'open-topo-data': []})
+        self.addCleanup(client.close)
+        points = [(37.0 + i * 1e-3, -122.0) for i in range(400)]
+        failing = {client.OPEN_METEO_API}
+        requested = []
+
+        def get(url, params):
+            if url == client.OPEN_METEO_API:
+                lats = [float(lat) for lat in params['latitude'].split(',')]
+            else:
+                lats = [float(point.split(',')[0]) for point in params['locations'].split('|')]
+            requested.append((url, len(lats)))
+            if url in failing and lats[0] >= 37.2:
+                return self.response(status=503)
+            return self.response(lats)
+
+        with patch('elevation.elevation_client.http_session.get', side_effect=get):
+            elevations = client.get_elevations(points)
+            self.assertEqual(elevations, [lat for lat, _ in points])
+            self.assertEqual(sorted(n for url, n in requested if url == client.OPEN_TOPO_DATA_API), [100, 100])
+
+            # Both providers fail the last batches, then recover
+            failing.add(client.OPEN_TOPO_DATA_API)
+            self.assertIsNone(client.get_elevations(points[::-1]))
+            failing.clear()
+            requested.clear()
+            elevations = client.get_elevations(points[::-1])
+
+        self.assertEqual(elevations, [lat for lat, _ in points[::-1]])
+        self.assertEqual(requested, [(client.OPEN_METEO_API, 100)] * 2)
+
+    def test_hedged_batch(self):
+        """Test a batch is also sent to the other provider when the first is slow"""
+        client = ElevationClient(hedge_percentile=95, max_workers=1)
+        self.addCleanup(client.close)
+        for _ in range(20):
+            client.health['open-meteo'].record_success(0.01)
+
+        def get(url, params):
+            if url == client.OPEN_METEO_API:
+                time.sleep(0.5)
+                return self.response([1])
+            return self.response([2])
+
+        with patch('elevation.elevation_client.http_session.get', side_effect=get):
+            start = time.monotonic()
+            elevations = client.get_elevations([(37.0, -122.0)])
+            elapsed = time.monotonic() - start
+
+        self.assertEqual(elevations, [2])
+        self.assertLess(elapsed, 0.4)
+        self.assertEqual(client.provider_health()['open-meteo']['hedged'], 1)
+
+
+class TestElevationCoalescer(unittest.TestCase):
+    """Test coalescing of concurrent elevation requests"""
+
+    def test_full_batches_and_dedupe(self):
+        """Test points from several callers are packed into full, deduplicated batches"""
+        batches = []
+
+        def fetch(points, provider):
+            batches.append(len(points))
+            return [lat for lat, _ in points]
+
+        coalescer = ElevationCoalescer(fetch, batch_size=100, window=0.2, cell_arcsec=None)
+        self.addCleanup(coalescer.close)
+
+        # Five callers with 30 points each, 10 of them shared by every caller
+        requests = [[(float(i), 0.0) for i in range(10)] + [(100.0 + 20 * c + i, 0.0) for i in range(20)]
+                    for c in range(5)]
+        futures = [coalescer.submit(points, 'open-meteo') for points in requests]
+
+        for points, future in zip(requests, futures):
+            self.assertEqual(future.result(timeout=5), [lat for lat, _ in points])
+        self.assertEqual(batches, [100, 10])
+        self.assertEqual(coalescer.stats()['fetched_points'], 110)
+        self.assertEqual(coalescer.stats()['points'], 150)
+
+    def test_failed_batch(self):
+        """Test callers whose points were in a failed batch get None"""
+        coalescer = ElevationCoalescer(lambda points, provider: None, window=0.01)
+        self.addCleanup(coalescer.close)
+
+        self.assertIsNone(coalescer.get_elevations([(37.0, -122.0)], 'open-meteo'))
+        self.assertEqual(coalescer.get_elevations([], 'open-meteo'), [])
+
+    def test_client_coalesces_routes(self):
+        """Test concurrent route lookups through the client share partly full batches"""
+        def get(url, params):
+            response = MagicMock()
+            response.json.return_value = {'elevation': [float(lat) for lat in params['latitude'].split(',')]}
+            return response
+
+        client = ElevationClient(coalesce_window=0.2, rate_limits={'open-meteo': []})
+        self.addCleanup(client.close)
+        routes = [[[37.0 + r + i * 0.01, -122.0] for i in range(60)] for r in range(3)]
+        results = [None] * 3
+
+        def enrich(r):
+            results[r] = client.get_elevations_for_route(routes[r])
+
+        with patch('elevation.elevation_client.http_session.get', side_effect=get) as mock_get:
+            threads = [threading.Thread(target=enrich, args=(r,)) for r in range(3)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        self.assertEqual(mock_get.call_count, 2)
+        for route, elevations in zip(routes, results):
+            np.testing.assert_allclose(elevations, [lat for lat, _ in route], atol=1e-3)
+
+
+class TestElevationCache(unittest.TestCase):
+    """Test the quantized elevation cache"""
+
+    def setUp(self):
+        """Set up a cache file"""
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.path = os.path.join(self.directory.name, 'elevations.sqlite')
+
+    def test_quantized_cells(self):
+        """Test points within one grid cell share a key and centers round trip"""
+        cache = ElevationCache()
+        cells = cache.cells([(37.77490, -122.41940), (37.77495, -122.41945), (37.7760, -122.4194),
+                             (-33.8688, 151.2093)])
+
+        self.assertEqual(cells[0], cells[1])
+        self.assertNotEqual(cells[0], cells[2])
+        np.testing.assert_array_equal(cache.cells(cache.cell_centers(cells)), cells)
+        np.testing.assert_allclose(cache.cell_centers(cells[3:]), [(-33.8688, 151.2093)], atol=cache.cell_degrees)
+
+    def test_only_misses_are_fetched(self):
+        """Test cached cells are not requested again, also after reopening the cache"""
+        client = ElevationClient(cache=ElevationCache(self.path))
+        points = [(37.0 + i * 0.01, -122.0) for i in range(5)]
+
+        with patch.object(client, '_fetch_points',
+                          side_effect=lambda points, provider: [lat for lat, _ in points]) as mock_fetch:
+            first = client.get_elevations(points[:3] + points[:1])
+            second = client.get_elevations(points)
+
+        self.assertEqual([len(call[0][0]) for call in mock_fetch.call_args_list], [3, 2])
+        np.testing.assert_allclose(first, [37.0, 37.01, 37.02, 37.0])
+        np.testing.assert_allclose(second, [p[0] for p in points])
+        self.assertEqual(client.cache.stats()['misses'], 5)
+        self.assertEqual(client.cache.stats()['memory_hits'], 3)
+
+        client.cache.close()
+        reopened = ElevationClient(cache=ElevationCache(self.path))
+        with patch.object(reopened, '_fetch_points') as mock_fetch:
+            self.assertEqual(reopened.get_elevations(points[::-1]), second[::-1])
+
+        mock_fetch.assert_not_called()
+        self.assertEqual(reopened.cache.stats()['hit_rate'], 1.0)
+        self.assertEqual(len(reopened.cache), 5)
+
+        with self.assertRaises(ValueError):
+            ElevationCache(self.path, cell_arcsec=1)
+
+
+class TestLocalDEM(unittest.TestCase):
+    """Test offline elevations from generated SRTM tiles"""
+
+    def setUp(self):
+        """Write two small tiles sampling a plane"""
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+        # 11 x 11 samples per degree, rows running north to south
+        for lat0, name in ((37, 'N37W123.hgt'), (36, 'N36W123.hgt')):
+            lats = lat0 + 1.0 - np.arange(11)[:, None] / 10.0
+            lngs = -123.0 + np.arange(11)[None, :] / 10.0
+            tile = np.round(1000 * (lats - 37.0) + 100 * (lngs + 123.0)).astype('>i2')
+            if lat0 == 36:
+                tile[0, 0] = HGT_VOID
+            tile.tofile(os.path.join(self.directory.name, name))
+
+    def test_bilinear_interpolation(self):
+        """Test points are interpolated exactly on a plane, across tiles and voids"""
+        dem = LocalDEM(self.directory.name, max_open_tiles=1)
+        rng = np.random.default_rng(0)
+        points = np.column_stack((rng.uniform(37.0, 38.0, 200), rng.uniform(-123.0, -122.0, 200)))
+        points = np.vstack((points, [[37.95, -122.05], [37.0, -123.0], [36.99, -122.99], [36.5, -122.5]]))
+
+        elevations = dem.get_elevations(points)
+
+        expected = 1000 * (points[:200, 0] - 37.0) + 100 * (points[:200, 1] + 123.0)
+        np.testing.assert_allclose(elevations[:200], expected, atol=0.5)
+        np.testing.assert_allclose(elevations[200:202], [1045, 0], atol=0.5)
+        self.assertTrue(np.isnan(elevations[202]))
+        self.assertAlmostEqual(elevations[203], -450.0, delta=0.5)
+        self.assertTrue(np.isnan(dem.get_elevations([(10.0, 10.0)])[0]))
+
+    def test_local_dem_provider(self):
+        """Test the local-dem provider needs no network access"""
+        client = ElevationClient(primary_provider='local-dem', dem_directory=self.directory.name)
+
+        with patch('elevation.elevation_client.http_session.get') as mock_get:
+            elevations = client.get_elevations([(37.5, -122.5), (10.0, 10.0)])
+
+        mock_get.assert_not_called()
+        self.assertAlmostEqual(elevations[0], 550.0, delta=0.5)
+        self.assertIsNone(elevations[1])
+
+
+    def test_local_dem_stays_offline(self):
+        """Test missing tiles never fall back to the network and are picked up once added"""
+        with self.assertRaises(ValueError):
+            ElevationClient(primary_provider='local-dem')
+
+        cache = ElevationCache()
+        client = ElevationClient(primary_provider='local-dem', dem_directory=self.directory.name, cache=cache)
+        point = (38.5, -122.5)
+
+        with patch('elevation.elevation_client.http_session.get') as mock_get:
+            self.assertEqual(client.get_elevations([point]), [None])
+            self.assertIsNone(ElevationClient().get_elevations([point], provider='local-dem'))
+
+        mock_get.assert_not_called()
+        self.assertEqual(len(cache), 0)
+
+        # A tile added later is found, as the missing one was not remembered
+        np.full((11, 11), 700, dtype='>i2').tofile(os.path.join(self.directory.name, 'N38W123.hgt'))
+        self.assertAlmostEqual(client.get_elevations([point])[0], 700.0)
+        self.assertEqual(len(cache), 1)
+
+
+class TestElevationProcessing(unittest.TestCase):
+    """Test vectorized elevation smoothing and statistics"""
+
+    def setUp(self):
+        """Set up test data"""
+        rng = np.random.default_rng(8)
+        self.streams = [np.cumsum(rng.normal(0, 2, n)) + 100 for n in (120, 1, 0, 300, 45)]
+        self.distances = [np.cumsum(rng.uniform(5, 15, len(s))) for s in self.streams]
+        self.offsets = np.concatenate(([0], np.cumsum([len(s) for s in self.streams])))
+
+    def test_hysteresis_matches_loop(self):
+        """Test the prefix scan gives the sequential threshold filter"""
+        stream = self.streams[3]
+        expected = [stream[0]]
+        for elevation in stream[1:]:
+            expected.append(min(max(expected[-1], elevation - 2.5), elevation + 2.5))
+
+        np.testing.assert_allclose(processing.hysteresis_profile(stream, threshold=5), expected)
+
+        gain, loss = processing.gain_loss(stream, threshold=5)
+        steps = np.diff(expected)
+        self.assertAlmostEqual(gain, steps[steps > 0].sum())
+        self.assertAlmostEqual(loss, -steps[steps < 0].sum())
+
+    def test_batch_matches_single(self):
+        """Test concatenated streams give the same results as one at a time"""
+        summary = processing.summarize(
+            np.concatenate(self.streams), np.concatenate(self.distances),
+            smoothing="savgol", window=7, offsets=self.offsets
+        )
+
+        for i, (stream, distances) in enumerate(zip(self.streams, self.distances)):
+            single = processing.summarize(stream, distances, smoothing="savgol", window=7)
+            self.assertAlmostEqual(summary['gain'][i], single['gain'])
+            self.assertAlmostEqual(summary['loss'][i], single['loss'])
+            np.testing.assert_allclose(summary['grade_histogram'][i], single['grade_histogram'])
+            np.testing.assert_equal(summary['max_grade'][i], single['max_grade'])
+
+    def test_smoothing_and_grades(self):
+        """Test smoothing removes spikes and grades follow the slope"""
+        distances = np.arange(200) * 10.0
+        elevations = distances * 0.05
+        spiky = elevations.copy()
+        spiky[50] += 40
+
+        np.testing.assert_allclose(processing.smooth(spiky, "median", 5), elevations, atol=0.51)
+        np.testing.assert_allclose(processing.smooth(elevations, "savgol", 9)[4:-4], elevations[4:-4], atol=1e-9)
+
+        summary = processing.summarize(elevations, distances)
+        self.assertAlmostEqual(summary['max_grade'], 5.0)
+        self.assertAlmostEqual(summary['grade_histogram'].sum(), 1950.0)
+
+
 class TestElevationMatcher(unittest.TestCase):
     """Test the Elevation Matching algorithm"""
 
@@ -300,6 +941,504 @@ class TestElevationMatcher(unittest.TestCase):
         self.assertGreater(matches[0]['similarity'], matches[1]['similarity'])
 
 
+    def test_find_similar_routes_resampled(self):
+        """Test matching on fixed-length resampled profiles"""
+        matcher = ElevationMatcher(profile_points=32)
+        target_route = Route.from_dict({
+            'id': '1',
+            'distance': 10000,
+            'elevation_points': [100, 120, 150, 180, 150, 100]
+        })
+        similar = Route.from_dict({
+            'id': '2',
+            'distance': 12000,
+            'elevation_points': [110, 115, 130, 160, 190, 175, 160, 110]
+        })
+        different = Route.from_dict({
+            'id': '3',
+            'distance': 8000,
+            'elevation_points': [200, 180, 150, 120, 150, 200]
+        })
+
+        matches = matcher.find_similar_routes(target_route, [different, similar])
+
+        self.assertEqual([match['route'].id for match in matches], ['2', '3'])
+
+    def test_find_matches_pruning(self):
+        """Test the pruned top-k search returns the exhaustive ranking"""
+        rng = np.random.default_rng(7)
+        target_route = Route.from_dict({
+            'id': 'target',
+            'distance': 10000,
+            'elevation_points': list(np.cumsum(rng.normal(0, 3, 200)) + 150)
+        })
+        candidates = [
+            Route.from_dict({
+                'id': str(i),
+                'distance': float(rng.uniform(5000, 15000)),
+                'elevation_points': list(np.cumsum(rng.normal(0, 3, 150)) + rng.uniform(0, 300))
+            })
+            for i in range(40)
+        ]
+
+        matches = self.matcher.find_matches(target_route, candidates, max_results=3)
+        expected = sorted(
+            candidates,
+            key=lambda route: self.matcher._calculate_similarity(target_route, route),
+            reverse=True
+        )[:3]
+
+        self.assertEqual([route.id for route, _ in matches], [route.id for route in expected])
+
+        stats = self.matcher.last_search_stats
+        self.assertEqual(
+            stats['pruned_lb_kim'] + stats['pruned_lb_keogh'] + stats['dtw_computed'],
+            len(candidates)
+        )
+        self.assertLess(stats['dtw_computed'], len(candidates))
+
+    def test_find_matches_zero_results(self):
+        """Test asking for no matches returns an empty list"""
+        target_route = Route.from_dict({'id': 'target', 'distance': 10000, 'elevation_points': [100, 150, 120]})
+        candidates = [
+            Route.from_dict({'id': '1', 'distance': 9000, 'elevation_points': [100, 140, 120]}),
+            Route.from_dict({'id': '2', 'distance': 11000, 'elevation_points': [200, 180, 220]})
+        ]
+
+        self.assertEqual(self.matcher.find_matches(target_route, candidates, max_results=0), [])
+        self.assertEqual(self.matcher.find_similar_routes(target_route, candidates, max_results=0), [])
+
+    def test_parallel_matches_serial(self):
+        """Test process-pool scoring gives the serial results"""
+        rng = np.random.default_rng(11)
+        target_route = Route.from_dict({
+            'id': 'target',
+            'distance': 10000,
+            'elevation_points': list(np.cumsum(rng.normal(0, 3, 100)) + 150)
+        })
+        candidates = [
+            Route.from_dict({
+                'id': str(i),
+                'distance': float(rng.uniform(5000, 15000)),
+                'elevation_points': list(np.cumsum(rng.normal(0, 3, 80)) + rng.uniform(0, 300))
+            })
+            for i in range(20)
+        ]
+
+        serial = ElevationMatcher().find_matches(target_route, candidates, max_results=4)
+        matcher = ElevationMatcher(n_workers=2, chunk_size=5)
+        matcher.build_spatial_index(candidates)
+        try:
+            parallel = matcher.find_matches(target_route, candidates, max_results=4)
+            executor = matcher._executor
+            matcher.find_matches(target_route, candidates, max_results=4)
+            # The pool is kept between searches
+            self.assertIs(matcher._executor, executor)
+        finally:
+            matcher.close()
+        self.assertIsNone(matcher._executor)
+
+        self.assertEqual(
+            [(route.id, similarity) for route, similarity in parallel],
+            [(route.id, similarity) for route, similarity in serial]
+        )
+
+        # Workers get the scoring settings, not the matcher and its spatial index
+        settings = matcher._scoring_settings()
+        self.assertLess(len(pickle.dumps(settings)), 200)
+        self.assertEqual(_scoring_matcher(settings)._scoring_settings(), settings)
+
+    def test_similarity_matrix(self):
+        """Test the all-pairs similarity matrix"""
+        matcher = ElevationMatcher(chunk_size=2)
+        targets = [
+            Route.from_dict({'id': 't1', 'distance': 10000, 'elevation_points': [100, 120, 150, 180, 150, 100]}),
+            Route.from_dict({'id': 't2', 'distance': 8000, 'elevation_points': [200, 180, 150, 120, 150, 200]})
+        ]
+        candidates = [
+            Route.from_dict({'id': 'c1', 'distance': 12000, 'elevation_points': [110, 130, 160, 190, 160, 110]}),
+            Route.from_dict({'id': 'c2', 'distance': 8000, 'elevation_points': [200, 180, 150, 120, 150, 200]}),
+            Route.from_dict({'id': 'c3', 'distance': 9000})
+        ]
+
+        try:
+            result = matcher.similarity_matrix(targets, candidates, top_k=2, n_workers=2)
+        finally:
+            matcher.close()
+        matrix = result['similarity']
+
+        self.assertEqual(matrix.shape, (2, 3))
+        self.assertTrue(np.isnan(matrix[:, 2]).all())
+        self.assertAlmostEqual(matrix[0, 0], matcher._calculate_similarity(targets[0], candidates[0]), places=6)
+        self.assertEqual([route.id for route, _ in result['top_matches'][0]], ['c1', 'c2'])
+        self.assertEqual([route.id for route, _ in result['top_matches'][1]], ['c2', 'c1'])
+
+    def test_similarity_matrix_bounds_tiles_in_flight(self):
+        """Test the similarity matrix only keeps a few tiles queued"""
+        routes = [
+            Route.from_dict({'id': str(i), 'distance': 10000 + i, 'elevation_points': [100, 120 + i, 150, 110]})
+            for i in range(4)
+        ]
+        matcher = ElevationMatcher(chunk_size=1)
+
+        in_flight = []
+        def recording_wait(futures, **kwargs):
+            in_flight.append(len(futures))
+            return wait(futures, **kwargs)
+
+        try:
+            with patch('matching.elevation_matcher.wait', side_effect=recording_wait):
+                result = matcher.similarity_matrix(routes, routes, n_workers=2)
+            serial = matcher.similarity_matrix(routes, routes, n_workers=1)
+        finally:
+            matcher.close()
+
+        # 16 tiles, at most 2 per worker submitted at a time
+        self.assertEqual(max(in_flight), 4)
+        np.testing.assert_allclose(result['similarity'], serial['similarity'])
+
+        # Without a per-call override the matcher's serial default applies
+        with patch('matching.elevation_matcher.os.cpu_count', return_value=4):
+            matcher.similarity_matrix(routes, routes)
+        self.assertIsNone(matcher._executor)
+
+    def test_compare_routes_alignment(self):
+        """Test the profile alignment returned by compare_routes"""
+        route1 = Route.from_dict({
+            'id': '1',
+            'distance': 10000,
+            'elevation_gain': 80,
+            'elevation_points': [100, 120, 150, 180, 150, 100]
+        })
+        route2 = Route.from_dict({
+            'id': '2',
+            'distance': 12000,
+            'elevation_gain': 80,
+            'elevation_points': [100, 150, 180, 100]
+        })
+
+        comparison = self.matcher.compare_routes(route1, route2, include_alignment=True)
+        alignment = comparison['alignment']
+
+        self.assertEqual(alignment[0], (0.0, 0.0))
+        self.assertEqual(alignment[-1], (1.0, 1.0))
+        self.assertNotIn('alignment', self.matcher.compare_routes(route1, route2))
+
+        # The alignment follows the matcher's DTW window
+        windowed = ElevationMatcher(dtw_window=0)
+        _, path = dtw_path(route1.get_normalized_elevations(), route2.get_normalized_elevations(), window=0)
+        self.assertEqual(windowed.align_profiles(route1, route2), [(i * (1.0 / 5), j * (1.0 / 3)) for i, j in path])
+        self.assertNotEqual(windowed.align_profiles(route1, route2), alignment)
+
+
+class TestDTWKernels(unittest.TestCase):
+    """Test the DTW kernels"""
+
+    def setUp(self):
+        """Set up test data"""
+        rng = np.random.default_rng(42)
+        self.seq1 = np.cumsum(rng.normal(0, 5, 120)) + 200
+        self.seq2 = np.cumsum(rng.normal(0, 5, 90)) + 210
+
+    def test_vectorized_matches_loop(self):
+        """Test the vectorized kernel returns the reference distance"""
+        matcher = ElevationMatcher(dtw_method="loop")
+        expected = matcher._dynamic_time_warping(list(self.seq1), list(self.seq2))
+        self.assertAlmostEqual(dtw_distance(self.seq1, self.seq2), expected, places=6)
+
+    def test_window_constraints(self):
+        """Test banded distances are never below the unconstrained distance"""
+        full = dtw_distance(self.seq1, self.seq2)
+        banded = dtw_distance(self.seq1, self.seq2, window=5)
+        itakura = dtw_distance(self.seq1, self.seq2, window_type="itakura")
+        self.assertGreaterEqual(banded, full)
+        self.assertGreaterEqual(itakura, full)
+        self.assertTrue(np.isfinite(banded))
+        self.assertTrue(np.isfinite(itakura))
+
+        # A band wide enough to cover the whole matrix changes nothing
+        self.assertAlmostEqual(dtw_distance(self.seq1, self.seq2, window=200), full, places=6)
+
+    def test_rolling_matches_full_matrix(self):
+        """Test the two-row kernel returns the full-matrix distance"""
+        self.assertAlmostEqual(
+            dtw_distance_rolling(self.seq1, self.seq2),
+            dtw_distance(self.seq1, self.seq2),
+            places=6
+        )
+        self.assertAlmostEqual(
+            dtw_distance_rolling(self.seq1, self.seq2, window=5),
+            dtw_distance(self.seq1, self.seq2, window=5),
+            places=6
+        )
+
+    def test_early_abandon(self):
+        """Test the kernel gives up once the cutoff is exceeded"""
+        distance = dtw_distance(self.seq1, self.seq2)
+
+        self.assertEqual(dtw_distance_rolling(self.seq1, self.seq2, cutoff=distance / 2), np.inf)
+        self.assertAlmostEqual(
+            dtw_distance_rolling(self.seq1, self.seq2, cutoff=distance * 2),
+            distance,
+            places=6
+        )
+
+    def test_linear_memory_path(self):
+        """Test divide-and-conquer path recovery"""
+        distance, path = dtw_path(self.seq1, self.seq2)
+        full_distance, _ = dtw_path(self.seq1, self.seq2, memory="full")
+
+        self.assertAlmostEqual(distance, full_distance, places=6)
+        self.assertEqual(path[0], (0, 0))
+        self.assertEqual(path[-1], (len(self.seq1) - 1, len(self.seq2) - 1))
+        for (i1, j1), (i2, j2) in zip(path, path[1:]):
+            self.assertIn((i2 - i1, j2 - j1), [(0, 1), (1, 0), (1, 1)])
+
+    def test_windowed_path(self):
+        """Test path recovery within a global constraint"""
+        for window, window_type in ((5, "sakoe-chiba"), (None, "itakura")):
+            distance, path = dtw_path(self.seq1, self.seq2, window=window, window_type=window_type)
+            lo, hi = window_bounds(len(self.seq1), len(self.seq2), window, window_type)
+
+            self.assertAlmostEqual(
+                distance, dtw_distance(self.seq1, self.seq2, window=window, window_type=window_type), places=6
+            )
+            self.assertEqual(path[-1], (len(self.seq1) - 1, len(self.seq2) - 1))
+            self.assertTrue(all(lo[i] <= j <= hi[i] for i, j in path))
+
+    def test_fast_dtw(self):
+        """Test the coarse-to-fine approximation"""
+        exact = dtw_distance(self.seq1, self.seq2)
+        approximate, path = fast_dtw(self.seq1, self.seq2, radius=2)
+
+        self.assertGreaterEqual(approximate, exact - 1e-6)
+        self.assertEqual(path[-1], (len(self.seq1) - 1, len(self.seq2) - 1))
+
+        # A radius covering every cell gives the exact distance
+        self.assertAlmostEqual(fast_dtw(self.seq1, self.seq2, radius=200)[0], exact, places=6)
+
+    def test_approximation_error(self):
+        """Test the matcher reports the error of the fast method"""
+        matcher = ElevationMatcher(dtw_method="fast", dtw_radius=2)
+        route1 = Route.from_dict({'id': '1', 'distance': 1000, 'elevation_points': list(self.seq1)})
+        route2 = Route.from_dict({'id': '2', 'distance': 1000, 'elevation_points': list(self.seq2)})
+
+        report = matcher.approximation_error(route1, route2)
+
+        exact = dtw_distance(route1.elevation_points, route2.elevation_points)
+        self.assertAlmostEqual(report['exact_distance'], exact, places=6)
+        self.assertGreaterEqual(report['absolute_error'], -1e-6)
+
+
+class TestSpatialIndex(unittest.TestCase):
+    """Test the start point spatial index"""
+
+    def setUp(self):
+        """Set up test data"""
+        rng = np.random.default_rng(3)
+        self.routes = [
+            Route.from_dict({
+                'id': str(i),
+                'start_latlng': (37.7 + rng.uniform(-1, 1), -122.4 + rng.uniform(-1, 1))
+            })
+            for i in range(200)
+        ]
+        self.matcher = ElevationMatcher(max_distance_km=30)
+        self.target = Route.from_dict({'id': 'target', 'start_latlng': (37.7, -122.4)})
+
+    def test_query_matches_scan(self):
+        """Test index queries agree with the haversine scan"""
+        index = SpatialIndex.from_routes(self.routes, cell_km=10)
+        expected = self.matcher._filter_by_location(self.target, self.routes)
+
+        found = index.query(37.7, -122.4, 30)
+
+        self.assertGreater(len(expected), 0)
+        self.assertEqual([route.id for route in found], [route.id for route in expected])
+
+    def test_insert_and_remove(self):
+        """Test incremental updates"""
+        self.matcher.build_spatial_index(self.routes[:100])
+        index = self.matcher.spatial_index
+        for route in self.routes[100:]:
+            index.insert(route)
+        index.remove('0')
+        self.assertFalse(index.remove('0'))
+
+        found = self.matcher._filter_by_location(self.target, None)
+        expected = self.matcher._filter_by_location(self.target, self.routes[1:])
+
+        self.assertEqual(len(index), 199)
+        self.assertEqual([route.id for route in found], [route.id for route in expected])
+
+
+    def test_route_location_filter(self):
+        """Test filtering on the whole route geometry"""
+        # Point-to-point route starting ~80km away that finishes near the target
+        latlng = np.column_stack([np.linspace(38.42, 37.70, 500), np.full(500, -122.40)])
+        passing = Route.from_dict({
+            'id': 'passing',
+            'start_latlng': (38.42, -122.40),
+            'end_latlng': (37.70, -122.40),
+            'latlng_points': latlng.tolist()
+        })
+        distant = Route.from_dict({
+            'id': 'distant',
+            'start_latlng': (38.42, -121.0),
+            'end_latlng': (38.50, -121.0)
+        })
+        target = Route.from_dict({'id': 'target', 'start_latlng': (37.75, -122.45)})
+
+        start_matcher = ElevationMatcher(max_distance_km=10)
+        route_matcher = ElevationMatcher(max_distance_km=10, location_filter="route")
+
+        self.assertEqual(start_matcher._filter_by_location(target, [passing, distant]), [])
+        self.assertEqual(route_matcher._filter_by_location(target, [passing, distant]), [passing])
+
+
+class TestRouteCollection(unittest.TestCase):
+    """Test the columnar route collection"""
+
+    def setUp(self):
+        """Set up test data"""
+        rng = np.random.default_rng(5)
+        self.routes = []
+        for i in range(40):
+            elevations = list(100 + np.cumsum(rng.normal(0, 5, 30 + i)))
+            self.routes.append(Route.from_dict({
+                'id': str(i),
+                'name': f'Route {i}',
+                'distance': 5000 + 200 * i,
+                'elevation_gain': 10 * i,
+                'start_latlng': (37.7 + rng.uniform(-1, 1), -122.4 + rng.uniform(-1, 1)),
+                'elevation_points': elevations if i % 7 else []
+            }))
+        self.collection = RouteCollection.from_routes(self.routes)
+        self.target = Route.from_dict({
+            'id': 'target',
+            'distance': 6000,
+            'start_latlng': (37.7, -122.4),
+            'elevation_points': list(100 + np.cumsum(rng.normal(0, 5, 40)))
+        })
+
+    def test_routes_are_views(self):
+        """Test routes round-trip and share the elevation buffer"""
+        route = self.collection[3]
+
+        self.assertEqual(len(self.collection), 40)
+        self.assertEqual(route.id, '3')
+        self.assertEqual(route.distance, 5600)
+        np.testing.assert_array_equal(route.elevation_points, self.routes[3].elevation_points)
+        self.assertTrue(np.shares_memory(route.elevation_points, self.collection.elevation_buffer))
+        self.assertIs(self.collection[3], route)
+        self.assertEqual(len(self.collection[0].elevation_points), 0)
+
+    def test_filters(self):
+        """Test vectorized filters agree with a loop over the routes"""
+        subset = self.collection.filter(min_distance=6000, max_gain=300, require_elevation=True)
+        expected = [route.id for route in self.routes
+                    if route.distance >= 6000 and route.elevation_gain <= 300 and len(route.elevation_points)]
+
+        self.assertEqual(list(subset.ids), expected)
+        for i, route_id in enumerate(subset.ids):
+            np.testing.assert_array_equal(subset.elevation_view(i), self.routes[int(route_id)].elevation_points)
+
+    def test_matcher_accepts_collection(self):
+        """Test matching against a collection gives the same results as a list"""
+        matcher = ElevationMatcher(max_distance_km=60)
+
+        expected = matcher.find_matches(self.target, self.routes, max_results=5)
+        found = matcher.find_matches(self.target, self.collection, max_results=5)
+
+        self.assertGreater(len(found), 0)
+        self.assertEqual([(r.id, s) for r, s in found], [(r.id, s) for r, s in expected])
+
+
+    def test_binary_round_trip(self):
+        """Test collections survive the binary format, memory-mapped and delta-encoded"""
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'routes.semr')
+            binary_format.save_collection(path, self.collection)
+            loaded = binary_format.load_collection(path)
+
+            self.assertEqual(list(loaded.ids), list(self.collection.ids))
+            np.testing.assert_array_equal(loaded.elevation_buffer, self.collection.elevation_buffer)
+            self.assertEqual(loaded[5].name, 'Route 5')
+            self.assertEqual(loaded[5].start_latlng, self.collection[5].start_latlng)
+            del loaded
+
+        data = binary_format.dumps_collection(self.collection, elevation_encoding="delta16")
+        decoded = binary_format.loads_collection(data)
+        self.assertLess(len(data), len(binary_format.dumps_collection(self.collection)))
+        np.testing.assert_allclose(decoded.elevation_buffer, self.collection.elevation_buffer, atol=0.051)
+
+    def test_binary_route(self):
+        """Test a single route keeps its streams"""
+        route = Route.from_dict({
+            'id': 'strava_route_1',
+            'distance': 200,
+            'elevation_points': [100, 120, 110],
+            'latlng_points': [[37.0, -122.0], [37.001, -122.0], [37.002, -122.0]],
+            'distance_points': [0, 100, 200]
+        })
+
+        loaded = binary_format.loads_route(binary_format.dumps_route(route))
+
+        self.assertEqual(loaded.id, route.id)
+        np.testing.assert_array_equal(loaded.elevation_points, route.elevation_points)
+        np.testing.assert_array_equal(loaded.latlng_points, route.latlng_points)
+        np.testing.assert_array_equal(loaded.distance_points, route.distance_points)
+
+
+class TestRouteStore(unittest.TestCase):
+    """Test the memory-mapped route store"""
+
+    def setUp(self):
+        """Set up a store directory"""
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.route = Route.from_dict({
+            'id': 'strava_route_1',
+            'name': 'Hills',
+            'distance': 200,
+            'start_latlng': (37.0, -122.0),
+            'elevation_points': [100, 120, 110],
+            'latlng_points': [[37.0, -122.0], [37.001, -122.0], [37.002, -122.0]]
+        })
+
+    def test_shared_between_instances(self):
+        """Test appends by one store are visible to another on the same directory"""
+        writer = RouteStore(self.directory.name)
+        reader = RouteStore(self.directory.name)
+
+        writer[1] = self.route
+        stored = reader[1]
+
+        self.assertIn('1', reader)
+        self.assertEqual(stored.name, 'Hills')
+        self.assertEqual(stored.start_latlng, (37.0, -122.0))
+        np.testing.assert_array_equal(stored.elevation_points, self.route.elevation_points)
+        np.testing.assert_array_equal(stored.latlng_points, self.route.latlng_points)
+        self.assertIs(reader[1], stored)
+
+        writer.put_many([(f'activity_{i}', self.route) for i in range(3)])
+        self.assertEqual(len(reader), 4)
+        self.assertIs(reader[1], stored)
+
+    def test_remove_and_compact(self):
+        """Test removed routes disappear and compaction keeps the rest"""
+        store = RouteStore(self.directory.name)
+        store.put_many([(str(i), self.route) for i in range(3)])
+
+        del store['0']
+        store.compact()
+        reopened = RouteStore(self.directory.name)
+
+        self.assertEqual(sorted(reopened.keys()), ['1', '2'])
+        np.testing.assert_array_equal(reopened['2'].elevation_points, self.route.elevation_points)
+        self.assertEqual(len([f for f in os.listdir(self.directory.name) if f.startswith('data-')]), 1)
+
+
 class TestStravaElevationMatcher(unittest.TestCase):
     """Test the main StravaElevationMatcher class"""
 